@@ -6,9 +6,11 @@ int relayPins[] = {12, 13};
 const int relayCount = sizeof(relayPins) / sizeof(relayPins[0]);
 int sensorPins[] = {8, 9};
 
-bool lockerOpened = false;
-bool waitingForClose = false;
-int activeLockerId = -1;
+// Szekrényenkénti állapot: több szekrény is lehet egyszerre nyitva
+// (több szobás foglalásnál a központi egység párhuzamosan nyitja őket)
+bool lockerOpened[relayCount] = {false};
+bool waitingForClose[relayCount] = {false};
+int activeLockerId = -1;  // utoljára nyitott szekrény (STATE lekérdezéshez)
 int lastState = HIGH;
 
 LiquidCrystal_I2C lcd(0x27, 16, 2);
@@ -33,15 +35,19 @@ String replaceAccents(String msg) {
   return msg;
 }
 
-void openLocker(int id) {
+// A központi egység "#<sorszám>;" előtagot tehet a parancs elé: a válasz
+// ugyanezzel az előtaggal megy vissza, így a nyugták nem csúszhatnak el
+void openLocker(int id, String tag) {
   if (id < 0 || id >= relayCount) {
+    Serial.print(tag);
     Serial.println("ERROR;INVALID_ID");
     return;
   }
   activeLockerId = id;
   digitalWrite(relayPins[id], HIGH);
-  waitingForClose = true;
-  lockerOpened = false;
+  waitingForClose[id] = true;
+  lockerOpened[id] = false;
+  Serial.print(tag);
   Serial.print("OPENED;");  // <---- AZ INSTANT VISSZAJELZÉS
   Serial.println(id);
 }
@@ -84,7 +90,8 @@ void handleScroll() {
   }
 }
 
-void sendLockState() {
+void sendLockState(String tag) {
+  Serial.print(tag);
   // FIX: sensorPin is not defined - should use sensorPins array
   if (activeLockerId != -1) {
     int state = digitalRead(sensorPins[activeLockerId]);
@@ -117,18 +124,25 @@ void loop() {
     char c = Serial.read();
     if (c == '\n') {
       input.trim();
+      String tag = "";
+      if (input.startsWith("#") && input.indexOf(';') > 0) {
+        tag = input.substring(0, input.indexOf(';') + 1);
+        input = input.substring(input.indexOf(';') + 1);
+      }
       if (input.startsWith("OPEN;")) {
         int id = input.substring(5).toInt();
-        openLocker(id);
+        openLocker(id, tag);
       } else if (input.startsWith("DISPLAY;")) {
         startScroll(input.substring(8));
+        Serial.print(tag);
         Serial.println("DISPLAY_OK");
       } else if (input == "CLEAR") {
         lcd.clear();
         scrollMsg = "";
+        Serial.print(tag);
         Serial.println("DISPLAY_OK");
       } else if (input == "STATE") {
-        sendLockState();
+        sendLockState(tag);
       }
       input = "";
     } else {
@@ -140,22 +154,23 @@ void loop() {
   handleScroll();
 
   // ---- Automatikus állapotfigyelés ----
-  if (waitingForClose && activeLockerId != -1) {
-    int currentState = digitalRead(sensorPins[activeLockerId]);
+  for (int i = 0; i < relayCount; i++) {
+    if (!waitingForClose[i]) continue;
+    int currentState = digitalRead(sensorPins[i]);
 
-    if (!lockerOpened && currentState == HIGH) {
-      lockerOpened = true;  // egyszer rögzítjük a nyitást
+    if (!lockerOpened[i] && currentState == HIGH) {
+      lockerOpened[i] = true;  // egyszer rögzítjük a nyitást
     }
 
     // Visszazárás érzékelése
-    if (lockerOpened && currentState == LOW) {
-      digitalWrite(relayPins[activeLockerId], LOW); // relé vissza
+    if (lockerOpened[i] && currentState == LOW) {
+      digitalWrite(relayPins[i], LOW); // relé vissza
       Serial.print("STATE;CLOSED;");
-      Serial.println(activeLockerId);
+      Serial.println(i);
 
-      waitingForClose = false;
-      lockerOpened = false;
-      activeLockerId = -1; // visszaállítjuk nullára
+      waitingForClose[i] = false;
+      lockerOpened[i] = false;
+      if (activeLockerId == i) activeLockerId = -1;
     }
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# -------- CONFIG --------
+# A generációs fájlt minden olyan folyamat frissíti, amely foglalási állapotot
+# változtat (DbFetcher, checkInOut); a validator ebből tudja, hogy újra kell
+# építenie az indexet. Külön folyamatok, ezért nem elég egy memóriabeli jelzés.
+GENERATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "access.gen")
+
+MAX_ENTRIES = 4096
+TTL_SECONDS = 60
+
+
+# -------- INVALIDÁLÁS --------
+def invalidate(path=GENERATION_FILE):
+    # Atomikus csere: új fájl -> új inode + mtime, az olvasó sosem lát félkész állapotot
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, path)
+
+
+def _read_generation(path):
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+# -------- CACHE --------
+class AccessCache:
+    """
+    (cardID, roomName) -> engedélyezett-e döntések memóriabeli indexe.
+
+    Újraépítéskor a `rebuild` által visszaadott összes engedélyezett párost
+    betölti, az indexben nem szereplő párosokat a `lookup` dönti el és az
+    eredmény (tiltás is) bekerül a korlátos LRU-ba. Az index egyben cserélődik,
+    így a lekérdezők mindig egy teljes generációt látnak.
+    """
+
+    def __init__(self, rebuild, lookup, max_entries=MAX_ENTRIES,
+                 ttl=TTL_SECONDS, generation_file=GENERATION_FILE):
+        self._rebuild = rebuild
+        self._lookup = lookup
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation_file = generation_file
+
+        self._lock = threading.Lock()
+        self._entries = None
+        self._complete = False
+        self._generation = None
+        self._built_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.evictions = 0
+
+    def _is_stale(self):
+        if self._entries is None:
+            return True
+        if time.monotonic() - self._built_at > self.ttl:
+            return True
+        return _read_generation(self.generation_file) != self._generation
+
+    def rebuild(self):
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        # Csak a lock alatt hívható.
+        # A generációt az olvasás ELŐTT rögzítjük: ha közben jön egy újabb
+        # invalidálás, a következő lekérdezés újra fog építeni.
+        generation = _read_generation(self.generation_file)
+        entries = OrderedDict()
+        complete = True
+        for card_id, room_name in self._rebuild():
+            if len(entries) >= self.max_entries:
+                complete = False
+                break
+            entries[(card_id, room_name)] = True
+
+        self._entries = entries
+        self._complete = complete
+        self._generation = generation
+        self._built_at = time.monotonic()
+        self.rebuilds += 1
+
+    def is_allowed(self, card_id, room_name) -> bool:
+        if self._is_stale():
+            with self._lock:
+                # Újra a lock alatt: egy invalidálás után csak az első szál épít
+                # újra, a közben várakozók már a kész indexet kapják
+                if self._is_stale():
+                    self._load()
+
+        key = (card_id, room_name)
+        with self._lock:
+            entries = self._entries
+            allowed = entries.get(key)
+            if allowed is not None:
+                self.hits += 1
+                if not self._complete:
+                    entries.move_to_end(key)
+                return allowed
+
+            # Teljes index esetén ami nincs benne, az tiltott – nem kell DB
+            if self._complete:
+                self.hits += 1
+                return False
+            self.misses += 1
+
+        allowed = self._lookup(card_id, room_name)
+        with self._lock:
+            # Ha közben újraépült az index, a régi generációba nem írunk
+            if entries is self._entries:
+                entries[key] = allowed
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+                    self.evictions += 1
+        return allowed
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "evictions": self.evictions,
+            "entries": len(self._entries) if self._entries is not None else 0,
+            "complete": self._complete,
+        }
@@ -0,0 +1,279 @@
+"""
+Hozzáférési napló: ajtó auth döntések és check-in/check-out műveletek.
+
+A forró úton (validator worker, kioszk) a record() csak egy rekordot tesz egy
+memóriabeli gyűrűpufferbe; egy háttérszál kötegekben (FLUSH_BATCH darab vagy
+FLUSH_INTERVAL idő után) egyetlen többsoros INSERT-tel írja az audit_log
+táblába. Ha a tároló lassú vagy nem elérhető, a puffer legfeljebb
+BUFFER_SIZE rekordot tart, fölötte a legrégebbiek esnek ki (számolva).
+
+Opcionálisan az AuditUploader a még fel nem töltött sorokat hotelenként
+kötegelve elküldi a backendnek (POST UPLOAD_URL_TEMPLATE, lásd backendStub).
+"""
+import atexit
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+import requests
+
+import hotels
+import logs
+import metrics
+import storage
+
+# -------- CONFIG --------
+BUFFER_SIZE = 10000          # ennyi rekord várhat memóriában, fölötte a legrégebbi kiesik
+FLUSH_BATCH = 200            # ennyi összegyűlt rekord azonnal ébreszti az írót
+FLUSH_INTERVAL = 1.0         # ennyi időnként akkor is ír, ha kevesebb gyűlt össze
+MAX_INSERT_ROWS = 500        # egy INSERT utasítás legfeljebb ennyi sort visz
+BACKOFF_MAX = 30.0           # írási hiba után legfeljebb ennyit vár
+
+UPLOAD_URL_TEMPLATE = "https://hotelflowserv.optikart.hu/api/devices/audit/{hotel_id}"
+UPLOAD_ENABLED = False       # a backend végpontja még nem él; server.py indítja, ha True
+UPLOAD_BATCH = 500
+UPLOAD_INTERVAL = 60
+UPLOAD_TIMEOUT = 10
+
+COLUMNS = ("ts", "kind", "hotelId", "cardId", "door", "bookingId", "result", "latencyMs", "detail")
+
+logger = logs.get("audit")
+
+AUDIT_BUFFERED = metrics.gauge("hotelflow_audit_buffered", "Kiírásra váró audit rekordok")
+AUDIT_WRITTEN = metrics.counter("hotelflow_audit_written_total", "Kiírt audit rekordok")
+AUDIT_DROPPED = metrics.counter("hotelflow_audit_dropped_total", "Teli puffer miatt eldobott audit rekordok")
+AUDIT_FLUSH_SECONDS = metrics.histogram("hotelflow_audit_flush_seconds", "Egy audit köteg kiírása")
+AUDIT_UPLOADS = metrics.counter("hotelflow_audit_upload_total", "Audit feltöltések eredmény szerint", ("result",))
+
+
+class AuditLog:
+    """
+    Gyűrűpuffer + háttér író. A rekordok sorszámot kapnak: a puffer csak a
+    sikeres INSERT után ürül, így írási hibánál semmi sem vész el, amíg
+    a puffer be nem telik (utána a legrégebbi rekordok esnek ki).
+    """
+
+    def __init__(self, capacity=BUFFER_SIZE, flush_batch=FLUSH_BATCH, flush_interval=FLUSH_INTERVAL):
+        self.capacity = capacity
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.written = 0
+        self.dropped = 0
+        self.failures = 0
+        self.last_error = None
+
+    # -------- FORRÓ ÚT --------
+    def record(self, kind, card=None, door=None, booking=None, result=None, latency=None,
+               detail=None, hotel=None):
+        """Egy esemény a pufferbe (nem blokkol, nem nyúl a DB-hez). latency másodpercben."""
+        entry = (time.time(), kind, hotel, card, door, booking, result,
+                 round(latency * 1000, 3) if latency is not None else None, detail)
+        with self._lock:
+            self._seq += 1
+            self._buffer.append((self._seq, entry))
+            if len(self._buffer) > self.capacity:
+                self._buffer.popleft()
+                self.dropped += 1
+                AUDIT_DROPPED.inc()
+            if len(self._buffer) == self.flush_batch:
+                self._wake.set()
+
+    def pending(self):
+        return len(self._buffer)
+
+    # -------- HÁTTÉR ÍRÓ --------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=5):
+        """Leállítás: a maradék még kiíródik (ha a tároló elérhető)."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            stopping = self._stopped.is_set()
+            try:
+                while self.flush():
+                    pass
+                self.failures = 0
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning("⚠️ Audit napló nem írható", error=e, buffered=len(self._buffer))
+            if stopping:
+                return
+            if self.failures:
+                self._stopped.wait(min(BACKOFF_MAX, self.flush_interval * 2 ** self.failures) * random.uniform(0.5, 1))
+            else:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+    def flush(self):
+        """Egy köteg kiírása; visszatér a kiírt rekordok számával (0: üres a puffer)."""
+        with self._lock:
+            batch = list(islice(self._buffer, MAX_INSERT_ROWS))
+        AUDIT_BUFFERED.set(len(self._buffer))
+        if not batch:
+            return 0
+
+        start = time.perf_counter()
+        rows = [(datetime.fromtimestamp(entry[0]),) + entry[1:] for _, entry in batch]
+        with storage.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    f"INSERT INTO audit_log ({', '.join(COLUMNS)}) VALUES "
+                    + ", ".join(["(" + ", ".join(["%s"] * len(COLUMNS)) + ")"] * len(rows)),
+                    [value for row in rows for value in row]
+                )
+                conn.commit()
+            finally:
+                cur.close()
+        AUDIT_FLUSH_SECONDS.observe(time.perf_counter() - start)
+
+        # Közben a teli puffer eleje kieshetett: csak a ténylegesen kiírtakat vesszük ki
+        last = batch[-1][0]
+        with self._lock:
+            while self._buffer and self._buffer[0][0] <= last:
+                self._buffer.popleft()
+        self.written += len(batch)
+        AUDIT_WRITTEN.inc(amount=len(batch))
+        AUDIT_BUFFERED.set(len(self._buffer))
+        return len(batch)
+
+    def stats(self):
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+# -------- FELTÖLTÉS --------
+class AuditUploader(threading.Thread):
+    """
+    A még fel nem töltött audit sorok küldése a backendnek, hotelenként egy
+    kérésben (UPLOAD_BATCH soronként), a hotel eszköz tokenjével. Sikeres
+    válasz után a sorok uploaded=1 jelölést kapnak; hiba esetén a következő
+    körben újra próbálja (a napló lokálisan megmarad).
+    """
+
+    def __init__(self, interval=UPLOAD_INTERVAL, batch_size=UPLOAD_BATCH):
+        super().__init__(name="audit-upload", daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self._stopped = threading.Event()
+
+        self.uploaded = 0
+        self.errors = 0
+        self.last_error = None
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                while self.upload_once() == self.batch_size:
+                    pass
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                AUDIT_UPLOADS.inc("error")
+                logger.warning("⚠️ Audit feltöltés sikertelen, újrapróbálás később", error=e)
+
+    def upload_once(self):
+        """Egy köteg feltöltése; visszatér a feltöltött sorok számával."""
+        with storage.connection() as conn:
+            cur = conn.cursor()
+            try:
+                cur.execute(
+                    f"SELECT id, {', '.join(COLUMNS)} FROM audit_log WHERE uploaded=0 ORDER BY id LIMIT %s",
+                    (self.batch_size,)
+                )
+                rows = cur.fetchall()
+                by_hotel = {}
+                for row in rows:
+                    hotel_id = row["hotelId"] if row["hotelId"] is not None else hotels.DEFAULT_HOTEL_ID
+                    by_hotel.setdefault(hotel_id, []).append(row)
+
+                done = 0
+                for hotel_id, hotel_rows in by_hotel.items():
+                    status = self._post(hotel_id, hotel_rows)
+                    if not 200 <= status < 300:
+                        AUDIT_UPLOADS.inc("rejected")
+                        raise RuntimeError(f"HTTP {status} (hotel {hotel_id})")
+                    ids = [row["id"] for row in hotel_rows]
+                    cur.execute(
+                        "UPDATE audit_log SET uploaded=1 WHERE id IN (" + ", ".join(["%s"] * len(ids)) + ")",
+                        ids
+                    )
+                    conn.commit()
+                    done += len(ids)
+                    AUDIT_UPLOADS.inc("sent")
+                self.uploaded += done
+                return done
+            finally:
+                cur.close()
+
+    def _post(self, hotel_id, rows):
+        events = [{
+            "ts": row["ts"].isoformat(sep=" ") if isinstance(row["ts"], datetime) else row["ts"],
+            "kind": row["kind"],
+            "cardID": row["cardId"],
+            "doorID": row["door"],
+            "bookingId": row["bookingId"],
+            "result": row["result"],
+            "latencyMs": row["latencyMs"],
+            "detail": row["detail"],
+        } for row in rows]
+        headers = hotels.auth_headers(hotels.update_token(hotel_id), {"Accept": "application/json"})
+        response = self.session.post(UPLOAD_URL_TEMPLATE.format(hotel_id=hotel_id), headers=headers,
+                                     json={"events": events}, timeout=UPLOAD_TIMEOUT)
+        return response.status_code
+
+    def stats(self):
+        return {"uploaded": self.uploaded, "errors": self.errors, "last_error": self.last_error}
+
+
+# -------- FOLYAMATSZINTŰ NAPLÓ --------
+log = AuditLog()
+_uploader = None
+
+
+def record(kind, **fields):
+    log.record(kind, **fields)
+
+
+def start():
+    return log.start()
+
+
+def start_uploader():
+    global _uploader
+    if _uploader is None or not _uploader.is_alive():
+        _uploader = AuditUploader()
+        _uploader.start()
+    return _uploader
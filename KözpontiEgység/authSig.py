@@ -0,0 +1,115 @@
+"""
+Ajtó üzenetek aláírása (HarwerCodes/HotelFlowTerminal simpleSig).
+
+A simple_sig a referencia (karakterenkénti ciklus, ugyanaz, mint az
+Arduinón). A fast_sig ugyanazt számolja táblákkal: a forgatás XOR-ra
+lineáris, így egy szöveg hatása = (hossz, előre kiszámolt XOR érték),
+ami kártyára és ajtóra gyorsítótárazható. Egy sorozatban érkező
+burst-öt a verify_batch egyszerre ellenőriz.
+
+    python authSig.py   -> mikro-benchmark a két változatra
+"""
+import time
+from functools import lru_cache
+
+SEED = 0xBEEF
+CACHE_SIZE = 4096
+
+
+# -------- REFERENCIA (UGYANAZ, MINT ARDUINO) --------
+def simple_sig(cardID: str, doorID: str, ts: int) -> int:
+    s = 0xBEEF
+    for c in cardID:
+        s ^= ord(c)
+        s = ((s << 5) | (s >> 11)) & 0xFFFF
+    for c in doorID:
+        s ^= ord(c)
+        s = ((s << 5) | (s >> 11)) & 0xFFFF
+    for i in range(4):
+        s ^= (ts >> (i*8)) & 0xFF
+        s = ((s << 3) | (s >> 13)) & 0xFFFF
+    return s
+
+
+# -------- TÁBLÁK --------
+def _rotl(v, n):
+    n %= 16
+    return ((v << n) | (v >> (16 - n))) & 0xFFFF if n else v
+
+# A ts négy bájtjának hatása: s -> rotl(s, 12) ^ TS0[b0] ^ TS1[b1] ^ TS2[b2] ^ TS3[b3]
+TS0, TS1, TS2, TS3 = ([_rotl(b, k) for b in range(256)] for k in (12, 9, 6, 3))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _text_effect(text):
+    """(forgatás, xor): process(s, text) == rotl(s, forgatás) ^ xor."""
+    x = 0
+    for c in text:
+        x = _rotl(x ^ ord(c), 5)
+    return (5 * len(text)) % 16, x
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _prefix(cardID, doorID):
+    # A kártya + ajtó rész állapota (már a ts előtti 12 bites forgatással);
+    # ts-től független, ezért gyorsítótárazható. None, ha nem tiszta forgatás
+    # (16 bit feletti karakter): ilyenkor a referencia számol
+    if any(ord(c) > 0xFFFF for c in cardID + doorID):
+        return None
+    rc, xc = _text_effect(cardID)
+    rd, xd = _text_effect(doorID)
+    return _rotl(_rotl(_rotl(SEED, rc) ^ xc, rd) ^ xd, 12)
+
+
+def fast_sig(cardID: str, doorID: str, ts: int) -> int:
+    s = _prefix(cardID, doorID)
+    if s is None:
+        return simple_sig(cardID, doorID, ts)
+    return (s ^ TS0[ts & 0xFF] ^ TS1[(ts >> 8) & 0xFF]
+            ^ TS2[(ts >> 16) & 0xFF] ^ TS3[(ts >> 24) & 0xFF])
+
+
+def verify_batch(messages):
+    """[(cardID, doorID, ts, sig), ...] -> [bool, ...] egy menetben."""
+    prefix = _prefix
+    results = []
+    for card_id, door_id, ts, sig in messages:
+        s = prefix(card_id, door_id)
+        if s is None or type(ts) is not int:
+            results.append(simple_sig(card_id, door_id, ts) == sig)
+            continue
+        results.append(s ^ TS0[ts & 0xFF] ^ TS1[(ts >> 8) & 0xFF]
+                       ^ TS2[(ts >> 16) & 0xFF] ^ TS3[(ts >> 24) & 0xFF] == sig)
+    return results
+
+
+# -------- MIKRO-BENCHMARK --------
+def _bench(n=200_000, cards=50, doors=20):
+    import random
+
+    rnd = random.Random(1)
+    msgs = []
+    for i in range(n):
+        card = f"{rnd.randrange(cards):08X}"
+        door = str(100 + rnd.randrange(doors))
+        ts = rnd.randrange(1 << 32)
+        msgs.append((card, door, ts, simple_sig(card, door, ts)))
+
+    assert all(fast_sig(c, d, t) == s for c, d, t, s in msgs[:5000])
+    assert all(verify_batch(msgs[:5000]))
+
+    def run(label, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<22} {elapsed * 1000:8.1f} ms  {elapsed / n * 1e6:6.2f} µs/üzenet")
+        return elapsed
+
+    base = run("simple_sig", lambda: [simple_sig(c, d, t) == s for c, d, t, s in msgs])
+    fast = run("fast_sig", lambda: [fast_sig(c, d, t) == s for c, d, t, s in msgs])
+    batch = run("verify_batch", lambda: verify_batch(msgs))
+    print(f"gyorsulás: fast_sig {base / fast:.1f}x, verify_batch {base / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    _bench()
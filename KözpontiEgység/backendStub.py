@@ -0,0 +1,254 @@
+"""
+A Laravel DeviceController eszköz végpontjainak lokális mása (teszteléshez).
+
+- GET /api/devices/bookings/{hotelId}   (since + If-None-Match / ETag, mint a backendben)
+- PUT /api/devices/update-booking/{id}
+- POST /api/devices/audit/{hotelId}     (audit.AuditUploader; a backendben még nincs meg)
+
+Indítás:  python backendStub.py [port]
+majd DbFetcher.API_URL_TEMPLATE = "http://127.0.0.1:{port}/api/devices/bookings/{hotel_id}"
+(hotelenként egy stub példány, lásd hotel_id)
+"""
+import hashlib
+import json
+import re
+import sys
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+SYNC_OVERLAP_SECONDS = 5  # ugyanaz, mint DeviceController::SYNC_OVERLAP_SECONDS
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class BackendStub:
+    def __init__(self, hotel_id=1, token=None):
+        self.hotel_id = hotel_id
+        self.token = token
+        self.lock = threading.Lock()
+
+        # id -> rekord; az "updatedAt" mező csak itt él, a válaszból kimarad
+        self.bookings = {}
+        self.rooms = {}
+        self.rfid_keys = {}
+        self.relations = set()          # (booking_id, rooms_id)
+        self.rfid_connections = {}      # rfidKey -> roomId
+
+        self.updates = []               # beérkezett update-booking kérések
+        self.audit_events = []          # beérkezett audit események (POST /api/devices/audit/{id})
+        self.requests = []              # (method, path, headers) napló
+        self.fail_updates = False       # True -> update-booking 503-at ad
+        self.fail_audit = False         # True -> az audit feltöltés 503-at ad
+
+        self.server = None
+        self.thread = None
+
+    # -------- ADATOK --------
+    def _now(self):
+        return datetime.now().strftime(TIME_FORMAT)
+
+    def put_booking(self, booking):
+        with self.lock:
+            record = {
+                "id": booking["id"],
+                "users_id": booking.get("users_id", 1),
+                "startDate": booking.get("startDate"),
+                "endDate": booking.get("endDate"),
+                "checkInToken": booking.get("checkInToken"),
+                "checkInstatus": booking.get("checkInstatus"),
+                "checkInTime": booking.get("checkInTime"),
+                "checkOutTime": booking.get("checkOutTime"),
+                "status": booking.get("status", "confirmed"),
+            }
+            record["updatedAt"] = self._now()
+            self.bookings[record["id"]] = record
+
+    def put_room(self, room_id, name):
+        with self.lock:
+            self.rooms[room_id] = {"id": room_id, "name": name, "updatedAt": self._now()}
+
+    def put_rfid_key(self, key_id, rfid_key, is_used=0):
+        with self.lock:
+            self.rfid_keys[key_id] = {
+                "id": key_id, "hotels_id": self.hotel_id, "isUsed": is_used,
+                "rfidKey": rfid_key, "updatedAt": self._now(),
+            }
+
+    def connect(self, booking_id, room_id):
+        with self.lock:
+            self.relations.add((booking_id, room_id))
+
+    def link_key(self, rfid_key, room_id):
+        with self.lock:
+            self.rfid_connections[rfid_key] = room_id
+
+    def delete_booking(self, booking_id):
+        with self.lock:
+            self.bookings.pop(booking_id, None)
+
+    # -------- VÉGPONT LOGIKA --------
+    def bookings_payload(self, since=None, if_none_match=None):
+        with self.lock:
+            confirmed = {i: b for i, b in self.bookings.items() if b["status"] == "confirmed"}
+            ids = {
+                "bookings": sorted(confirmed),
+                "rooms": sorted(self.rooms),
+                "rfidKeys": sorted(self.rfid_keys),
+            }
+            # Foglalás nélküli hotel is 200, üres listákkal (a törléshez kell)
+            stamps = [r["updatedAt"] for table in (confirmed, self.rooms, self.rfid_keys)
+                      for r in table.values()]
+            cursor = max(stamps) if stamps else self._now()
+
+            relations = [{"booking_id": b, "rooms_id": r}
+                         for b, r in sorted(self.relations) if b in confirmed]
+            rfid_connections = [
+                {"key": key, "roomId": room_id, "roomName": self.rooms[room_id]["name"]}
+                for key, room_id in sorted(self.rfid_connections.items())
+                if room_id in self.rooms
+            ]
+
+            etag = '"' + hashlib.sha1(json.dumps(
+                [cursor, ids, relations, rfid_connections], sort_keys=True
+            ).encode()).hexdigest() + '"'
+            if if_none_match and if_none_match.strip() == etag:
+                return 304, None, etag
+
+            changed_since = None
+            if since:
+                try:
+                    changed_since = (datetime.strptime(since, TIME_FORMAT)
+                                     - timedelta(seconds=SYNC_OVERLAP_SECONDS)).strftime(TIME_FORMAT)
+                except ValueError:
+                    changed_since = None
+
+            def select(table):
+                rows = [r for _, r in sorted(table.items())
+                        if changed_since is None or r["updatedAt"] >= changed_since]
+                return [{k: v for k, v in r.items() if k != "updatedAt"} for r in rows]
+
+            payload = {
+                "mode": "delta" if changed_since else "full",
+                "cursor": cursor,
+                "bookings": select(confirmed),
+                "rooms": select(self.rooms),
+                "relations": relations,
+                "rfidKeys": select(self.rfid_keys),
+                "rfidConnections": rfid_connections,
+                "ids": ids,
+            }
+            return 200, payload, etag
+
+    def update_booking(self, booking_id, body):
+        with self.lock:
+            if self.fail_updates:
+                return 503, {"message": "Service unavailable"}
+            booking = self.bookings.get(booking_id)
+            if not booking:
+                return 404, {"message": "Booking not found"}
+            self.updates.append((booking_id, body))
+            for field in ("checkInstatus", "checkInTime", "status", "checkOutTime"):
+                if field in body:
+                    booking[field] = body[field]
+            if body.get("checkInstatus") == "checkedOut":
+                booking["status"] = "finished"
+            booking["updatedAt"] = self._now()
+            return 200, {"message": "Booking updated successfully", "booking": booking}
+
+    def receive_audit(self, events):
+        with self.lock:
+            if self.fail_audit:
+                return 503, {"message": "Service unavailable"}
+            self.audit_events.extend(events)
+            return 200, {"message": "Audit events stored", "count": len(events)}
+
+    # -------- HTTP --------
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _authorized(self):
+                if stub.token is None:
+                    return True
+                return self.headers.get("Authorization") == f"Bearer {stub.token}"
+
+            def _send(self, status, body=None, etag=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(status)
+                if etag:
+                    self.send_header("ETag", etag)
+                if body is not None:
+                    self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                stub.requests.append(("GET", self.path, dict(self.headers)))
+                path, _, query = self.path.partition("?")
+                match = re.fullmatch(r"/api/devices/bookings/(\d+)", path)
+                if not match:
+                    return self._send(404, {"message": "Not found"})
+                if not self._authorized() or int(match.group(1)) != stub.hotel_id:
+                    return self._send(401, {"message": "Invalid device token"})
+                since = parse_qs(query).get("since", [None])[0]
+                status, body, etag = stub.bookings_payload(since, self.headers.get("If-None-Match"))
+                self._send(status, body, etag)
+
+            def do_PUT(self):
+                stub.requests.append(("PUT", self.path, dict(self.headers)))
+                match = re.fullmatch(r"/api/devices/update-booking/(\d+)", self.path)
+                if not match:
+                    return self._send(404, {"message": "Not found"})
+                if not self._authorized():
+                    return self._send(401, {"message": "Invalid device token"})
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, response = stub.update_booking(int(match.group(1)), body)
+                self._send(status, response)
+
+            def do_POST(self):
+                stub.requests.append(("POST", self.path, dict(self.headers)))
+                match = re.fullmatch(r"/api/devices/audit/(\d+)", self.path)
+                if not match:
+                    return self._send(404, {"message": "Not found"})
+                if not self._authorized() or int(match.group(1)) != stub.hotel_id:
+                    return self._send(401, {"message": "Invalid device token"})
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                status, response = stub.receive_audit(body.get("events", []))
+                self._send(status, response)
+
+        return Handler
+
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+if __name__ == "__main__":
+    stub = BackendStub()
+    stub.put_room(1, "101")
+    stub.put_rfid_key(1, "B7E5C37A")
+    stub.link_key("B7E5C37A", 1)
+    stub.put_booking({"id": 1, "checkInToken": "Rz9cFA8Yamk9vvRp",
+                      "startDate": "2026-01-01", "endDate": "2026-01-05"})
+    stub.connect(1, 1)
+    base = stub.start(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8081)
+    print(f"Backend stub fut: {base}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
@@ -0,0 +1,458 @@
+"""
+Végponttól végpontig mért késleltetések a valódi modulokkal, lokális
+helyettesítőkkel: fakeArduino (pty), szkriptelt kamera a qrReader-nek,
+backendStub (/api/devices/*) és fakeBroker (MQTT).
+
+Mért értékek (p50/p95/p99/max), foglalásszámonként:
+  - sync_full / sync_delta / sync_noop: DbFetcher.sync időtartama
+  - sync_unchanged: teljes válasz változatlan adattal (törölt cursor), az
+    ujjlenyomatok miatt írás nélkül
+  - door_auth: hotel/<ajtó>/auth publikálás -> hotel/<ajtó>/result megérkezése
+  - scan_to_open: a QR-t tartalmazó első képkocka -> OPENED;n a szekrénytől
+
+    python benchmark.py --bookings 100,1000 --auth 500 --scans 20
+    python benchmark.py --only sync --bookings 100,1000,10000
+
+Alapból egy ideiglenes SQLite adatbázison fut. MySQL-lel csak külön
+(nem hotelflowLocal) adatbázison: --backend mysql --database hotelflowBench.
+Kell hozzá: paho-mqtt, pyserial, pyzbar, numpy és a QR képekhez qrcode[pil].
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import logs
+import storage
+from latency import summarize
+
+DEFAULT_BOOKINGS = "100,1000"
+DEFAULT_SYNCS = 5
+DEFAULT_AUTH = 300
+DEFAULT_SCANS = 20
+LOCKERS = 8
+CAMERA_FPS = 15
+DELTA_FRACTION = 0.01      # sync_delta: ennyi foglalás változik két szinkron között
+RESULT_TIMEOUT = 5
+
+DATA_TABLES = ("bookings", "rooms", "relations", "rfidKeys", "rfidConnections",
+               "checkin_plan", "locker_layout", "pending_requests", "failed_requests", "sync_state", "sync_digests")
+
+
+# -------- ADATOK --------
+def room_name(i):
+    return f"R{i}"
+
+
+def rfid_key(i):
+    return f"K{i:07X}"
+
+
+def token(i):
+    return f"bench-{i:06d}"
+
+
+def seed_stub(stub, count):
+    # Páros foglalás bejelentkezett (ajtó OK), páratlan még nem (check-in)
+    for i in range(1, count + 1):
+        stub.put_room(i, room_name(i))
+        stub.put_rfid_key(i, rfid_key(i))
+        stub.link_key(rfid_key(i), i)
+        stub.put_booking({
+            "id": i, "checkInToken": token(i),
+            "checkInstatus": "checkedIn" if i % 2 == 0 else None,
+            "startDate": "2026-01-01", "endDate": "2026-01-05",
+        })
+        stub.connect(i, i)
+
+
+def reset_database():
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        for table in DATA_TABLES:
+            cur.execute(f"DELETE FROM {table}")
+        conn.commit()
+        cur.close()
+
+
+def assign_lockers(count, lockers):
+    import checkinPlan
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        for i in range(1, count + 1):
+            checkinPlan.set_locker(cur, rfid_key(i), i % lockers, 0, 1)
+        checkinPlan.rebuild(cur)
+        conn.commit()
+        cur.close()
+
+
+# -------- SZINKRON --------
+def bench_sync(stub, count, runs, results):
+    import DbFetcher
+
+    for _ in range(runs):
+        reset_database()
+        start = time.perf_counter()
+        DbFetcher.sync(force=True)
+        results["sync_full"].append(time.perf_counter() - start)
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        DbFetcher.sync()
+        results["sync_noop"].append(time.perf_counter() - start)
+
+    for _ in range(runs):
+        with storage.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM sync_state")
+            conn.commit()
+            cur.close()
+        start = time.perf_counter()
+        DbFetcher.sync()
+        results["sync_unchanged"].append(time.perf_counter() - start)
+
+    changed = max(1, int(count * DELTA_FRACTION))
+    for run in range(runs):
+        for i in random.sample(range(1, count + 1), changed):
+            # Csak "confirmed" foglalás jön le: a státusz helyett a dátum változik
+            booking = dict(stub.bookings[i], endDate=f"2026-02-{run % 28 + 1:02d}")
+            stub.put_booking(booking)
+        start = time.perf_counter()
+        DbFetcher.sync()
+        results["sync_delta"].append(time.perf_counter() - start)
+
+
+# -------- AJTÓ AUTH --------
+class AuthClient:
+    """Az ajtó terminált utánzó MQTT kliens; kérésenként méri a választ."""
+
+    def __init__(self, host, port):
+        import paho.mqtt.client as mqtt
+
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_ts = {}
+        self._t0 = time.monotonic()
+        self.results = {"OK": 0, "DENY": 0, "timeout": 0}
+
+        self.client = mqtt.Client(client_id="hotelflow-benchmark")
+        self.client.on_message = self._on_message
+        self.client.connect(host, port, keepalive=60)
+        self.client.subscribe("hotel/+/result", qos=1)
+        self.client.loop_start()
+
+    def _next_ts(self, door):
+        # Ajtónként szigorúan növő "millis()", hogy a replay szűrő ne dobja el
+        with self._lock:
+            ts = int((time.monotonic() - self._t0) * 1000)
+            ts = max(ts, self._last_ts.get(door, -1) + 1)
+            self._last_ts[door] = ts
+            return ts
+
+    def _on_message(self, client, userdata, msg):
+        received = time.perf_counter()
+        door = msg.topic.split("/")[1]
+        payload = json.loads(msg.payload)
+        with self._lock:
+            waiter = self._pending.pop((door, payload.get("ts")), None)
+        if waiter is not None:
+            waiter.append((received, payload.get("accessResult")))
+            waiter[0].set()
+
+    def request(self, card_id, door):
+        from authSig import simple_sig
+
+        ts = self._next_ts(door)
+        waiter = [threading.Event()]
+        with self._lock:
+            self._pending[(door, ts)] = waiter
+        body = json.dumps({"cardID": card_id, "doorID": door, "token": "BENCH",
+                           "ts": ts, "sig": simple_sig(card_id, door, ts)})
+        start = time.perf_counter()
+        self.client.publish(f"hotel/{door}/auth", body, qos=1)
+        if not waiter[0].wait(RESULT_TIMEOUT):
+            with self._lock:
+                self._pending.pop((door, ts), None)
+            self.results["timeout"] += 1
+            return None
+        received, result = waiter[1]
+        self.results[result] = self.results.get(result, 0) + 1
+        return received - start
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def start_validator(broker):
+    import validator
+
+    threading.Thread(target=validator.main, args=(broker.host, broker.port),
+                     name="bench-validator", daemon=True).start()
+    deadline = time.monotonic() + 10
+    while broker.subscribers("hotel/bench/auth") == 0:
+        if time.monotonic() > deadline:
+            raise RuntimeError("A validator nem iratkozott fel")
+        time.sleep(0.05)
+
+
+def bench_auth(broker, count, requests, concurrency, results):
+    client = AuthClient(broker.host, broker.port)
+    per_worker = requests // concurrency
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        for _ in range(per_worker):
+            i = rnd.randint(1, count)
+            elapsed = client.request(rfid_key(i), room_name(i))
+            if elapsed is not None:
+                results["door_auth"].append(elapsed)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+    return client.results
+
+
+# -------- QR -> SZEKRÉNY --------
+class ScriptedCamera:
+    """Kamera helyett: a benchmark által beállított képkockát adja, FPS ütemben."""
+
+    def __init__(self, blank, fps=CAMERA_FPS):
+        self.interval = 1.0 / fps
+        self._frame = blank
+        self._lock = threading.Lock()
+        self.first_capture = None
+
+    def show(self, frame):
+        with self._lock:
+            self._frame = frame
+            self.first_capture = None
+
+    def capture(self):
+        time.sleep(self.interval)
+        with self._lock:
+            if self.first_capture is None:
+                self.first_capture = time.perf_counter()
+            return self._frame
+
+    def close(self):
+        pass
+
+
+def qr_frame(text, size=(480, 640)):
+    import numpy as np
+    import qrcode
+
+    image = qrcode.make(text, box_size=6, border=4).convert("RGB")
+    qr = np.asarray(image)
+    frame = np.full((size[0], size[1], 3), 255, dtype=np.uint8)
+    top, left = (size[0] - qr.shape[0]) // 2, (size[1] - qr.shape[1]) // 2
+    frame[top:top + qr.shape[0], left:left + qr.shape[1]] = qr
+    return frame
+
+
+class KioskRig:
+    def __init__(self, lockers=LOCKERS, close_delay=0.05):
+        import numpy as np
+        import serial
+
+        import checkInOut
+        import qrReader
+        from fakeArduino import FakeArduino
+        from kiosk import Kiosk
+        from serialLink import SerialLink
+
+        self.arduino = FakeArduino(lockers=lockers, close_delay=close_delay)
+        self.events = queue.Queue()
+        self.arduino.on_emit = lambda t, line: self.events.put((t, line))
+        self.link = SerialLink(serial.Serial(self.arduino.port, checkInOut.BAUDRATE, timeout=0.5))
+
+        self.kiosk = Kiosk(
+            handler=lambda t, k: checkInOut.check_in_out(t, self.link, k),
+            display=lambda msg: checkInOut.display_lcd(self.link, msg, wait=False),
+        )
+        self.blank = np.full((480, 640, 3), 255, dtype=np.uint8)
+        self.camera = ScriptedCamera(self.blank)
+        self.pipeline = qrReader.ScanPipeline(self.camera).start()
+        self._running = True
+        threading.Thread(target=self._feed, name="bench-scanner", daemon=True).start()
+
+    def _feed(self):
+        while self._running:
+            scanned = self.pipeline.get(timeout=0.2)
+            if scanned:
+                self.kiosk.submit(scanned)
+
+    def scan(self, text, locker_id, timeout=RESULT_TIMEOUT):
+        """Egy vendég: QR a kamera elé, várunk az OPENED-re, majd a folyamat végére."""
+        done_before = self.kiosk.completed
+        while not self.events.empty():
+            self.events.get_nowait()
+
+        self.camera.show(qr_frame(text))
+        deadline = time.monotonic() + timeout
+        elapsed = None
+        while time.monotonic() < deadline:
+            try:
+                at, line = self.events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            reply = line.split(";", 1)[1] if line.startswith("#") else line   # sorszám előtag nélkül
+            if reply == f"OPENED;{locker_id}" and self.camera.first_capture is not None:
+                elapsed = at - self.camera.first_capture
+                break
+        self.camera.show(self.blank)
+
+        while self.kiosk.completed == done_before and time.monotonic() < deadline + timeout:
+            time.sleep(0.01)
+        return elapsed
+
+    def close(self):
+        self._running = False
+        self.pipeline.stop()
+        self.kiosk.stop()
+        self.link.close()
+        self.arduino.close()
+
+
+def bench_scan(rig, count, scans, lockers, results):
+    # Páratlan foglalások: még nincsenek bejelentkezve -> check-in
+    candidates = list(range(1, count + 1, 2))
+    for i in random.sample(candidates, min(scans, len(candidates))):
+        elapsed = rig.scan(token(i), i % lockers)
+        if elapsed is None:
+            results["scan_timeouts"] = results.get("scan_timeouts", 0) + 1
+        else:
+            results["scan_to_open"].append(elapsed)
+
+
+# -------- FUTTATÁS --------
+def configure_backend(args, workdir):
+    if args.backend == "sqlite":
+        storage.set_backend("sqlite", path=os.path.join(workdir, "bench.db"))
+        return
+    import dbPool
+
+    if not args.database or args.database == dbPool.DB_CONFIG["database"]:
+        sys.exit("MySQL-hez külön benchmark adatbázis kell (--database), a hotelflowLocal-t nem írjuk felül")
+    dbPool.DB_CONFIG["database"] = args.database
+    storage.set_backend("mysql")
+
+
+def run(args):
+    import DbFetcher
+    import hotels
+    import outbox
+    import post
+    import schema
+    from backendStub import BackendStub
+    from fakeBroker import FakeBroker
+
+    workdir = tempfile.mkdtemp(prefix="hotelflow-bench-")
+    configure_backend(args, workdir)
+    schema.ensure()
+
+    parts = set(args.only.split(",")) if args.only else {"sync", "auth", "scan"}
+    quiet = open(os.devnull, "w") if not args.verbose else None
+    if quiet is not None:
+        logs.setup(stream=quiet)   # a háttérszálak naplója se keveredjen a riportba
+    broker = rig = None
+    report = {}
+
+    try:
+        for count in [int(n) for n in args.bookings.split(",")]:
+            results = {"sync_full": [], "sync_noop": [], "sync_unchanged": [], "sync_delta": [],
+                       "door_auth": [], "scan_to_open": []}
+            stub = BackendStub()
+            seed_stub(stub, count)
+            base = stub.start()
+            DbFetcher.API_URL_TEMPLATE = f"{base}/api/devices/bookings/{{hotel_id}}"
+            hotels.HOTELS = {stub.hotel_id: {}}
+            post.API_URL_TEMPLATE = f"{base}/api/devices/update-booking/"
+            print(f"⏱️ {count} foglalás...", file=sys.stderr)
+
+            with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+                if "sync" in parts:
+                    bench_sync(stub, count, args.syncs, results)
+                else:
+                    reset_database()
+                    DbFetcher.sync(force=True)
+                assign_lockers(count, args.lockers)
+
+                if "auth" in parts and args.auth:
+                    if broker is None:
+                        broker = FakeBroker().start()
+                        start_validator(broker)
+                    results["door_auth_results"] = bench_auth(
+                        broker, count, args.auth, args.concurrency, results)
+
+                if "scan" in parts and args.scans:
+                    if rig is None:
+                        outbox.start_worker()
+                        rig = KioskRig(lockers=args.lockers)
+                    bench_scan(rig, count, args.scans, args.lockers, results)
+
+            stub.stop()
+            report[count] = {
+                name: summarize(values) if isinstance(values, list) else values
+                for name, values in results.items()
+                if not isinstance(values, list) or values
+            }
+    finally:
+        if rig is not None:
+            rig.close()
+        if broker is not None:
+            broker.stop()
+        if quiet is not None:
+            logs.flush()
+            logs.setup()
+            quiet.close()
+    return report
+
+
+def print_report(report):
+    print(f"{'foglalás':>9} {'mérés':<13} {'db':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for count, metrics in report.items():
+        for name, s in metrics.items():
+            if isinstance(s, dict) and "p50_ms" in s:
+                print(f"{count:>9} {name:<13} {s['count']:>5} {s['p50_ms']:>9} {s['p95_ms']:>9} "
+                      f"{s['p99_ms']:>9} {s['max_ms']:>9}")
+            else:
+                print(f"{count:>9} {name:<13} {s}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HotelFlow központi egység benchmark")
+    parser.add_argument("--bookings", default=DEFAULT_BOOKINGS, help="foglalásszámok vesszővel")
+    parser.add_argument("--syncs", type=int, default=DEFAULT_SYNCS, help="szinkron ismétlések")
+    parser.add_argument("--auth", type=int, default=DEFAULT_AUTH, help="ajtó auth kérések száma")
+    parser.add_argument("--concurrency", type=int, default=1, help="párhuzamos ajtó kliensek")
+    parser.add_argument("--scans", type=int, default=DEFAULT_SCANS, help="QR beolvasások száma")
+    parser.add_argument("--lockers", type=int, default=LOCKERS)
+    parser.add_argument("--only", help="sync,auth,scan közül")
+    parser.add_argument("--backend", choices=sorted(storage.BACKENDS), default="sqlite")
+    parser.add_argument("--database", help="MySQL benchmark adatbázis neve")
+    parser.add_argument("--json", help="eredmény mentése JSON fájlba")
+    parser.add_argument("--verbose", action="store_true", help="a modulok kimenete is látszik")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
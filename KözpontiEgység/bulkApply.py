@@ -0,0 +1,392 @@
+import hashlib
+import time
+from array import array
+from bisect import bisect_left
+
+import storage
+
+CHUNK_SIZE = 500
+HASH_COLUMN = "rowHash"     # a szinkronizált táblák sor ujjlenyomata (schema.py 4. migráció)
+
+
+class TableStats:
+    def __init__(self, table):
+        self.table = table
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0       # egyező ujjlenyomat miatt ki sem írt sorok
+        self.skipped = False     # a szekció lenyomata egyezett: nem volt törlési egyeztetés
+        self.seconds = 0.0
+
+    @property
+    def changed(self):
+        return self.inserted + self.updated + self.deleted
+
+    def as_dict(self):
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "seconds": round(self.seconds, 4),
+        }
+
+
+class SyncReport:
+    def __init__(self):
+        self.tables = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def table(self, name):
+        if name not in self.tables:
+            self.tables[name] = TableStats(name)
+        return self.tables[name]
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    @property
+    def changed(self):
+        return any(t.changed for t in self.tables.values())
+
+    @property
+    def rows_changed(self):
+        return sum(t.changed for t in self.tables.values())
+
+    def as_dict(self):
+        return {
+            "seconds": round(self.seconds, 4),
+            "rows_changed": self.rows_changed,
+            "tables": {name: t.as_dict() for name, t in self.tables.items()},
+        }
+
+    def __str__(self):
+        parts = [f"{t.table}: +{t.inserted} ~{t.updated} -{t.deleted} ={t.unchanged}"
+                 + (" (szekció változatlan)" if t.skipped else "") + f" ({t.seconds * 1000:.1f} ms)"
+                 for t in self.tables.values()]
+        return (f"Szinkron {self.seconds * 1000:.1f} ms, {self.rows_changed} sor változott | "
+                + ", ".join(parts))
+
+
+class HotelsReport:
+    """Több hotel szinkronja: hotelenként SyncReport (None: 304) vagy hiba."""
+
+    def __init__(self):
+        self.hotels = {}
+        self.errors = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.started
+        return self
+
+    @property
+    def changed(self):
+        return any(r is not None and r.changed for r in self.hotels.values())
+
+    def as_dict(self):
+        return {
+            "seconds": round(self.seconds, 4),
+            "hotels": {hotel_id: r.as_dict() if r is not None else None for hotel_id, r in self.hotels.items()},
+            "errors": {hotel_id: str(e) for hotel_id, e in self.errors.items()},
+        }
+
+    def __str__(self):
+        parts = [f"hotel {hotel_id}: {r if r is not None else 'változatlan'}" for hotel_id, r in self.hotels.items()]
+        parts += [f"hotel {hotel_id}: hiba ({e})" for hotel_id, e in self.errors.items()]
+        return "\n".join(parts)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _key_of(row, key_columns):
+    if len(key_columns) == 1:
+        return row[key_columns[0]]
+    return tuple(row[c] for c in key_columns)
+
+
+def row_hash(row):
+    """
+    A sor tartalmának 64 bites ujjlenyomata (előjeles, BIGINT oszlopba fér).
+    A repr a JSON típusokra determinisztikus és jóval gyorsabb a json.dumps-nál;
+    ha a backend egyszer más oszlopsorrendet küld, az csak egy felesleges
+    újraírás, nem hiba.
+    """
+    return int.from_bytes(hashlib.blake2b(repr(row).encode(), digest_size=8).digest(), "big", signed=True)
+
+
+def _partition_sql(partition, args):
+    # partition: (oszlop, érték) vagy None; a feltétel a WHERE/AND után jön
+    if partition is None:
+        return ""
+    column, value = partition
+    args.append(value)
+    return f"`{column}` = %s"
+
+
+def _select_keys(cursor, table, key_columns, partition=None, extra=()):
+    columns = ", ".join(f"`{c}`" for c in tuple(key_columns) + tuple(extra))
+    args = []
+    where = _partition_sql(partition, args)
+    cursor.execute(f"SELECT {columns} FROM {table}" + (f" WHERE {where}" if where else ""), args)
+
+
+def load_keys(cursor, table, key_columns, partition=None):
+    _select_keys(cursor, table, key_columns, partition)
+    return {_key_of(row, key_columns) for row in cursor.fetchall()}
+
+
+def _write_rows(cursor, table, rows, key_columns, chunk_size):
+    # Azonos oszlopkészletű sorok kerülhetnek egy utasításba; [(darab, érintett sorok), ...]
+    backend = storage.get_backend()
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row.keys()), []).append(row)
+
+    written = []
+    for columns, group in groups.items():
+        for chunk in _chunks(group, chunk_size):
+            sql = backend.upsert_sql(table, columns, key_columns, len(chunk))
+            params = [row[c] for row in chunk for c in columns]
+            written.append((chunk, cursor.execute(sql, params)))
+    return written
+
+
+def upsert_rows(cursor, table, rows, key_columns, existing, stats, chunk_size=CHUNK_SIZE, track=True):
+    """
+    Többsoros upsert darabokban (MySQL: ON DUPLICATE KEY UPDATE, SQLite:
+    ON CONFLICT DO UPDATE, lásd storage.py).
+
+    A már meglévő kulcsok halmazából tudjuk a beszúrások számát, az érintett
+    sorok számából a backend adja meg a tényleges módosításokat. track=False
+    esetén a beszúrt kulcsok nem kerülnek az `existing`-be (a hívó tartja számon).
+    """
+    backend = storage.get_backend()
+    if not rows:
+        return
+
+    for chunk, affected in _write_rows(cursor, table, rows, key_columns, chunk_size):
+        inserted = sum(1 for row in chunk if _key_of(row, key_columns) not in existing)
+        stats.inserted += inserted
+        stats.updated += backend.updated_rows(affected, inserted)
+        if track:
+            for row in chunk:
+                existing.add(_key_of(row, key_columns))
+
+
+def delete_missing(cursor, table, key_columns, existing, keep, stats, chunk_size=CHUNK_SIZE, partition=None):
+    # Ami lokálisan megvan, de az API-ban nincs (keep: set vagy KeySet)
+    stale = [key for key in existing if key not in keep]
+    if not stale:
+        return
+
+    if len(key_columns) == 1:
+        condition = f"`{key_columns[0]}` IN "
+        row_sql = "%s"
+    else:
+        condition = "(" + ", ".join(f"`{c}`" for c in key_columns) + ") IN "
+        row_sql = "(" + ", ".join("%s" for _ in key_columns) + ")"
+
+    for chunk in _chunks(stale, chunk_size):
+        params = list(chunk) if len(key_columns) == 1 else [v for key in chunk for v in key]
+        sql = f"DELETE FROM {table} WHERE {condition}(" + ", ".join([row_sql] * len(chunk)) + ")"
+        scope = _partition_sql(partition, params)
+        if scope:
+            # Egy másik hotel sorához sosem nyúlunk, akkor sem, ha a kulcs egyezne
+            sql += f" AND {scope}"
+        stats.deleted += cursor.execute(sql, params)
+        existing.difference_update(chunk)
+
+
+def apply_table(cursor, report, table, rows, key_columns, keep=None, chunk_size=CHUNK_SIZE, partition=None):
+    """
+    Egy tábla szinkronizálása: upsert + a `keep`-ben nem szereplő kulcsok törlése.
+    `keep` alapból a beérkezett sorok kulcsai; üres halmaz esetén nem törlünk
+    (hibás/üres API válasz ne ürítse ki a lokális táblát). `partition`
+    (oszlop, érték) megadásakor az egyeztetés csak azon a partíción belül fut.
+    """
+    stats = report.table(table)
+    start = time.perf_counter()
+
+    existing = load_keys(cursor, table, key_columns, partition)
+    upsert_rows(cursor, table, rows, key_columns, existing, stats, chunk_size)
+
+    if keep is None:
+        keep = {_key_of(row, key_columns) for row in rows}
+    if keep:
+        delete_missing(cursor, table, key_columns, existing, keep, stats, chunk_size, partition)
+
+    stats.seconds += time.perf_counter() - start
+    return stats
+
+
+# -------- STREAMING ALKALMAZÁS --------
+class KeySet:
+    """
+    Tömör kulcshalmaz az egyeztetéshez: egész kulcsok 8 bájtos tömbben
+    (rendezve, bisect kereséssel), minden más egy sima set-ben; nagy
+    id listáknál a set memóriájának töredéke.
+    """
+
+    def __init__(self):
+        self._ints = array("q")
+        self._other = set()
+        self._sorted = True
+
+    def add(self, key):
+        if type(key) is int and -2 ** 63 <= key < 2 ** 63:
+            if self._sorted and self._ints and key < self._ints[-1]:
+                self._sorted = False
+            self._ints.append(key)
+        else:
+            self._other.add(key)
+
+    def update(self, keys):
+        # A tartományt előre nézzük: a tömb extend() hibánál az elejét már hozzáfűzte
+        if keys and all(type(k) is int for k in keys) and -2 ** 63 <= min(keys) and max(keys) < 2 ** 63:
+            self._ints.extend(keys)
+            self._sorted = False
+            return
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        if type(key) is not int or not -2 ** 63 <= key < 2 ** 63:
+            return key in self._other
+        if not self._sorted:
+            self._ints = array("q", sorted(set(self._ints)))
+            self._sorted = True
+        i = bisect_left(self._ints, key)
+        return i < len(self._ints) and self._ints[i] == key
+
+    def __len__(self):
+        return len(self._ints) + len(self._other)
+
+    def __iter__(self):
+        yield from self._ints
+        yield from self._other
+
+    def difference_update(self, keys):
+        drop = set(keys)
+        self._ints = array("q", (k for k in self._ints if k not in drop))
+        self._other -= drop
+
+
+class TableStream:
+    """
+    Egy tábla alkalmazása a rekordok érkezése közben, CHUNK_SIZE soros
+    darabokban. Minden sornak ujjlenyomata van (HASH_COLUMN, a kulcsot is
+    tartalmazza): az első darab előtt egyetlen olvasás hozza a partíció
+    kulcsait és ujjlenyomatait (két KeySet), és csak az új vagy eltérő sorok
+    íródnak ki, így a számlálók a ténylegesen változott sorokat mutatják.
+    A beérkezett sorok és id listák lenyomatából szekció lenyomat készül
+    (digest()); ha megegyezik az előző alkalmazott szinkronéval, a finish()
+    kihagyja a törlési egyeztetést. A törlés szabálya ugyanaz, mint az apply_table-nél.
+    """
+
+    def __init__(self, cursor, report, table, key_columns, chunk_size=CHUNK_SIZE, partition=None):
+        self.cursor = cursor
+        self.table = table
+        self.key_columns = key_columns
+        self.chunk_size = chunk_size
+        self.partition = partition
+        self.stats = report.table(table)
+        self.seen = KeySet()
+        self._rows = []
+        self._existing = None
+        self._hashes = None
+        self._rows_digest = hashlib.blake2b(digest_size=16)
+        self._keep = None
+        self._keep_digest = None
+
+    def add(self, rows):
+        self._rows.extend(rows)
+        self.seen.update([_key_of(row, self.key_columns) for row in rows])
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def add_ids(self, keys):
+        """A backend teljes id listája (delta módban ez dönt a törlésről, nem a kapott sorok)."""
+        if self._keep is None:
+            self._keep = KeySet()
+            self._keep_digest = hashlib.blake2b(digest_size=16)
+        self._keep.update(keys)
+        self._keep_digest.update("".join(f"{key}," for key in keys).encode())
+
+    def digest(self):
+        """A szekció lenyomata: a sorok ujjlenyomatai érkezési sorrendben + az id lista."""
+        digest = self._rows_digest.hexdigest()
+        if self._keep_digest is not None:
+            digest += "/" + self._keep_digest.hexdigest()
+        return digest
+
+    def _load_existing(self):
+        if self._existing is None:
+            self._existing = KeySet()
+            self._hashes = KeySet()
+            _select_keys(self.cursor, self.table, self.key_columns, self.partition, (HASH_COLUMN,))
+            while True:
+                rows = self.cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                self._existing.update([_key_of(row, self.key_columns) for row in rows])
+                # NULL: régi vagy helyben módosított sor, a következő szinkron újraírja
+                self._hashes.update([row[HASH_COLUMN] for row in rows if row[HASH_COLUMN] is not None])
+        return self._existing
+
+    def flush(self):
+        if not self._rows:
+            return
+        start = time.perf_counter()
+        existing = self._load_existing()
+        hashes = array("q", [row_hash(row) for row in self._rows])
+        self._rows_digest.update(hashes.tobytes())
+        if not len(existing):
+            # Üres partíció (első szinkron): minden sor új, nincs mit összevetni
+            for row, value in zip(self._rows, hashes):
+                row[HASH_COLUMN] = value
+            self.stats.inserted += len(self._rows)
+            changed = self._rows
+        else:
+            changed = []
+            for row, value in zip(self._rows, hashes):
+                if value in self._hashes:
+                    self.stats.unchanged += 1
+                    continue
+                if _key_of(row, self.key_columns) in existing:
+                    self.stats.updated += 1
+                else:
+                    self.stats.inserted += 1
+                row[HASH_COLUMN] = value
+                changed.append(row)
+        if changed:
+            _write_rows(self.cursor, self.table, changed, self.key_columns, self.chunk_size)
+        self._rows = []
+        self.stats.seconds += time.perf_counter() - start
+
+    def finish(self, stored_digest=None):
+        """
+        A maradék kiírása és a törlési egyeztetés. `stored_digest`: a tábla
+        legutóbb alkalmazott szekció lenyomata; egyezéskor a lokális kulcsok
+        már a backend szerintiek, nincs mit törölni.
+        """
+        self.flush()
+        keep = self._keep if self._keep is not None else self.seen
+        if stored_digest is not None and stored_digest == self.digest():
+            self.stats.skipped = True
+        elif self._keep is not None or len(keep):
+            # A backend id listája üresen is érvényes (pl. elfogyott minden foglalás):
+            # ilyenkor minden sor megy; üres beérkezett sorokból viszont nem törlünk
+            start = time.perf_counter()
+            delete_missing(self.cursor, self.table, self.key_columns,
+                           self._load_existing(), keep, self.stats, self.chunk_size, self.partition)
+            self.stats.seconds += time.perf_counter() - start
+        return self.stats
@@ -1,208 +1,292 @@
-import pymysql
-import json
-from post import put_request_example
+import glob
+import outbox
 import serial
 import time
 import qrReader
-import threading
-import queue
-
-# MySQL KONFIGURÁCIÓ
-db_config = {
-    'user': 'appuser',
-    'password': '123',
-    'host': '127.0.0.1',
-    'database': 'hotelflowLocal',
-    'cursorclass': pymysql.cursors.DictCursor
-}
-
-RFID_LOCKER_MAP = {
-    "B7E5C37A": (0, 0),
-    "59EDC9B0s": (0, 1)
-}
+import accessCache
+import audit
+import storage
+import checkinPlan
+import devices
+import hotels
+import logs
+import metrics
+import tracing
+from serialLink import SerialLink
+from kiosk import Kiosk, IDLE_PROMPT
+from contextlib import nullcontext
+from datetime import datetime
 
 SERIAL_PORT = "/dev/ttyACM0"  # Linux
+SERIAL_PORT_GLOB = "/dev/ttyACM*"  # újracsatlakozáskor a kernel más számot is adhat
 BAUDRATE = 9600
+ARDUINO_READY_TIMEOUT = 5          # megnyitás után ennyi ideig várunk az első válaszra
+DEVICE_WAIT = 2                    # egy vendég ennyit vár az éppen újracsatlakozó Arduinóra
+
+OPEN_TIMEOUT = 30
+CLOSE_TIMEOUT = 60
+HOTEL_ID = None   # a kioszk hotelje; None: az egyetlen beállított hotel, több hotelnél kötelező (hotels.scope)
+
+logger = logs.get("checkInOut")
 
 # --- Arduino kapcsolat ---
+def serial_ports():
+    return list(dict.fromkeys([SERIAL_PORT] + sorted(glob.glob(SERIAL_PORT_GLOB))))
+
+def open_arduino(on_error=None):
+    # Egyetlen olvasó szál kezeli a teljes soros forgalmat (serialLink.py).
+    # Az első port, amelyen az Arduino válaszol; különben kivétel (a devices.Device újrapróbálja)
+    errors = []
+    for port in serial_ports():
+        try:
+            ser = serial.Serial(port, BAUDRATE, timeout=0.5)
+        except serial.SerialException as e:
+            errors.append(str(e))
+            continue
+        link = SerialLink(ser, on_error=on_error)
+        if link.wait_ready(ARDUINO_READY_TIMEOUT):
+            return link
+        link.close()
+        errors.append(f"{port}: nem válaszol")
+    raise ConnectionError("; ".join(errors) or "nincs soros port")
+
 def get_arduino():
+    # Egyszeri megnyitás, felügyelet nélkül
     try:
-        ser = serial.Serial(SERIAL_PORT, BAUDRATE, timeout=2)
-        time.sleep(2)
-        return ser
-    except serial.SerialException as e:
-        print("⚠️ Arduino nem elérhető:", e)
+        return open_arduino()
+    except ConnectionError as e:
+        logger.warning("⚠️ Arduino nem elérhető", error=e)
         return None
 
-# --- Szekrény nyitás ---
-def open_locker(ser, locker_id: int, timeout=30):
-    if not ser:
-        print("⚠️ Nincs soros kapcsolat")
-        return False
+def arduino_device(**kwargs):
+    # Felügyelt Arduino: leszakadáskor (USB újraszámozás) magától újranyílik
+    device = devices.Device(
+        "arduino",
+        open=lambda: open_arduino(on_error=device.failed),
+        close=lambda link: link.close(),
+        alive=lambda link: link.alive,
+        on_ready=lambda link: display_lcd(link, IDLE_PROMPT, wait=False),
+        **kwargs,
+    )
+    return device
 
-    ser.write(f"OPEN;{locker_id}\n".encode())
-    start_time = time.time()
+def camera_device(**kwargs):
+    return devices.Device("camera", open=qrReader.Picamera2Source, close=lambda source: source.close(), **kwargs)
 
-    while True:
-        while ser.in_waiting:
-            line = ser.readline().decode().strip()
-            if line == f"OPENED;{locker_id}":
-                print(f"✅ Szekrény {locker_id} nyitva")
-                return True
-        if time.time() - start_time > timeout:
-            print(f"⏰ Időtúllépés – szekrény {locker_id} nem nyílt")
-            return False
-        time.sleep(0.05)
+# --- Szekrény nyitás ---
+def open_locker(link, locker_id: int, timeout=30):
+    if not link:
+        logger.warning("⚠️ Nincs soros kapcsolat")
+        return False
+    try:
+        opened = link.open_locker(locker_id, timeout)
+    except ConnectionError as e:
+        logger.warning("⚠️ Soros hiba", locker=locker_id, error=e)
+        return False
+    if opened:
+        logger.info("✅ Szekrény nyitva", locker=locker_id)
+    else:
+        logger.warning("⏰ Időtúllépés – szekrény nem nyílt", locker=locker_id)
+    return opened
 
 # --- Szekrény lezárására várás ---
-def wait_for_locker_closed(ser, locker_id: int, timeout=60):
-    start_time = time.time()
-    while True:
-        while ser.in_waiting:
-            line = ser.readline().decode().strip()
-            if line == f"STATE;CLOSED;{locker_id}":
-                print(f"🔒 Szekrény {locker_id} visszazárva")
-                return True
-        if time.time() - start_time > timeout:
-            print(f"⏰ Időtúllépés – szekrény {locker_id} nem záródott vissza")
-            return False
-        time.sleep(0.05)
-
-def locker_id_from_matrix(row, col, cols=1):
-    return row * cols + col
-
-def display_lcd(ser, msg):
-    if not ser:
-        return
-    ser.write(f"DISPLAY;{msg}\n".encode())
-    start_time = time.time()
-    while True:
-        if time.time() - start_time > 5:
-            return False
-        while ser.in_waiting:
-            response = ser.readline().decode().strip()
-            if response == "DISPLAY_OK":
-                return True
-
-def process_serial(ser):
-    while ser.in_waiting:
-        line = ser.readline().decode().strip()
-        if line.startswith("STATE;CLOSED;"):
-            locker_id = int(line.split(";")[2])
-            print(f"🔒 Szekrény {locker_id} visszazárva.")
-        elif line == "DISPLAY_OK":
-            pass
-        else:
-            print("Arduino üzenet:", line)
+def wait_for_locker_closed(link, locker_id: int, timeout=60):
+    if not link:
+        return False
+    if link.wait_for_locker_closed(locker_id, timeout):
+        logger.info("🔒 Szekrény visszazárva", locker=locker_id)
+        return True
+    logger.warning("⏰ Időtúllépés – szekrény nem záródott vissza", locker=locker_id)
+    return False
 
-# --- Fő QR feldolgozó függvény ---
-def check_in_out(auth_token: str, ser):
-    conn = None
-    cursor = None
+def display_lcd(link, msg, wait=True):
+    # wait=False: csak sorba tesszük a kiírást, a nyugtát nem várjuk meg
+    if not link:
+        return False
     try:
-        conn = pymysql.connect(**db_config)
+        if not wait:
+            link.display_async(msg)
+            return True
+        return link.display(msg)
+    except ConnectionError as e:
+        logger.warning("⚠️ LCD kiírás sikertelen", error=e)
+        return False
+
+# --- Fő QR feldolgozó függvény ---
+def check_in_out(auth_token: str, ser, kiosk=None):
+    """
+    Egy vendég check-in/out folyamata.
+
+    1. rövid olvasó tranzakció: foglalás + szekrények
+    2. a foglalás összes szekrénye párhuzamosan nyílik, majd párhuzamosan
+       várjuk a visszazárásukat (DB kapcsolat nélkül)
+    3. rövid író tranzakció: státusz + outbox, utána cache invalidálás
+    A kiosk (ha van) kizárólagosan lefoglalja a szekrényeket a folyamat idejére
+    és nem blokkolóan kezeli az LCD-t.
+    """
+    show = kiosk.show if kiosk else (lambda msg: display_lcd(ser, msg))
+    started = time.perf_counter()
+    booking_id, kind = None, "checkin"
+    with tracing.trace("checkin") as t:
+        try:
+            plan = _load_plan(auth_token)
+            if plan is None:
+                logger.info("Nincs ilyen foglalás", token=auth_token)
+                audit.record(kind, result="NOT_FOUND", latency=time.perf_counter() - started, hotel=hotels.scope(HOTEL_ID))
+                return
+            booking_id, check_in, locker_ids = plan
+            kind = "checkin" if check_in else "checkout"
+            t.fields.update(booking=booking_id, kind=kind, lockers=len(locker_ids))
+            action_msg = "Vegye el a kártyát a szekrényből!" if check_in else "Tegye vissza a kártyát a szekrénybe!"
+
+            reservation = kiosk.lockers(locker_ids) if kiosk else nullcontext()
+            with reservation:
+                opened = _run_lockers(ser, locker_ids, action_msg, show)
+
+            _commit_status(booking_id, check_in)
+            show("Kellemes időtöltést! :)")
+            audit.record(kind, booking=booking_id, result="OK" if len(opened) == len(locker_ids) else "PARTIAL",
+                         latency=time.perf_counter() - started, hotel=hotels.scope(HOTEL_ID),
+                         detail="lockers=" + ",".join(map(str, opened)))
+
+        except storage.DB_ERRORS as e:
+            logger.error("Adatbázis hiba", booking=booking_id, error=e)
+            t.fields["error"] = str(e)[:200]
+            show("Valami nem működik!")
+            audit.record(kind, booking=booking_id, result="ERROR", latency=time.perf_counter() - started,
+                         hotel=hotels.scope(HOTEL_ID), detail=str(e)[:255])
+        finally:
+            if kiosk is None:
+                display_lcd(ser, IDLE_PROMPT)
+
+def _load_plan(auth_token):
+    # Egyetlen indexelt lekérdezés a szinkronkor előállított tervből (checkinPlan.py)
+    with tracing.timed(metrics.DB_QUERY_SECONDS, "checkin_plan.lookup"), storage.connection() as conn:
         cursor = conn.cursor()
+        try:
+            plan = checkinPlan.lookup(cursor, auth_token, hotels.scope(HOTEL_ID))
+        finally:
+            cursor.close()
+    if plan is None:
+        return None
+    booking_id, status, locker_ids = plan
+    check_in = status is None or status.lower() in ["", "confirmed"]
+    return booking_id, check_in, locker_ids
+
+def _run_lockers(link, locker_ids, action_msg, show):
+    # Visszatér a kinyílt szekrények listájával
+    if not locker_ids:
+        return []
+    if not link:
+        logger.warning("⚠️ Nincs soros kapcsolat")
+        show("Valami nem működik!")
+        return []
+
+    # Minden szekrény egyszerre nyílik
+    pending = {}
+    for locker_id in locker_ids:
+        try:
+            pending[locker_id] = link.open_locker_async(locker_id)
+        except ConnectionError as e:
+            logger.warning("⚠️ Soros hiba", locker=locker_id, error=e)
+
+    opened = []
+    deadline = time.monotonic() + OPEN_TIMEOUT
+    with tracing.span("lockers_open"):
+        for locker_id, (opened_future, closed_future) in pending.items():
+            if link.wait(opened_future, max(0, deadline - time.monotonic())):
+                logger.info("✅ Szekrény nyitva", locker=locker_id)
+                opened.append((locker_id, closed_future))
+            else:
+                logger.warning("⏰ Időtúllépés – szekrény nem nyílt", locker=locker_id)
+
+    if len(opened) < len(locker_ids):
+        show("Valami nem működik!")
+    elif opened:
+        show(action_msg)
 
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS pending_requests (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                booking_id INT,
-                payload JSON,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Korábbi sikertelen requestek újraküldése
-        cursor.execute("SELECT id, booking_id, payload FROM pending_requests ORDER BY id ASC")
-        pending = cursor.fetchall()
-        for row in pending:
-            req_id = row['id']
-            b_id = row['booking_id']
-            payload_data = json.loads(row['payload']) if isinstance(row['payload'], str) else row['payload']
-            if put_request_example(payload_data, b_id):
-                cursor.execute("DELETE FROM pending_requests WHERE id = %s", (req_id,))
-        conn.commit()
-
-        # Foglalás lekérése
-        cursor.execute("SELECT id, checkInstatus FROM bookings WHERE checkInToken = %s", (auth_token,))
-        booking = cursor.fetchone()
-        if not booking:
-            print("Nincs ilyen foglalás.")
-            return
-
-        booking_id = booking['id']
-        status = booking['checkInstatus']
-
-        if status is None or status.lower() in ["", "confirmed"]:
-            # CHECK-IN
-            cursor.execute("UPDATE bookings SET checkInstatus='checkedIn', checkInTime=NOW(), checkOutTime=NULL WHERE id=%s", (booking_id,))
-            action_msg = "Vegye el a kártyát a szekrényből!"
-        else:
-            # CHECK-OUT
-            cursor.execute("UPDATE bookings SET checkInstatus='CheckedOut', checkOutTime=NOW() WHERE id=%s", (booking_id,))
-            action_msg = "Tegye vissza a kártyát a szekrénybe!"
-
-        # Szobák feldolgozása
-        cursor.execute("SELECT rooms_id FROM relations WHERE booking_id=%s", (booking_id,))
-        rooms = cursor.fetchall()
-        for room in rooms:
-            room_id = room["rooms_id"]
-            cursor.execute("SELECT rfidKey FROM rfidConnections WHERE roomId=%s", (room_id,))
-            rfid = cursor.fetchone()
-            if not rfid:
-                continue
-            rfid_key = rfid["rfidKey"]
-            if rfid_key not in RFID_LOCKER_MAP:
-                continue
-            row, col = RFID_LOCKER_MAP[rfid_key]
-            locker_id = locker_id_from_matrix(row, col)
-
-            if open_locker(ser, locker_id):
-                display_lcd(ser, action_msg)
-                wait_for_locker_closed(ser, locker_id)
+    # Visszazárások párhuzamos várása, közös határidővel
+    deadline = time.monotonic() + CLOSE_TIMEOUT
+    with tracing.span("lockers_close"):
+        for locker_id, closed_future in opened:
+            if link.wait(closed_future, max(0, deadline - time.monotonic())):
+                logger.info("🔒 Szekrény visszazárva", locker=locker_id)
             else:
-                display_lcd(ser, "Valami nem működik!")
-                time.sleep(7)
-
-        # Backend frissítése
-        cursor.execute("SELECT checkInstatus, checkInTime, checkOutTime FROM bookings WHERE id=%s", (booking_id,))
-        booking = cursor.fetchone()
-        payload = {
-            "checkInstatus": booking['checkInstatus'],
-            "checkInTime": booking['checkInTime'].strftime('%Y-%m-%d %H:%M:%S') if booking['checkInTime'] else None,
-            "checkOutTime": booking['checkOutTime'].strftime('%Y-%m-%d %H:%M:%S') if booking['checkOutTime'] else None
-        }
-        if not put_request_example(payload, booking_id):
-            cursor.execute("INSERT INTO pending_requests (booking_id, payload) VALUES (%s, %s)", (booking_id, json.dumps(payload)))
-        conn.commit()
-        display_lcd(ser, "Kellemes időtöltést! :)")
-        time.sleep(7)
-
-    except pymysql.MySQLError as e:
-        print("Adatbázis hiba:", e)
-        time.sleep(7)
-    finally:
-        display_lcd(arduino, "Kérjük olvassa le a QR kódot!")
-        if cursor:
+                logger.warning("⏰ Időtúllépés – szekrény nem záródott vissza", locker=locker_id)
+    return [locker_id for locker_id, _ in opened]
+
+def _commit_status(booking_id, check_in):
+    now = datetime.now()
+    with tracing.timed(metrics.DB_QUERY_SECONDS, "checkin.commit_status"), storage.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # rowHash=NULL: a helyben módosított sort a következő szinkron újraírja a backend szerint
+            if check_in:
+                cursor.execute("UPDATE bookings SET checkInstatus='checkedIn', checkInTime=%s, checkOutTime=NULL, rowHash=NULL WHERE id=%s", (now, booking_id))
+            else:
+                cursor.execute("UPDATE bookings SET checkInstatus='CheckedOut', checkOutTime=%s, rowHash=NULL WHERE id=%s", (now, booking_id))
+
+            # Backend frissítése
+            cursor.execute("SELECT checkInstatus, checkInTime, checkOutTime FROM bookings WHERE id=%s", (booking_id,))
+            booking = cursor.fetchone()
+            checkinPlan.set_status(cursor, booking_id, booking['checkInstatus'])
+            payload = {
+                "checkInstatus": booking['checkInstatus'],
+                "checkInTime": booking['checkInTime'].strftime('%Y-%m-%d %H:%M:%S') if booking['checkInTime'] else None,
+                "checkOutTime": booking['checkOutTime'].strftime('%Y-%m-%d %H:%M:%S') if booking['checkOutTime'] else None
+            }
+            # A backend frissítését az outbox worker végzi, itt csak sorba tesszük
+            outbox.enqueue(cursor, booking_id, payload)
+            conn.commit()
+        finally:
             cursor.close()
-        if conn:
-            conn.close()
 
-# --- Inicializálás ---
-arduino = get_arduino()
-if arduino:
-    display_lcd(arduino, "Kérjük olvassa le a QR kódot!")
+    outbox.wake()
+    # Check-in/out után a validator ajtó-indexét újra kell építeni
+    accessCache.invalidate()
 
-# --- QR feldolgozó loop ---
-while True:
-    try:
-        qr_code = qrReader.scan_frame()  # visszaadja a **csak egy** QR kódot vagy None
-        if qr_code:
-            print(f"[MAIN] Feldolgozás: {qr_code}")
-            check_in_out(qr_code, arduino)
-        if arduino:
-            process_serial(arduino)
-        time.sleep(0.05)
-    except KeyboardInterrupt:
-        print("Leállítás")
-        break
+# --- Inicializálás + QR feldolgozó loop ---
+def start_kiosk(arduino, camera):
+    """
+    Eszközök párhuzamos, háttérbeli megnyitása + kioszk + QR pipeline.
+    Semmi sem vár az eszközökre: a pipeline és a vendégek a Device-tól
+    kérik el az aktuális kapcsolatot (leszakadás után az újat).
+    """
+    manager = devices.DeviceManager(arduino, camera).start()
+    kiosk = Kiosk(
+        handler=lambda token, k: check_in_out(token, arduino.get(DEVICE_WAIT), k),
+        display=lambda msg: display_lcd(arduino.get(), msg, wait=False),
+    )
+    # Kamera olvasás és dekódolás háttérszálakon, ide már csak a tokenek jönnek
+    scanner = qrReader.start_pipeline(camera)
+    return manager, kiosk, scanner
+
+def main():
+    # Más hotel QR tokenje ne nyisson: több hotelnél a kioszk hotelje kötelező
+    global HOTEL_ID
+    HOTEL_ID = hotels.scope(HOTEL_ID)
+    metrics.start_exporter("kiosk")
+    tracing.start_agent("kiosk")
+    manager, kiosk, scanner = start_kiosk(arduino_device(), camera_device())
+    outbox.start_worker()
+    audit.start()
+
+    if manager.wait_ready(devices.COLD_START_TARGET):
+        logger.info("✅ Kioszk kész", seconds=round(manager.cold_start_seconds(), 3))
+    else:
+        logger.warning("⚠️ Nem minden eszköz állt készen", status=manager.status())
+
+    while True:
+        try:
+            qr_code = scanner.get(timeout=0.5)
+            if qr_code and kiosk.submit(qr_code):
+                logger.info("Sorba állítva", token=qr_code)
+        except KeyboardInterrupt:
+            logger.info("Leállítás")
+            qrReader.stop_pipeline()
+            kiosk.stop()
+            manager.stop()
+            break
+
+if __name__ == "__main__":
+    main()
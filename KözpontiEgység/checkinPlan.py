@@ -0,0 +1,76 @@
+# Előre kiszámolt check-in terv: token -> foglalás, státusz, szekrények.
+# A szinkron (DbFetcher) építi újra, így a kioszk egyetlen indexelt
+# lekérdezéssel dönt, a szekrény-mátrix elrendezése pedig az adatbázisban van.
+
+import storage
+
+# Első indításkor ezzel tölti fel a schema a locker_layout táblát (a korábbi
+# checkInOut.RFID_LOCKER_MAP): rfidKey -> (sor, oszlop)
+DEFAULT_LAYOUT = {
+    "B7E5C37A": (0, 0),
+    "59EDC9B0s": (0, 1)
+}
+DEFAULT_MATRIX_COLS = 1
+
+
+def set_locker(cursor, rfid_key, row, col, cols=DEFAULT_MATRIX_COLS):
+    cursor.execute(
+        storage.get_backend().upsert_sql(
+            "locker_layout", ("rfidKey", "matrixRow", "matrixCol", "matrixCols"), ("rfidKey",)
+        ),
+        (rfid_key, row, col, cols)
+    )
+
+
+def rebuild(cursor, hotel_id=None):
+    """
+    A terv újraépítése halmazműveletekkel, a hívó tranzakciójában (a kioszk
+    így mindig egy konzisztens állapotot lát). Visszatér a sorok számával.
+    hotel_id megadásakor csak annak a hotelnek a része épül újra.
+    Szobánként az első (legkisebb) RFID kulcs számít, mint korábban a
+    checkInOut-ban a fetchone().
+    """
+    backend = storage.get_backend()
+    locker_ids = backend.group_concat("ll.matrixRow * ll.matrixCols + ll.matrixCol", "r.rooms_id")
+    if hotel_id is None:
+        cursor.execute("DELETE FROM checkin_plan")
+        scope, args = "", ()
+    else:
+        cursor.execute("DELETE FROM checkin_plan WHERE hotelId=%s", (hotel_id,))
+        scope, args = "AND b.hotelId = %s", (hotel_id,)
+    return cursor.execute(f"""
+        {backend.insert_ignore} INTO checkin_plan (checkInToken, booking_id, checkInstatus, lockerIds, hotelId)
+        SELECT b.checkInToken, b.id, b.checkInstatus, COALESCE({locker_ids}, ''), b.hotelId
+        FROM bookings b
+        LEFT JOIN relations r ON r.booking_id = b.id
+        LEFT JOIN (
+            SELECT roomId, MIN(rfidKey) AS rfidKey FROM rfidConnections GROUP BY roomId
+        ) rc ON rc.roomId = r.rooms_id
+        LEFT JOIN locker_layout ll ON ll.rfidKey = rc.rfidKey
+        WHERE b.checkInToken IS NOT NULL AND b.checkInToken <> ''
+          {scope}
+        GROUP BY b.id, b.checkInToken, b.checkInstatus, b.hotelId
+    """, args)
+
+
+def lookup(cursor, token, hotel_id=None):
+    """(booking_id, checkInstatus, [locker_id, ...]) vagy None; hotel_id-vel csak annak a hotelnek a tokenje."""
+    if hotel_id is None:
+        cursor.execute(
+            "SELECT booking_id, checkInstatus, lockerIds FROM checkin_plan WHERE checkInToken=%s",
+            (token,)
+        )
+    else:
+        cursor.execute(
+            "SELECT booking_id, checkInstatus, lockerIds FROM checkin_plan WHERE checkInToken=%s AND hotelId=%s",
+            (token, hotel_id)
+        )
+    row = cursor.fetchone()
+    if not row:
+        return None
+    locker_ids = [int(x) for x in row["lockerIds"].split(",") if x]
+    return row["booking_id"], row["checkInstatus"], locker_ids
+
+
+def set_status(cursor, booking_id, status):
+    cursor.execute("UPDATE checkin_plan SET checkInstatus=%s WHERE booking_id=%s", (status, booking_id))
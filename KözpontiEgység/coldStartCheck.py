@@ -0,0 +1,137 @@
+"""
+Kioszk hidegindítás és újracsatlakozás mérése utánzott eszközökkel.
+
+    python coldStartCheck.py [--arduino-boot 1.6] [--camera-init 1.0] [--target 3.0]
+
+- hidegindítás: checkInOut.start_kiosk() hívásától addig, amíg a kamera és
+  az Arduino is kész (a két eszköz párhuzamosan nyílik, fix sleep nélkül)
+- Arduino újracsatlakozás: a FakeArduino "kihúzása" után egy új porton
+  (mint amikor /dev/ttyACM0 helyett ttyACM1 lesz) újra kész
+- kamera újracsatlakozás: a capture() hibát dob, a Device újranyitja
+
+Bármelyik cél túllépésekor 1-es kóddal lép ki (CI / telepítés utáni ellenőrzés).
+A korábbi, soros indítás a két fix sleep miatt önmagában ≥ 4 s volt.
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+DEFAULT_ARDUINO_BOOT = 1.6    # az Uno bootloadere ennyi ideig nem válaszol megnyitás után
+DEFAULT_CAMERA_INIT = 1.0     # Picamera2 megnyitás + első képkocka
+
+
+class FakeCamera:
+    """Lassan nyíló kamera, amely kérésre "leszakad" (a következő capture hibát dob)."""
+
+    def __init__(self, init_delay, fps=30):
+        import numpy as np
+
+        time.sleep(init_delay)
+        self.frame = np.full((480, 640, 3), 255, dtype=np.uint8)
+        self.interval = 1.0 / fps
+        self.broken = False
+
+    def capture(self):
+        time.sleep(self.interval)
+        if self.broken:
+            raise OSError("kamera leszakadt")
+        return self.frame
+
+    def close(self):
+        pass
+
+
+def _wait_reconnect(device, connects, timeout):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if device.connects > connects and device.ready.is_set():
+            return time.monotonic() - start
+        time.sleep(0.01)
+    return None
+
+
+def run(arduino_boot, camera_init, timeout):
+    import checkInOut
+    import devices
+    import qrReader
+    from fakeArduino import FakeArduino
+
+    fake = FakeArduino(boot_delay=arduino_boot)
+    checkInOut.SERIAL_PORT, checkInOut.SERIAL_PORT_GLOB = fake.port, "/nonexistent*"
+    cameras = []
+
+    def open_camera():
+        cameras.append(FakeCamera(camera_init))
+        return cameras[-1]
+
+    arduino = checkInOut.arduino_device(backoff_min=0.1)
+    camera = devices.Device("camera", open=open_camera, backoff_min=0.1)
+    result = {}
+    manager = None
+    try:
+        manager, kiosk, scanner = checkInOut.start_kiosk(arduino, camera)
+        manager.wait_ready(timeout)
+        result["cold_start"] = manager.cold_start_seconds()
+        result["arduino_open"] = arduino.open_seconds
+        result["camera_open"] = camera.open_seconds
+
+        # USB kihúzás, újraszámozás: új port, az Arduino újra bootol
+        connects = arduino.connects
+        fake.disconnect()
+        fake = FakeArduino(boot_delay=arduino_boot)
+        checkInOut.SERIAL_PORT = fake.port
+        result["arduino_reconnect"] = _wait_reconnect(arduino, connects, timeout)
+
+        connects = camera.connects
+        cameras[-1].broken = True
+        result["camera_reconnect"] = _wait_reconnect(camera, connects, timeout)
+
+        qrReader.stop_pipeline()
+        kiosk.stop()
+    finally:
+        if manager is not None:
+            manager.stop()
+        fake.close()
+    return result
+
+
+def main(argv=None):
+    import devices
+
+    parser = argparse.ArgumentParser(description="Kioszk hidegindítás / újracsatlakozás ellenőrzés")
+    parser.add_argument("--arduino-boot", type=float, default=DEFAULT_ARDUINO_BOOT)
+    parser.add_argument("--camera-init", type=float, default=DEFAULT_CAMERA_INIT)
+    parser.add_argument("--target", type=float, default=devices.COLD_START_TARGET,
+                        help="hidegindítás és újracsatlakozás felső korlátja (s)")
+    parser.add_argument("--json", help="eredmény mentése JSON fájlba")
+    parser.add_argument("--verbose", action="store_true", help="a modulok kimenete is látszik")
+    args = parser.parse_args(argv)
+
+    import logs
+
+    if not args.verbose:
+        logs.setup(stream=io.StringIO())
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        result = run(args.arduino_boot, args.camera_init, timeout=args.target * 3)
+
+    ok = True
+    for name in ("cold_start", "arduino_reconnect", "camera_reconnect"):
+        value = result[name]
+        passed = value is not None and value <= args.target
+        ok = ok and passed
+        shown = f"{value:.2f} s" if value is not None else "nem állt helyre"
+        print(f"{'✅' if passed else '❌'} {name:<18} {shown:>14}  (cél ≤ {args.target:.1f} s)")
+    print("   eszköz megnyitás:", ", ".join(
+        f"{name} {result[name + '_open']:.2f} s" for name in ("arduino", "camera") if result[name + "_open"] is not None))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
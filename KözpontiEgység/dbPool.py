@@ -0,0 +1,165 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pymysql
+
+import logs
+
+# -------- CONFIG --------
+# Az összes központi egység szolgáltatás (DbFetcher, checkInOut, post, validator)
+# innen veszi a lokális adatbázis elérését.
+DB_CONFIG = {
+    "host": "127.0.0.1",
+    "user": "appuser",
+    "password": "123",
+    "database": "hotelflowLocal"
+}
+
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 5
+POOL_TIMEOUT = 10  # ennyit várunk szabad kapcsolatra, ha a pool tele van
+
+logger = logs.get("dbPool")
+
+
+class PoolTimeout(pymysql.OperationalError):
+    # OperationalError-ból származik, így a meglévő MySQLError kezelők elkapják
+    pass
+
+
+class ConnectionPool:
+    """
+    Szálbiztos pymysql kapcsolat pool.
+
+    Kiadáskor minden kapcsolatot ping-gel ellenőriz (és szükség esetén
+    újranyit), visszaadáskor rollback-kel lezárja a nyitott tranzakciót, így
+    egy újrahasznált kapcsolat sem ragad be egy régi REPEATABLE READ snapshotba.
+    """
+
+    def __init__(self, config=None, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 timeout=POOL_TIMEOUT):
+        if min_size > max_size:
+            raise ValueError("min_size nem lehet nagyobb, mint max_size")
+        self.config = dict(config or DB_CONFIG)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._size = 0  # kiadott + szabad kapcsolatok száma
+
+        for _ in range(min_size):
+            try:
+                self._idle.append(self._connect())
+                self._size += 1
+            except pymysql.MySQLError as e:
+                # Induláskor nem kötelező az adatbázis, az első kérésnél újrapróbáljuk
+                logger.warning("⚠️ Adatbázis nem elérhető a pool indításakor", error=e)
+                break
+
+    def _connect(self):
+        return pymysql.connect(**self.config, cursorclass=pymysql.cursors.DictCursor)
+
+    def _healthy(self, conn):
+        try:
+            conn.ping(reconnect=True)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"Nincs szabad adatbázis kapcsolat ({self.max_size} foglalt)")
+                self._cond.wait(remaining)
+
+        # A hálózati műveletek már a lakaton kívül futnak
+        try:
+            if conn is not None and self._healthy(conn):
+                return conn
+            if conn is not None:
+                self._close_quietly(conn)
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            if discard or len(self._idle) >= self.max_size:
+                self._size -= 1
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+        if discard:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except pymysql.OperationalError:
+            # Megszakadt kapcsolatot nem adunk vissza a poolba
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "max_size": self.max_size}
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# -------- FOLYAMATSZINTŰ POOL --------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+def connection():
+    return get_pool().connection()
@@ -0,0 +1,214 @@
+"""
+Kioszk eszközök (kamera, Arduino) felügyelete.
+
+Minden eszközt egy saját szál nyit meg, így az inicializálások párhuzamosan
+futnak, és a folyamat többi része (kioszk, outbox, metrikák) nem vár rájuk.
+Fix várakozás helyett az eszköz akkor "kész", amikor az `open` függvénye
+visszatért (az maga várja meg az első képkockát / az Arduino első válaszát).
+
+Ha az eszköz leszakad (az `alive` hamisat ad, vagy a használója failed()-et
+hív), a felügyelő szál lezárja és exponenciális visszalépéssel (jitterrel)
+újranyitja; közben get() None-t ad, a hívó ezt "nincs eszköz"-ként kezeli.
+
+    arduino = Device("arduino", open=open_arduino, close=lambda l: l.close(),
+                     alive=lambda l: l.alive)
+    manager = DeviceManager(arduino, camera).start()
+    manager.wait_ready(COLD_START_TARGET)
+"""
+import random
+import threading
+import time
+
+import logs
+import metrics
+
+# -------- CONFIG --------
+BACKOFF_MIN = 0.5            # első újrapróbálás ennyi után
+BACKOFF_MAX = 30.0
+CHECK_INTERVAL = 1.0         # ennyi időnként nézzük az `alive`-ot
+COLD_START_TARGET = 3.0      # indulástól az összes eszköz készenlétéig (coldStartCheck.py)
+
+logger = logs.get("devices")
+
+DEVICE_READY = metrics.gauge("hotelflow_device_ready", "Eszköz készenlét (1/0)", ("device",))
+DEVICE_OPENS = metrics.counter("hotelflow_device_open_total", "Eszköz megnyitási kísérletek", ("device", "result"))
+DEVICE_OPEN_SECONDS = metrics.histogram("hotelflow_device_open_seconds", "Eszköz megnyitása a készenlétig", ("device",))
+
+
+class Device:
+    """
+    Egy felügyelt eszköz. open() -> handle (hibánál kivételt dob),
+    close(handle), alive(handle) -> bool; on_ready(handle) minden sikeres
+    (újra)nyitás után hívódik (pl. LCD alapképernyő).
+    """
+
+    def __init__(self, name, open, close=None, alive=None, on_ready=None,
+                 backoff_min=BACKOFF_MIN, backoff_max=BACKOFF_MAX, check_interval=CHECK_INTERVAL):
+        self.name = name
+        self._open = open
+        self._close = close
+        self._alive = alive
+        self.on_ready = on_ready
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+        self.check_interval = check_interval
+
+        self.ready = threading.Event()
+        self._handle = None
+        self._failed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.attempts = 0
+        self.connects = 0
+        self.last_error = None
+        self.open_seconds = None     # az utolsó sikeres megnyitás ideje
+        self.ready_at = None         # time.monotonic() az első készenléttől
+
+    # -------- HASZNÁLAT --------
+    def get(self, timeout=0):
+        """Az aktuális handle, vagy None, ha `timeout` alatt sem lett kész."""
+        if timeout and not self.ready.wait(timeout):
+            return None
+        return self._handle if self.ready.is_set() else None
+
+    def wait_ready(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def failed(self, error=None):
+        """A használó jelzi, hogy az eszköz elérhetetlenné vált: újranyitás."""
+        if error is not None:
+            self.last_error = str(error)
+        self.ready.clear()
+        DEVICE_READY.set(0, self.name)
+        self._failed.set()
+
+    # -------- FELÜGYELET --------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"device-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stopped.set()
+        self._failed.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            handle = self._connect()
+            if handle is None:
+                return
+            self._watch(handle)
+            self.ready.clear()
+            DEVICE_READY.set(0, self.name)
+            self._handle = None
+            if self._close is not None:
+                try:
+                    self._close(handle)
+                except Exception:
+                    pass
+            if not self._stopped.is_set():
+                logger.warning("⚠️ Eszköz leszakadt, újracsatlakozás", device=self.name, error=self.last_error)
+
+    def _connect(self):
+        delay = self.backoff_min
+        while not self._stopped.is_set():
+            self.attempts += 1
+            start = time.perf_counter()
+            try:
+                handle = self._open()
+            except Exception as e:
+                self.last_error = str(e)
+                DEVICE_OPENS.inc(self.name, "error")
+                if self.attempts == 1 or delay >= self.backoff_max:
+                    logger.warning("⚠️ Eszköz nem elérhető", device=self.name, error=e, retry_in=round(delay, 2))
+                self._stopped.wait(delay * random.uniform(0.5, 1))
+                delay = min(self.backoff_max, delay * 2)
+                continue
+
+            self.open_seconds = time.perf_counter() - start
+            DEVICE_OPEN_SECONDS.observe(self.open_seconds, self.name)
+            DEVICE_OPENS.inc(self.name, "ok")
+            self.connects += 1
+            self._handle = handle
+            self._failed.clear()
+            self.ready.set()
+            DEVICE_READY.set(1, self.name)
+            if self.ready_at is None:
+                self.ready_at = time.monotonic()
+            logger.info("✅ Eszköz kész", device=self.name, seconds=round(self.open_seconds, 3))
+            if self.on_ready is not None:
+                try:
+                    self.on_ready(handle)
+                except Exception:
+                    logger.exception("⚠️ on_ready hiba", device=self.name)
+            return handle
+        return None
+
+    def _watch(self, handle):
+        while not self._stopped.is_set():
+            if self._failed.wait(self.check_interval):
+                return
+            if self._alive is not None and not self._alive(handle):
+                return
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "attempts": self.attempts,
+            "connects": self.connects,
+            "open_seconds": self.open_seconds,
+            "last_error": self.last_error,
+        }
+
+
+class DeviceManager:
+    """Az eszközök együttes indítása (párhuzamosan) és készenléte."""
+
+    def __init__(self, *devices):
+        self.devices = {}
+        self.started_at = None
+        for device in devices:
+            self.add(device)
+
+    def add(self, device):
+        self.devices[device.name] = device
+        if self.started_at is not None:
+            device.start()
+        return device
+
+    def __getitem__(self, name):
+        return self.devices[name]
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for device in self.devices.values():
+            device.start()
+        return self
+
+    def wait_ready(self, timeout=None, names=None):
+        """Igaz, ha `timeout` alatt minden (vagy a megadott) eszköz kész lett."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names or self.devices:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not self.devices[name].wait_ready(remaining):
+                return False
+        return True
+
+    def cold_start_seconds(self):
+        """Indulástól az utolsó eszköz első készenlétéig; None, ha még nincs mind kész."""
+        stamps = [device.ready_at for device in self.devices.values()]
+        if self.started_at is None or None in stamps:
+            return None
+        return max(stamps) - self.started_at
+
+    def stop(self):
+        for device in self.devices.values():
+            device.stop()
+
+    def status(self):
+        return {name: device.status() for name, device in self.devices.items()}
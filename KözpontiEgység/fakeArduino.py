@@ -0,0 +1,120 @@
+"""
+pty alapú Arduino utánzat (HarwerCodes/BoxController protokoll) teszteléshez.
+
+    fake = FakeArduino(close_delay=1.0)
+    ser = serial.Serial(fake.port, 9600, timeout=0.5)
+
+A port egy valódi soros eszköznek látszik, így a checkInOut/serialLink kód
+változtatás nélkül futtatható ellene. boot_delay: az indulás utáni ennyi
+másodpercben a parancsok elvesznek (mint a valódi Arduino bootloadere alatt);
+disconnect() az USB kihúzását utánozza.
+"""
+import os
+import select
+import threading
+import time
+import tty
+
+
+class FakeArduino:
+    def __init__(self, lockers=8, open_delay=0.0, close_delay=0.5, display_delay=0.0, boot_delay=0.0):
+        self.lockers = lockers
+        self.open_delay = open_delay
+        self.close_delay = close_delay        # None -> csak close_locker() zár
+        self.display_delay = display_delay
+        self.booted_at = time.monotonic() + boot_delay
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+        self.received = []                    # beérkezett parancsok
+        self.on_emit = None                   # on_emit(perf_counter, sor) - benchmarkhoz
+        self.open_lockers = set()
+        self.display_text = None
+        self._write_lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="fake-arduino", daemon=True)
+        self._thread.start()
+
+    def _emit(self, line):
+        with self._write_lock:
+            os.write(self.master, f"{line}\r\n".encode())
+        if self.on_emit is not None:
+            self.on_emit(time.perf_counter(), line)
+
+    def _later(self, delay, fn, *args):
+        if delay:
+            timer = threading.Timer(delay, fn, args)
+            timer.daemon = True
+            timer.start()
+        else:
+            fn(*args)
+
+    def _loop(self):
+        buffer = b""
+        while self._running:
+            # select időkorláttal: a close() így a szál kilépése után zárhat,
+            # egy blokkoló read közben a pty nem szakadna meg
+            if not select.select([self.master], [], [], 0.1)[0]:
+                continue
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buffer += chunk
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                self._handle(raw.decode(errors="replace").strip())
+
+    def _handle(self, command):
+        self.received.append(command)
+        if time.monotonic() < self.booted_at:
+            return  # bootloader: a parancs elveszik
+        # "#<sorszám>;" előtag: a válasz ugyanezzel megy vissza
+        tag = ""
+        if command.startswith("#") and ";" in command:
+            tag, command = command[:command.index(";") + 1], command[command.index(";") + 1:]
+        if command.startswith("OPEN;"):
+            locker_id = int(command[5:] or -1)
+            if not 0 <= locker_id < self.lockers:
+                self._emit(f"{tag}ERROR;INVALID_ID")
+                return
+            self._later(self.open_delay, self._opened, locker_id, tag)
+        elif command.startswith("DISPLAY;") or command == "CLEAR":
+            self.display_text = command[8:] if command.startswith("DISPLAY;") else ""
+            self._later(self.display_delay, self._emit, f"{tag}DISPLAY_OK")
+        elif command == "STATE":
+            self._emit(tag + ("STATE;OPEN" if self.open_lockers else "STATE;UNKNOWN"))
+
+    def _opened(self, locker_id, tag=""):
+        self.open_lockers.add(locker_id)
+        self._emit(f"{tag}OPENED;{locker_id}")
+        if self.close_delay is not None:
+            self._later(self.close_delay, self.close_locker, locker_id)
+
+    def close_locker(self, locker_id):
+        # A vendég visszacsukja az ajtót
+        if locker_id in self.open_lockers:
+            self.open_lockers.discard(locker_id)
+            self._emit(f"STATE;CLOSED;{locker_id}")
+
+    def send_raw(self, line):
+        self._emit(line)
+
+    def disconnect(self):
+        # A master lezárása után a port olvasása hibát ad, mint egy kihúzott eszköznél
+        self.close()
+
+    def close(self):
+        self._running = False
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
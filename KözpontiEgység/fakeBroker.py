@@ -0,0 +1,265 @@
+"""
+Minimális MQTT 3.1.1 broker (Mosquitto helyett) teszteléshez és benchmarkhoz.
+
+Támogatott: CONNECT, SUBSCRIBE/UNSUBSCRIBE (+ és # wildcard), PUBLISH QoS 0/1,
+PUBACK, PINGREQ, DISCONNECT, valamint megosztott feliratkozás
+($share/<csoport>/<szűrő>, a Mosquittóhoz hasonlóan round-robin egy tagnak).
+Retain, will, session és QoS 2 nincs.
+
+    broker = FakeBroker().start()
+    validator.main(broker.host, broker.port)
+"""
+import socket
+import struct
+import threading
+
+CONNECT, CONNACK, PUBLISH, PUBACK = 1, 2, 3, 4
+SUBSCRIBE, SUBACK, UNSUBSCRIBE, UNSUBACK = 8, 9, 10, 11
+PINGREQ, PINGRESP, DISCONNECT = 12, 13, 14
+
+
+def topic_matches(pattern, topic):
+    p_parts = pattern.split("/")
+    t_parts = topic.split("/")
+    for i, p in enumerate(p_parts):
+        if p == "#":
+            return True
+        if i >= len(t_parts):
+            return False
+        if p != "+" and p != t_parts[i]:
+            return False
+    return len(p_parts) == len(t_parts)
+
+
+def split_shared(topic_filter):
+    """'$share/csoport/szűrő' -> (csoport, szűrő); sima szűrőnél (None, szűrő)."""
+    if topic_filter.startswith("$share/"):
+        parts = topic_filter.split("/", 2)
+        if len(parts) == 3 and parts[1] and parts[2]:
+            return parts[1], parts[2]
+    return None, topic_filter
+
+
+def _encode_length(n):
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            byte |= 0x80
+        out.append(byte)
+        if not n:
+            return bytes(out)
+
+
+def _encode_str(s):
+    data = s.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+def _packet(ptype, flags, body):
+    return bytes([(ptype << 4) | flags]) + _encode_length(len(body)) + body
+
+
+class _Session:
+    def __init__(self, broker, sock):
+        self.broker = broker
+        self.sock = sock
+        self.client_id = None
+        self.subscriptions = {}   # filter -> qos
+        self._send_lock = threading.Lock()
+        self._next_id = 0
+
+    def send(self, data):
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def packet_id(self):
+        with self._send_lock:
+            self._next_id = self._next_id % 65535 + 1
+            return self._next_id
+
+    def _recv_exact(self, n):
+        buf = b""
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("kliens lezárta a kapcsolatot")
+            buf += chunk
+        return buf
+
+    def _read_packet(self):
+        header = self._recv_exact(1)[0]
+        length, shift = 0, 0
+        while True:
+            byte = self._recv_exact(1)[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        body = self._recv_exact(length) if length else b""
+        return header >> 4, header & 0x0F, body
+
+    def serve(self):
+        try:
+            while True:
+                ptype, flags, body = self._read_packet()
+                if ptype == CONNECT:
+                    self._on_connect(body)
+                elif ptype == PUBLISH:
+                    self._on_publish(flags, body)
+                elif ptype == SUBSCRIBE:
+                    self._on_subscribe(body)
+                elif ptype == UNSUBSCRIBE:
+                    self._on_unsubscribe(body)
+                elif ptype == PINGREQ:
+                    self.send(_packet(PINGRESP, 0, b""))
+                elif ptype == DISCONNECT:
+                    return
+                # PUBACK és a többi: nincs teendő
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.broker._drop(self)
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _on_connect(self, body):
+        pos = 2 + struct.unpack("!H", body[:2])[0] + 4  # protokollnév + szint + flagek + keepalive
+        id_len = struct.unpack("!H", body[pos:pos + 2])[0]
+        self.client_id = body[pos + 2:pos + 2 + id_len].decode()
+        self.send(_packet(CONNACK, 0, b"\x00\x00"))
+
+    def _on_publish(self, flags, body):
+        qos = (flags >> 1) & 0x03
+        topic_len = struct.unpack("!H", body[:2])[0]
+        topic = body[2:2 + topic_len].decode()
+        pos = 2 + topic_len
+        if qos:
+            packet_id = body[pos:pos + 2]
+            pos += 2
+            self.send(_packet(PUBACK, 0, packet_id))
+        self.broker.route(topic, body[pos:], qos)
+
+    def _on_subscribe(self, body):
+        packet_id = body[:2]
+        pos = 2
+        granted = bytearray()
+        while pos < len(body):
+            n = struct.unpack("!H", body[pos:pos + 2])[0]
+            topic_filter = body[pos + 2:pos + 2 + n].decode()
+            qos = min(body[pos + 2 + n], 1)
+            pos += 3 + n
+            self.broker._subscribe(self, topic_filter, qos)
+            granted.append(qos)
+        self.send(_packet(SUBACK, 0, packet_id + bytes(granted)))
+
+    def _on_unsubscribe(self, body):
+        packet_id = body[:2]
+        pos = 2
+        while pos < len(body):
+            n = struct.unpack("!H", body[pos:pos + 2])[0]
+            self.broker._unsubscribe(self, body[pos + 2:pos + 2 + n].decode())
+            pos += 2 + n
+        self.send(_packet(UNSUBACK, 0, packet_id))
+
+    def deliver(self, topic, payload, qos):
+        body = _encode_str(topic)
+        if qos:
+            body += struct.pack("!H", self.packet_id())
+        try:
+            self.send(_packet(PUBLISH, qos << 1, body + payload))
+        except OSError:
+            pass
+
+
+class FakeBroker:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self._sock = socket.create_server((host, port))
+        self.port = self._sock.getsockname()[1]
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self.published = 0
+        self._share_next = {}     # (csoport, szűrő) -> következő tag sorszáma
+        self._running = False
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._accept_loop, name="fake-broker", daemon=True).start()
+        return self
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            session = _Session(self, conn)
+            with self._lock:
+                self._sessions.add(session)
+            threading.Thread(target=session.serve, daemon=True).start()
+
+    def _subscribe(self, session, topic_filter, qos):
+        with self._lock:
+            session.subscriptions[topic_filter] = qos
+
+    def _unsubscribe(self, session, topic_filter):
+        with self._lock:
+            session.subscriptions.pop(topic_filter, None)
+
+    def subscribers(self, topic):
+        """Hány kliens kapná meg most a topicot (pl. indulás utáni várakozáshoz)."""
+        with self._lock:
+            return sum(
+                1 for s in self._sessions
+                if any(topic_matches(split_shared(f)[1], topic) for f in s.subscriptions)
+            )
+
+    def _drop(self, session):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def route(self, topic, payload, qos):
+        with self._lock:
+            self.published += 1
+            targets = []
+            shared = {}           # (csoport, szűrő) -> [(session, qos)]
+            for session in self._sessions:
+                granted = []
+                for f, q in session.subscriptions.items():
+                    group, pattern = split_shared(f)
+                    if not topic_matches(pattern, topic):
+                        continue
+                    if group is None:
+                        granted.append(q)
+                    else:
+                        shared.setdefault((group, pattern), []).append((session, q))
+                if granted:
+                    targets.append((session, min(qos, max(granted))))
+            # Megosztott csoportonként csak egy tag kapja meg az üzenetet
+            for key, members in shared.items():
+                members.sort(key=lambda m: m[0].client_id or "")
+                index = self._share_next.get(key, 0) % len(members)
+                self._share_next[key] = index + 1
+                session, q = members[index]
+                targets.append((session, min(qos, q)))
+        for session, q in targets:
+            session.deliver(topic, payload, q)
+
+    def stop(self):
+        self._running = False
+        try:
+            self._sock.close()
+        except OSError:
+            pass
+        with self._lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            try:
+                session.sock.close()
+            except OSError:
+                pass
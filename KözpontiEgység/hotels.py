@@ -0,0 +1,58 @@
+"""
+A központi egység által kiszolgált hotelek és az eszköz tokenjeik.
+
+A backend hotelenként ad ki tokent a foglalások letöltéséhez
+(/api/devices/bookings/{hotelId}) és a foglalás frissítéshez
+(/api/devices/update-booking/{id}). Több épület = több bejegyzés; a lokális
+táblák hotelId oszloppal particionáltak (schema.py 3. migráció).
+"""
+
+# -------- CONFIG --------
+HOTELS = {
+    1: {
+        "bookings_token": "ea8d8a4ea3498764427702fff9c9054bd6f946385bc6ac707050e83a4a044511",
+        "update_token": "8cecc3c207d4703568674551cb89c3f346af67c5107ef7cd78fec58142a0867f",
+    },
+}
+
+# A particionálás előtti sorok és a hotel nélküli hívások ehhez tartoznak
+DEFAULT_HOTEL_ID = 1
+
+
+def ids():
+    return sorted(HOTELS)
+
+
+def scope(hotel_id=None):
+    """
+    Egy folyamat (ajtó validator, kioszk) hotelje. Az ajtók és a QR tokenek
+    hotel nélkül érkeznek, a szobanév pedig csak hotelen belül egyedi, ezért
+    több hotelnél a hotel_id kötelező; None csak egyetlen hotelnél elég.
+    """
+    if hotel_id is not None:
+        if hotel_id not in HOTELS:
+            raise ValueError(f"Ismeretlen hotel: {hotel_id}")
+        return hotel_id
+    if len(HOTELS) != 1:
+        raise ValueError(f"{len(HOTELS)} hotel van beállítva: a folyamat hotel_id-ját meg kell adni")
+    return next(iter(HOTELS))
+
+
+def _token(hotel_id, kind):
+    hotel = HOTELS.get(hotel_id if hotel_id is not None else DEFAULT_HOTEL_ID)
+    return hotel.get(kind) if hotel else None
+
+
+def bookings_token(hotel_id):
+    return _token(hotel_id, "bookings_token")
+
+
+def update_token(hotel_id):
+    return _token(hotel_id, "update_token")
+
+
+def auth_headers(token, headers=None):
+    headers = dict(headers or {})
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
@@ -0,0 +1,165 @@
+"""
+Inkrementális JSON olvasó a szinkron válaszhoz.
+
+A teljes válasz helyett bájt darabokat kap (requests iter_content), és a
+legfelső objektum tömbjeit pufferenkénti kötegekben adja vissza, így
+egyszerre csak egy olvasási darabnyi rekord van memóriában. Események:
+
+    ("start", path, None)   tömb kezdete (pl. ("ids", "bookings"))
+    ("items", path, lista)  a pufferben már teljes tömbelemek (legfeljebb
+                            kb. READ_CHUNK méretnyi), sorrendben
+    ("value", path, érték)  nem tömb érték (pl. ("cursor",))
+
+A legfelső objektum tömbjei és az egy szinttel lejjebb lévő objektumok
+(pl. "ids") tömbjei jönnek kötegekben; a többi érték egyben.
+"""
+import codecs
+import json
+import re
+
+# -------- CONFIG --------
+READ_CHUNK = 64 * 1024     # ennyi bájtot olvasunk egyszerre a válaszból
+COMPACT_AT = 64 * 1024     # a feldolgozott puffer eleje ekkora után eldobódik
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_SPACE = re.compile(r"[ \t\n\r]*")
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,\]])[ \t\n\r]*")
+
+
+class _Reader:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        if self._pos >= COMPACT_AT:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self._buf += text
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def peek(self):
+        """A következő nem whitespace karakter (nem fogyasztja el); '' a végén."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"'{char}' várt", self._buf, self._pos)
+        self._pos += 1
+
+    def value(self):
+        """Egy teljes JSON érték; ha a puffer közepén vágódna el, továbbolvas."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Egy szám a puffer végén csonka lehet ("12" | "34"): kell utána még egy karakter
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def items(self):
+        """
+        Tömbelemek a puffer végéig: (elemek, vége-e a tömbnek). Egy elem csak
+        a mögötte lévő ',' vagy ']' után számít teljesnek (csonka szám sem
+        csúszhat át); ha egy sem teljes, továbbolvas.
+        """
+        items = []
+        buf, pos = self._buf, self._pos
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+                match = _SEPARATOR.match(buf, end)
+            except json.JSONDecodeError:
+                match = None
+            if match is None:
+                # Az elválasztó utáni whitespace egy későbbi darabban érkezhetett
+                start = _SPACE.match(buf, pos).end()
+                if start != pos:
+                    pos = start
+                    continue
+                self._pos = pos
+                if items:
+                    return items, False
+                if not self._fill():
+                    raise json.JSONDecodeError("Hiányos vagy hibás tömb", self._buf, self._pos)
+                buf, pos = self._buf, self._pos
+                continue
+            items.append(value)
+            pos = match.end()
+            if match.group(1) == "]":
+                self._pos = pos
+                return items, True
+
+
+def _members(reader):
+    """Egy objektum kulcsai; a hívó olvassa el az értéket minden kulcs után."""
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        yield key
+        if reader.peek() == ",":
+            reader.expect(",")
+            continue
+        reader.expect("}")
+        return
+
+
+def _array(reader, path):
+    reader.expect("[")
+    yield "start", path, None
+    if reader.peek() == "]":
+        reader.expect("]")
+        return
+    while True:
+        items, done = reader.items()
+        yield "items", path, items
+        if done:
+            return
+
+
+def iter_events(chunks, depth=2):
+    """A válasz eseményei bájt darabokból (lásd a modul leírását)."""
+    reader = _Reader(chunks)
+
+    def walk(path):
+        for key in _members(reader):
+            child = path + (key,)
+            char = reader.peek()
+            if char == "[":
+                yield from _array(reader, child)
+            elif char == "{" and len(child) < depth:
+                yield from walk(child)
+            else:
+                yield "value", child, reader.value()
+
+    yield from walk(())
+    if reader.peek() != "":
+        raise json.JSONDecodeError("Felesleges adat a JSON után", reader._buf, reader._pos)
@@ -0,0 +1,143 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import logs
+import tracing
+
+# -------- CONFIG --------
+SCAN_QUEUE_SIZE = 16
+MAX_PARALLEL_GUESTS = 4
+IDLE_PROMPT = "Kérjük olvassa le a QR kódot!"
+IDLE_PROMPT_DELAY = 7  # ennyi ideig marad kint az utolsó üzenet
+
+logger = logs.get("kiosk")
+
+
+class Kiosk:
+    """
+    Eseményvezérelt check-in/out állapotgép.
+
+    A beolvasott QR kódok egy korlátos sorba kerülnek (a beolvasás sosem vár
+    a szekrényekre), több worker szál dolgozza fel őket. Egy vendég csak a
+    saját szekrényeit foglalja le, így a következő vendég azonnal sorra kerül,
+    ha az ő szekrényei szabadok. Ugyanaz a token feldolgozás közben nem kerül
+    be újra a sorba.
+    """
+
+    def __init__(self, handler, display=None, workers=MAX_PARALLEL_GUESTS,
+                 queue_size=SCAN_QUEUE_SIZE, idle_delay=IDLE_PROMPT_DELAY):
+        self.handler = handler            # handler(token, kiosk)
+        self.display = display            # display(msg) -> nem blokkoló LCD kiírás
+        self.idle_delay = idle_delay
+        self.scans = queue.Queue(maxsize=queue_size)
+
+        self._lock = threading.Condition()
+        self._in_flight = set()           # sorban vagy feldolgozás alatt lévő tokenek
+        self._busy_lockers = set()
+        self._active = 0
+        self._idle_timer = None
+        self._running = True
+
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"kiosk-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for t in self._workers:
+            t.start()
+
+    # -------- BEOLVASÁS --------
+    def submit(self, token) -> bool:
+        with self._lock:
+            if token in self._in_flight:
+                return False
+            self._in_flight.add(token)
+        try:
+            self.scans.put_nowait(token)
+        except queue.Full:
+            with self._lock:
+                self._in_flight.discard(token)
+            self.rejected += 1
+            logger.warning("Sor tele, beolvasás eldobva", token=token)
+            return False
+        self.accepted += 1
+        return True
+
+    # -------- WORKER --------
+    def _work(self):
+        while self._running:
+            token = self.scans.get()
+            if token is None:
+                return
+            with self._lock:
+                self._active += 1
+                self._cancel_idle_prompt()
+            try:
+                self.handler(token, self)
+            except Exception:
+                logger.exception("Hiba a feldolgozás közben", token=token)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(token)
+                    self._active -= 1
+                    self.completed += 1
+                    if self._active == 0:
+                        self._schedule_idle_prompt()
+
+    @contextmanager
+    def lockers(self, locker_ids, timeout=None):
+        """A megadott szekrények kizárólagos lefoglalása a vendég idejére."""
+        wanted = set(locker_ids)
+        with self._lock, tracing.span("locker_wait"):
+            if not self._lock.wait_for(lambda: not (wanted & self._busy_lockers), timeout):
+                raise TimeoutError(f"Szekrények foglaltak: {sorted(wanted & self._busy_lockers)}")
+            self._busy_lockers |= wanted
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._busy_lockers -= wanted
+                self._lock.notify_all()
+
+    # -------- LCD --------
+    def show(self, msg):
+        if self.display:
+            self.display(msg)
+
+    def _schedule_idle_prompt(self):
+        self._cancel_idle_prompt()
+        self._idle_timer = threading.Timer(self.idle_delay, self._idle_prompt)
+        self._idle_timer.daemon = True
+        self._idle_timer.start()
+
+    def _cancel_idle_prompt(self):
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
+
+    def _idle_prompt(self):
+        with self._lock:
+            if self._active:
+                return
+        self.show(IDLE_PROMPT)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": self.scans.qsize(),
+                "active": self._active,
+                "busy_lockers": sorted(self._busy_lockers),
+                "accepted": self.accepted,
+                "rejected": self.rejected,
+                "completed": self.completed,
+            }
+
+    def stop(self):
+        self._running = False
+        self._cancel_idle_prompt()
+        for _ in self._workers:
+            self.scans.put(None)
@@ -0,0 +1,78 @@
+import threading
+from collections import deque
+
+WINDOW = 1024  # kulcsonként ennyi utolsó mérésből számolunk percentilist
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": _ms(percentile(values, 50)),
+        "p95_ms": _ms(percentile(values, 95)),
+        "p99_ms": _ms(percentile(values, 99)),
+        "max_ms": _ms(values[-1] if values else None),
+    }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+class LatencyTracker:
+    """Kulcsonkénti (pl. ajtónkénti) csúszóablakos késleltetés mérés."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+
+    def record(self, key, seconds):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._totals[key] = self._totals.get(key, 0) + 1
+
+    def summary(self, key=None):
+        with self._lock:
+            if key is not None:
+                return summarize(list(self._samples.get(key, ())))
+            snapshot = {k: list(v) for k, v in self._samples.items()}
+            totals = dict(self._totals)
+        result = {}
+        for k, values in snapshot.items():
+            result[k] = summarize(values)
+            result[k]["total"] = totals[k]
+        return result
+
+    def snapshot(self):
+        """Nyers minták (más folyamatnak küldhető): {kulcs: (minták, összes)}."""
+        with self._lock:
+            return {k: (list(v), self._totals[k]) for k, v in self._samples.items()}
+
+
+def merge_snapshots(snapshots):
+    """Több LatencyTracker.snapshot() összevonása kulcsonkénti összesítővé."""
+    merged = {}
+    for snap in snapshots:
+        for key, (values, total) in snap.items():
+            entry = merged.setdefault(key, ([], [0]))
+            entry[0].extend(values)
+            entry[1][0] += total
+    result = {}
+    for key, (values, total) in merged.items():
+        result[key] = summarize(values)
+        result[key]["total"] = total[0]
+    return result
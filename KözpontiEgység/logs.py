@@ -0,0 +1,334 @@
+"""
+Nem blokkoló, strukturált naplózás a központi egység folyamataihoz.
+
+    log = logs.get("checkInOut")
+    log.info("✅ Szekrény nyitva", locker=3)
+    log.warning("⚠️ Arduino nem elérhető", error=e)
+
+A hívó szál csak egy tuple-t tesz egy korlátos sorba; a LogRecord, a
+formázás és a kiírás (stdout -> journald) egy háttérszálon fut, így egy
+lassú stdout fogyasztó nem állítja meg az ajtó auth / soros / kioszk
+szálakat. Teli sornál a rekord eldobódik (számolva). A stdlib logging-gal
+naplózó kód (pl. qrReader képforrásai) egy QueueHandler-en át ugyanide ír.
+
+Korlát csak a logs.limit(üzenet, ...)-tel megjelölt üzeneteken van (pl.
+kívülről áradó hibás kérések): ezekből loggerenként window-onként burst
+darab megy ki, a következő ablak első rekordja suppressed=N mezővel jelzi,
+hány maradt ki. A mezők nem számítanak, ezért eseményt (ajtó auth,
+szekrény nyitás) nem szabad korlátozni; a többi üzenet mind kiíródik.
+
+A modulok az első rekordnál automatikusan beállítják (setup); a szkriptek
+setup(level=...)-lel csendesíthetik, flush()-sal üríthetik a sort.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+import metrics
+
+# -------- CONFIG --------
+LEVEL = "INFO"
+FORMAT = "text"              # "text" vagy "json" (soronként egy JSON objektum)
+QUEUE_SIZE = 10000           # ennyi rekord várhat kiírásra, fölötte eldobjuk
+RATE_WINDOW = 10.0           # másodperc; a limit() alapértékei
+RATE_BURST = 20              # ennyi azonos üzenet mehet ki egy ablakban
+RATE_LIMITS = {}             # üzenet -> (burst, window); csak ezek korlátozottak, lásd limit()
+
+LOG_RECORDS = metrics.counter("hotelflow_log_records_total", "Kiírt napló rekordok", ("level",))
+LOG_DROPPED = metrics.counter("hotelflow_log_dropped_total", "Teli sor miatt eldobott napló rekordok")
+LOG_SUPPRESSED = metrics.counter("hotelflow_log_suppressed_total", "Ismétlődés miatt elnyomott napló rekordok")
+
+_lock = threading.Lock()
+_queue = None                # queue.SimpleQueue: a put C-ben fut, sosem blokkol
+_queue_size = QUEUE_SIZE
+_handler = None
+_writer = None
+
+
+def limit(msg, burst=RATE_BURST, window=RATE_WINDOW):
+    """Korlát egy ismétlődő üzenetre (pl. ismeretlen Arduino sorok); a többi nem korlátozott."""
+    RATE_LIMITS[msg] = (burst, window)
+
+
+# -------- TERMELŐ OLDAL --------
+class RateLimit:
+    MAX_KEYS = 1000
+
+    def __init__(self):
+        self._state = {}     # (logger, üzenet) -> [ablak kezdete, darab, elnyomott]
+        self._lock = threading.Lock()
+
+    def check(self, name, msg, now):
+        """None: eldobandó; különben az előző ablakban elnyomottak száma."""
+        limits = RATE_LIMITS.get(msg) if isinstance(msg, str) else None
+        if limits is None:
+            return 0
+        burst, window = limits
+        key = (name, msg)
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= window:
+                suppressed = state[2] if state is not None else 0
+                if state is None and len(self._state) >= self.MAX_KEYS:
+                    self._state = {k: s for k, s in self._state.items() if now - s[0] < window}
+                self._state[key] = [now, 1, 0]
+                return suppressed
+            state[1] += 1
+            if state[1] <= burst:
+                return 0
+            state[2] += 1
+        LOG_SUPPRESSED.inc()
+        return None
+
+
+_rate = RateLimit()
+
+
+def _put(item):
+    if _queue.qsize() >= _queue_size:
+        LOG_DROPPED.inc()
+        return
+    _queue.put(item)
+
+
+class Log:
+    """Vékony logger: üzenet + kulcs/érték mezők; a hívó szál csak egy tuple-t tesz a sorba."""
+    __slots__ = ("_logger", "name")
+
+    def __init__(self, logger):
+        self._logger = logger
+        self.name = logger.name
+
+    def _emit(self, level, msg, fields, exc_info=None):
+        if _queue is None:
+            setup()
+        if not self._logger.isEnabledFor(level):
+            return
+        now = time.time()
+        suppressed = _rate.check(self.name, msg, now)
+        if suppressed is None:
+            return
+        if suppressed:
+            fields["suppressed"] = suppressed
+        _put((now, level, self.name, msg, fields, exc_info))
+
+    def debug(self, msg, **fields):
+        self._emit(logging.DEBUG, msg, fields)
+
+    def info(self, msg, **fields):
+        self._emit(logging.INFO, msg, fields)
+
+    def warning(self, msg, **fields):
+        self._emit(logging.WARNING, msg, fields)
+
+    def error(self, msg, **fields):
+        self._emit(logging.ERROR, msg, fields)
+
+    def exception(self, msg, **fields):
+        self._emit(logging.ERROR, msg, fields, sys.exc_info())
+
+
+def get(name):
+    return Log(logging.getLogger(name))
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # A nem logs.get()-tel naplózó (stdlib logging) hívók is ugyanabba a sorba írnak
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        suppressed = _rate.check(record.name, record.msg, record.created)
+        if suppressed is None:
+            return
+        if suppressed:
+            record.fields = {"suppressed": suppressed}
+        _put(record)
+
+
+# -------- KIÍRÓ OLDAL --------
+def _value(value):
+    text = str(value)
+    if not text or any(c in text for c in ' ="\n'):
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _record(item):
+    created, level, name, msg, fields, exc_info = item
+    record = logging.LogRecord(name, level, "", 0, msg, None, exc_info)
+    record.created, record.msecs = created, (created - int(created)) * 1000
+    record.fields = fields
+    return record
+
+
+class Formatter(logging.Formatter):
+    def __init__(self, fmt=FORMAT):
+        super().__init__()
+        self.json = fmt == "json"
+
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        message = record.getMessage()
+        if self.json:
+            event = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name,
+                     "msg": message, **{k: v if isinstance(v, (int, float, bool, type(None))) else str(v)
+                                        for k, v in fields.items()}}
+            if record.exc_info:
+                event["exc"] = self.formatException(record.exc_info)
+            return json.dumps(event, ensure_ascii=False)
+        text = f"{self.formatTime(record)} [{record.levelname}] {record.name}: {message}"
+        if fields:
+            text += "".join(f" {k}={_value(v)}" for k, v in fields.items() if v is not None)
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class _Stdout:
+    # A mindenkori sys.stdout (a szkriptek átirányíthatják)
+    def write(self, text):
+        return sys.stdout.write(text)
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+def _write_loop(q, output):
+    while True:
+        item = q.get()
+        if item is None:
+            return
+        if isinstance(item, threading.Event):
+            item.set()  # flush() jelzése
+            continue
+        record = _record(item) if isinstance(item, tuple) else item
+        LOG_RECORDS.inc(record.levelname)
+        try:
+            output.handle(record)
+        except Exception:
+            pass  # a naplózás hibája sosem állíthatja meg a kiírót
+
+
+def setup(level=None, stream=None, fmt=None, queue_size=QUEUE_SIZE):
+    """
+    A gyökér logger (és a logs.get() loggerek) a sorba írnak, a háttérszál
+    `stream`-re (alapból a mindenkori stdout). Többször is hívható: a
+    szintet / kimenetet / formátumot újraállítja.
+    """
+    global _queue, _queue_size, _handler, _writer
+    with _lock:
+        if _writer is not None:
+            _queue.put(None)
+            _writer.join()
+        root = logging.getLogger()
+        if _handler is not None:
+            root.removeHandler(_handler)
+
+        output = logging.StreamHandler(stream or _Stdout())
+        output.setFormatter(Formatter(fmt or FORMAT))
+        _queue, _queue_size = queue.SimpleQueue(), queue_size
+        _handler = _QueueHandler(_queue)
+        root.addHandler(_handler)
+        root.setLevel(level or LEVEL)
+        _writer = threading.Thread(target=_write_loop, args=(_queue, output), name="log-writer", daemon=True)
+        _writer.start()
+    return _handler
+
+
+def flush(timeout=5):
+    """Megvárja, amíg az eddig sorba tett rekordok kiíródnak."""
+    if _writer is not None:
+        done = threading.Event()
+        _queue.put(done)
+        return done.wait(timeout)
+    return True
+
+
+def stop():
+    global _writer
+    with _lock:
+        if _writer is not None:
+            _queue.put(None)
+            _writer.join(timeout=5)
+            _writer = None
+
+
+atexit.register(stop)
+
+
+# -------- MIKRO-BENCHMARK --------
+def _bench(n=20000, read_bytes=4096, read_interval=0.02):
+    """
+    print vs log.info a hívó szál szempontjából (átlag, p99, maximum), gyors
+    kimenetre (/dev/null) és lassú stdout fogyasztóra: egy pipe, amelyből egy
+    szál read_interval-onként read_bytes-ot olvas (mint egy lemaradó journald).
+    """
+    import os
+
+    def slow_pipe():
+        r, w = os.pipe()
+        drain = threading.Event()
+
+        def reader():
+            while os.read(r, read_bytes):
+                if not drain.is_set():
+                    time.sleep(read_interval)
+            os.close(r)
+
+        threading.Thread(target=reader, daemon=True).start()
+        out = open(w, "w", buffering=1)
+        return out, drain
+
+    def run(label, emit):
+        timings = []
+        for i in range(n):
+            start = time.perf_counter()
+            emit(i)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        mean = sum(timings) / n
+        print(f"{label:<34} átlag {mean * 1e6:7.2f} µs  p99 {timings[int(n * 0.99)] * 1e6:8.1f} µs"
+              f"  max {timings[-1] * 1000:7.1f} ms")
+        return mean
+
+    fields = {"card": "B7E5C37A", "door": "101", "result": "OK"}
+    results = {}
+    for sink in ("gyors", "lassú"):
+        for mode in ("print", "log.info"):
+            if sink == "gyors":
+                out, drain = open(os.devnull, "w"), None
+            else:
+                out, drain = slow_pipe()
+            if mode == "print":
+                emit = lambda i: print(f"{fields['card']} -> {fields['door']}: {fields['result']} #{i}", file=out)
+            else:
+                setup(stream=out)
+                log = get("bench")
+                emit = lambda i: log.info("Ajtó auth", n=i, **fields)
+            results[sink, mode] = run(f"{mode} ({sink} kimenet)", emit)
+            if drain is not None:
+                drain.set()
+            flush(timeout=60)
+            out.close()
+
+    print(f"eldobott rekordok (teli sor): {sum(v for _, v in LOG_DROPPED.snapshot())}")
+    limit("Ajtó auth")   # csak a mérés idejére: élesben az események nem korlátozottak
+    setup(stream=open(os.devnull, "w"))
+    log = get("bench")
+    limited = run("log.info (ismétlődő, korlátolt)", lambda i: log.info("Ajtó auth", n=i, **fields))
+    print(f"lassú kimenetnél a hívó szál {results['lassú', 'print'] / results['lassú', 'log.info']:.0f}x "
+          f"gyorsabb; gyors kimenetnél a többletköltség "
+          f"{(results['gyors', 'log.info'] - results['gyors', 'print']) * 1e6:+.1f} µs/esemény "
+          f"(korlátolt ismétlés: {limited * 1e6:.1f} µs)")
+    RATE_LIMITS.pop("Ajtó auth")
+    stop()
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,243 @@
+"""
+Folyamatok közös metrikái Prometheus szöveges formátumban.
+
+Minden modul a saját metrikáit a modul szintjén hozza létre (counter,
+gauge, histogram); a frissítés egy lakat + egy dict művelet, a forró
+útvonalakon is olcsó. A külön folyamatok (validator, kioszk) az
+start_exporter()-rel METRICS_DIR-be írják időnként a pillanatképüket
+(atomikus csere, mint az access.gen), a server.py /metrics végpontja
+ezeket és a saját metrikáit együtt adja ki, service címkével.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# -------- CONFIG --------
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+SNAPSHOT_INTERVAL = 5      # másodperc
+STALE_SECONDS = 60         # ennél régebbi pillanatkép (leállt folyamat) kimarad
+
+# Másodpercben; a door-auth, QR és soros idők mind ebbe a tartományba esnek
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(k), {"counts": list(c), "sum": s, "count": n}]
+                    for k, (c, s, n) in self._values.items()]
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+
+# -------- REGISZTER --------
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name, help, labels, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labels, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"{name} már {metric.type} típussal létezik")
+        return metric
+
+
+def counter(name, help, labels=()):
+    return _get_or_create(Counter, name, help, labels)
+
+
+def gauge(name, help, labels=()):
+    return _get_or_create(Gauge, name, help, labels)
+
+
+def histogram(name, help, labels=(), buckets=DEFAULT_BUCKETS):
+    return _get_or_create(Histogram, name, help, labels, buckets=buckets)
+
+
+# Közös, több modul által használt metrika
+DB_QUERY_SECONDS = histogram("hotelflow_db_query_seconds", "Adatbázis műveletek ideje", ("query",))
+
+
+def snapshot(service):
+    with _registry_lock:
+        metrics = list(_registry.values())
+    return {
+        "service": service,
+        "pid": os.getpid(),
+        "time": time.time(),
+        "metrics": [
+            {
+                "name": m.name, "help": m.help, "type": m.type, "labels": list(m.labels),
+                "buckets": list(getattr(m, "buckets", ())),
+                "samples": m.snapshot(),
+            }
+            for m in metrics
+        ],
+    }
+
+
+# -------- FOLYAMATOK KÖZÖTT --------
+_exporter = None
+
+
+def write_snapshot(service, directory=METRICS_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{service}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot(service), f)
+    os.replace(tmp_path, path)
+
+
+def start_exporter(service, interval=SNAPSHOT_INTERVAL, directory=METRICS_DIR):
+    """Háttérszál, amely a folyamat metrikáit a közös könyvtárba írja."""
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+
+    def loop():
+        while True:
+            try:
+                write_snapshot(service, directory)
+            except OSError as e:
+                import logs  # logs maga is metrikát használ: itt, lustán
+                logs.get("metrics").warning("⚠️ Metrika pillanatkép nem írható", error=e)
+            time.sleep(interval)
+
+    _exporter = threading.Thread(target=loop, name="metrics-exporter", daemon=True)
+    _exporter.start()
+    atexit.register(lambda: write_snapshot(service, directory))
+    return _exporter
+
+
+def load_snapshots(directory=METRICS_DIR, stale=STALE_SECONDS, exclude=None):
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".json")]
+    except FileNotFoundError:
+        return []
+    now = time.time()
+    snapshots = []
+    for name in names:
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snap = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - snap.get("time", 0) > stale or snap.get("service") == exclude:
+            continue
+        snapshots.append(snap)
+    return snapshots
+
+
+# -------- PROMETHEUS SZÖVEG --------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, float) and value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(snapshots):
+    """Több pillanatkép egy Prometheus expozícióba, service címkével."""
+    families = {}
+    for snap in snapshots:
+        for metric in snap["metrics"]:
+            family = families.setdefault(metric["name"], {"meta": metric, "rows": []})
+            family["rows"].append((snap["service"], metric))
+
+    lines = []
+    for name in sorted(families):
+        meta = families[name]["meta"]
+        lines.append(f"# HELP {name} {_escape(meta['help'])}")
+        lines.append(f"# TYPE {name} {meta['type']}")
+        for service, metric in families[name]["rows"]:
+            extra = [("service", service)]
+            for values, value in metric["samples"]:
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_label_text(metric['labels'], values, extra)} {_format_value(value)}")
+                    continue
+                cumulative = 0
+                bounds = [str(b) for b in metric["buckets"]] + ["+Inf"]
+                for bound, count in zip(bounds, value["counts"]):
+                    cumulative += count
+                    labels = _label_text(metric["labels"], values, extra + [("le", bound)])
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _label_text(metric["labels"], values, extra)
+                lines.append(f"{name}_sum{labels} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{labels} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_all(service, directory=METRICS_DIR):
+    """A saját folyamat + a többi szolgáltatás friss pillanatképei."""
+    return render([snapshot(service)] + load_snapshots(directory, exclude=service))
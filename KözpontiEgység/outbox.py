@@ -0,0 +1,226 @@
+import json
+import random
+import threading
+from datetime import datetime
+
+import requests
+
+import logs
+import metrics
+import post
+import schema
+import storage
+
+# -------- CONFIG --------
+BATCH_SIZE = 50
+POLL_INTERVAL = 30       # ennyi időnként nézünk rá a sorra akkor is, ha nem jött jelzés
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+
+# Csak a payload hibája végleges: ezek a failed_requests táblába kerülnek, nem blokkolják
+# a sort. Minden más (401/403 token/eszköz beállítás, 404, 408, 429, 5xx) átmeneti:
+# backoff-fal újrapróbáljuk, a sor mélysége/kora metrikán látszik a hiba
+PERMANENT_FAILURES = {400, 422}
+
+logger = logs.get("outbox")
+
+OUTBOX_DEPTH = metrics.gauge("hotelflow_outbox_depth", "Várakozó kérések a pending_requests sorban")
+OUTBOX_OLDEST = metrics.gauge("hotelflow_outbox_oldest_seconds", "A legrégebbi várakozó kérés kora")
+OUTBOX_RESULTS = metrics.counter("hotelflow_outbox_requests_total", "Outbox küldések eredmény szerint", ("result",))
+
+class BackendUnavailable(Exception):
+    pass
+
+
+# -------- SORBA ÁLLÍTÁS (hot path) --------
+def enqueue(cursor, booking_id, payload):
+    # A hívó tranzakciójában fut, így a státuszváltozással együtt commitolódik.
+    # A created_at-et mi adjuk (helyi idő): a régebbi SQLite fájlok alapértéke UTC
+    cursor.execute(
+        "INSERT INTO pending_requests (booking_id, payload, created_at) VALUES (%s, %s, %s)",
+        (booking_id, json.dumps(payload), datetime.now())
+    )
+
+
+def queue_depth(cursor):
+    """(várakozó kérések száma, a legrégebbi kora másodpercben vagy None)"""
+    cursor.execute(
+        f"SELECT COUNT(*) AS depth, {storage.get_backend().seconds_since('MIN(created_at)')} AS oldest "
+        "FROM pending_requests"
+    )
+    row = cursor.fetchone()
+    return row["depth"], row["oldest"]
+
+
+def _decode_payload(raw):
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8")
+    if isinstance(raw, str):
+        return json.loads(raw)
+    return raw
+
+
+# -------- WORKER --------
+class OutboxWorker(threading.Thread):
+    """
+    Háttérszál, amely a pending_requests sort üríti a backend felé.
+
+    Kötegenként olvas, foglalásonként csak a legutolsó állapotot küldi el
+    (sikeres küldés után a régebbi sorok is törlődnek), keep-alive sessiont
+    használ, hiba esetén exponenciális, jitteres backoff-fal vár.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, poll_interval=POLL_INTERVAL):
+        super().__init__(name="outbox", daemon=True)
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.session = requests.Session()
+
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+
+        self.failures = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+        self.depth = 0
+        self.oldest_age = None
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def backoff_delay(self):
+        # "Full jitter": véletlen várakozás 0 és a plafon között
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * (2 ** self.failures))
+        return random.uniform(0, ceiling)
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                progressed = self.drain_once()
+                self.failures = 0
+            except Exception as e:
+                progressed = False
+                self.failures += 1
+                self.errors += 1
+                OUTBOX_RESULTS.inc("error")
+                self.last_error = str(e)
+                logger.warning("Backend nem elérhető, újrapróbálás később", error=e, failures=self.failures)
+
+            if self.failures:
+                # Backoff alatt az új kérések sem ébresztenek fel, csak a leállítás
+                self._stopped.wait(self.backoff_delay())
+            elif not progressed:
+                self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def drain_once(self):
+        with storage.connection() as conn:
+            cur = conn.cursor()
+            try:
+                with metrics.DB_QUERY_SECONDS.time("outbox.batch"):
+                    # A hotel a foglalásból jön (a hotel tokenjével küldjük)
+                    cur.execute(
+                        "SELECT pr.id, pr.booking_id, pr.payload, b.hotelId "
+                        "FROM pending_requests pr LEFT JOIN bookings b ON b.id = pr.booking_id "
+                        "ORDER BY pr.id ASC LIMIT %s",
+                        (self.batch_size,)
+                    )
+                    rows = cur.fetchall()
+
+                # Foglalásonként a legnagyobb id (legfrissebb állapot) nyer
+                latest = {}
+                for row in rows:
+                    latest[row["booking_id"]] = row
+
+                for booking_id, row in latest.items():
+                    try:
+                        payload = _decode_payload(row["payload"])
+                    except ValueError as e:
+                        logger.error("Hiba a JSON dekódolásánál", id=row["id"], error=e)
+                        self._dead_letter(conn, cur, booking_id, row["id"], None, f"payload: {e}")
+                        self.dropped += 1
+                        OUTBOX_RESULTS.inc("dropped")
+                        continue
+
+                    status = post.put_request_example(payload, booking_id, session=self.session,
+                                                      hotel_id=row["hotelId"])
+                    if 200 <= status < 300:
+                        removed = self._remove(conn, cur, booking_id, row["id"])
+                        self.sent += 1
+                        OUTBOX_RESULTS.inc("sent")
+                        self.coalesced += max(0, removed - 1)
+                        logger.info("Sikeres utólagos szinkronizáció", booking=booking_id)
+                    elif status in PERMANENT_FAILURES:
+                        self._dead_letter(conn, cur, booking_id, row["id"], status, "backend elutasította")
+                        self.dropped += 1
+                        OUTBOX_RESULTS.inc("dropped")
+                        logger.warning("Backend elutasította, kérés a failed_requests-be került",
+                                       booking=booking_id, status=status)
+                    else:
+                        raise BackendUnavailable(f"HTTP {status}")
+
+                self._update_depth(cur)
+                return bool(rows)
+            finally:
+                cur.close()
+
+    def _remove(self, conn, cur, booking_id, up_to_id):
+        removed = cur.execute("DELETE FROM pending_requests WHERE booking_id=%s AND id<=%s", (booking_id, up_to_id))
+        conn.commit()
+        return removed
+
+    def _dead_letter(self, conn, cur, booking_id, up_to_id, status, reason):
+        # Ugyanabban a tranzakcióban áthelyezve: a kérés nem vész el, csak kikerül a sorból
+        cur.execute(
+            "INSERT INTO failed_requests (id, booking_id, payload, created_at, failed_at, status, reason) "
+            "SELECT id, booking_id, payload, created_at, %s, %s, %s FROM pending_requests "
+            "WHERE booking_id=%s AND id<=%s",
+            (datetime.now(), status, reason[:255], booking_id, up_to_id)
+        )
+        return self._remove(conn, cur, booking_id, up_to_id)
+
+    def _update_depth(self, cur):
+        with metrics.DB_QUERY_SECONDS.time("outbox.queue_depth"):
+            self.depth, self.oldest_age = queue_depth(cur)
+        OUTBOX_DEPTH.set(self.depth)
+        OUTBOX_OLDEST.set(self.oldest_age or 0)
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "oldest_age_seconds": self.oldest_age,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+# -------- FOLYAMATSZINTŰ WORKER --------
+_worker = None
+
+
+def start_worker():
+    global _worker
+    try:
+        schema.ensure()
+    except Exception as e:
+        logger.warning("⚠️ Séma migráció sikertelen", error=e)
+    if _worker is None or not _worker.is_alive():
+        _worker = OutboxWorker()
+        _worker.start()
+    return _worker
+
+
+def wake():
+    if _worker is not None:
+        _worker.wake()
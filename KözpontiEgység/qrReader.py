@@ -1,47 +1,348 @@
 # qr_reader.py
-from picamera2 import Picamera2
 from pyzbar import pyzbar
 import time
-import logging
-
-# --- Logging beállítás ---
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s'
-)
-
-logging.info("QR olvasó modul betöltve")
-
-# --- Kamera inicializálás (csak egyszer) ---
-picam2 = Picamera2()
-picam2.configure(
-    picam2.create_preview_configuration(
-        main={"format": "RGB888", "size": (640, 480)}
-    )
-)
-picam2.start()
-time.sleep(2)  # kamera stabilizálása
-logging.info("Kamera inicializálva")
+import threading
+import queue
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import devices
+import logs
+import metrics
+import tracing
+
+logger = logs.get("qrReader")
+
+# --- Pipeline beállítások ---
+FRAME_SIZE = (640, 480)
+RING_SIZE = 4               # ennyi képkockát tartunk, a régieket eldobjuk
+DOWNSCALE = 2               # dekódolás ennyiszer kisebb képen (1 = teljes felbontás)
+MOTION_STEP = 16            # a változásdetektáló bélyegkép ritkítása
+MOTION_THRESHOLD = 4.0      # átlagos pixelkülönbség, ami alatt a kép "változatlan"
+DEBOUNCE_SECONDS = 5.0      # ugyanaz a token ennyi ideig nem jön újra
+
+DECODE_SECONDS = metrics.histogram("hotelflow_qr_decode_seconds", "Egy képkocka QR dekódolási ideje")
+QR_TOKENS = metrics.counter("hotelflow_qr_tokens_total", "Kiadott (debounce utáni) QR tokenek")
+
+
+# --- Képforrások ---
+class Picamera2Source:
+    """A valódi kamera; a Picamera2 csak példányosításkor töltődik be."""
+
+    def __init__(self, size=FRAME_SIZE):
+        from picamera2 import Picamera2
+
+        self.picam2 = Picamera2()
+        self.picam2.configure(
+            self.picam2.create_preview_configuration(
+                main={"format": "RGB888", "size": size}
+            )
+        )
+        self.picam2.start()
+        # Fix várakozás helyett az első képkockáig blokkolunk: onnan a kamera szállít,
+        # az expozíció közben még beáll, de a dekódoló úgyis a következő képeket nézi
+        self.picam2.capture_metadata()
+        logger.info("Kamera inicializálva")
+
+    def capture(self):
+        return self.picam2.capture_array()
+
+    def close(self):
+        self.picam2.stop()
+
+
+class ArraySource:
+    """Memóriában lévő képkockák (benchmarkhoz, teszteléshez)."""
+
+    def __init__(self, frames, fps=None, loop=True):
+        self.frames = list(frames)
+        self.interval = 1.0 / fps if fps else 0.0
+        self.loop = loop
+        self._index = 0
+
+    def capture(self):
+        if self.interval:
+            time.sleep(self.interval)
+        if self._index >= len(self.frames):
+            if not self.loop:
+                return None
+            self._index = 0
+        frame = self.frames[self._index]
+        self._index += 1
+        return frame
+
+    def close(self):
+        pass
+
+
+class FileSource(ArraySource):
+    """Képfájlokból (PNG/JPG) álló forrás; a PIL csak itt kell."""
+
+    def __init__(self, paths, fps=None, loop=True):
+        from PIL import Image
+
+        frames = [np.asarray(Image.open(p).convert("RGB")) for p in paths]
+        super().__init__(frames, fps=fps, loop=loop)
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+def get_source():
+    global _source
+    with _source_lock:
+        if _source is None:
+            _source = Picamera2Source()
+        return _source
+
+
+def set_source(source):
+    global _source
+    with _source_lock:
+        _source = source
+
 
 # --- Callback függvény ---
 def qr_callback(qr_data: str, qr_type: str):
-    logging.info(f"[CALLBACK] QR találat: {qr_type} | Tartalom: {qr_data}")
+    logger.info("QR találat", type=qr_type, data=qr_data)
     # A projekt fő logikája
 
+
+# --- Dekódolás ---
+def prepare(frame, downscale=DOWNSCALE):
+    # Egy csatorna (a pyzbar is ezt tenné) + ritkítás: töredéknyi pixel a dekódernek
+    gray = frame[:, :, 1] if frame.ndim == 3 else frame
+    if downscale > 1:
+        gray = gray[::downscale, ::downscale]
+    return np.ascontiguousarray(gray)
+
+
+def decode_gray(gray):
+    return [(b.data.decode("utf-8"), b.type) for b in pyzbar.decode(gray)]
+
+
 # --- QR olvasó fő függvény ---
 def scan_frame():
     """
     Egyetlen képkocka beolvasása és QR dekódolása.
     Meghívható ciklusban anélkül, hogy újraindítaná a kamerát.
+    Ha fut a háttér pipeline, nem olvas a kamerából, csak visszaadja az
+    azóta dekódolt (debounce-olt) tokeneket.
     """
-    frame = picam2.capture_array()
-    barcodes = pyzbar.decode(frame)
+    if _pipeline is not None:
+        return _pipeline.drain()
+
+    frame = get_source().capture()
     results = []
 
-    for barcode in barcodes:
-        qr_data = barcode.data.decode("utf-8")
-        qr_type = barcode.type
+    with DECODE_SECONDS.time():
+        found = decode_gray(prepare(frame))
+    for qr_data, qr_type in found:
         results.append((qr_data))
         qr_callback(qr_data, qr_type)
-    
+
     return results
+
+
+# --- Háttér pipeline ---
+class ScanPipeline:
+    """
+    Kamera olvasó szál -> korlátos gyűrűpuffer -> dekódoló szál -> token sor.
+
+    A dekódoló mindig a legfrissebb képkockát veszi, a kimaradt régieket
+    eldobja. Ha a kép alig változott az előző dekódolt képhez képest, a
+    dekódolást kihagyja (üres kioszk előtt szinte nincs CPU terhelés).
+    Ugyanazt a tokent DEBOUNCE_SECONDS-on belül csak egyszer adja ki; amíg
+    a QR a kamera előtt van, az ablak folyamatosan frissül.
+    """
+
+    def __init__(self, source=None, ring_size=RING_SIZE, downscale=DOWNSCALE,
+                 motion_threshold=MOTION_THRESHOLD, debounce=DEBOUNCE_SECONDS,
+                 processes=0):
+        self.source = source
+        self.downscale = downscale
+        self.motion_threshold = motion_threshold
+        self.debounce = debounce
+
+        self._ring = deque(maxlen=ring_size)
+        self._frame_ready = threading.Condition()
+        self._tokens = queue.Queue()
+        self._last_seen = {}
+        self._last_thumb = None
+        self._running = False
+        self.error = None            # a kamera hibája, ami leállította a pipeline-t
+        self._pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+
+        self.captured = 0
+        self.dropped = 0
+        self.decoded = 0
+        self.skipped = 0
+        self.debounced = 0
+        self.decode_seconds = 0.0
+
+    def start(self):
+        # source lehet egy devices.Device is: akkor a kamera (újra)nyitását az végzi
+        if self.source is None:
+            self.source = get_source()
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="qr-capture", daemon=True),
+            threading.Thread(target=self._decode_loop, name="qr-decode", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        for t in self._threads:
+            t.join(timeout=2)
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+    def _capture_loop(self):
+        device = self.source if isinstance(self.source, devices.Device) else None
+        while self._running:
+            source = device.get(timeout=0.5) if device is not None else self.source
+            if source is None:
+                continue  # a kamera még nem kész / újracsatlakozik
+            try:
+                frame = source.capture()
+            except Exception as e:
+                if device is not None:
+                    device.failed(e)
+                    continue
+                # Felügyelet nélküli forrást nincs ki újranyisson: leállunk, a dekódoló is kilép
+                logger.exception("Kamera olvasási hiba, a QR pipeline leáll")
+                self.error = str(e)
+                with self._frame_ready:
+                    self._running = False
+                    self._frame_ready.notify_all()
+                return
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            with self._frame_ready:
+                if len(self._ring) == self._ring.maxlen:
+                    self.dropped += 1
+                self._ring.append(frame)
+                self.captured += 1
+                self._frame_ready.notify()
+
+    def _next_frame(self):
+        with self._frame_ready:
+            while self._running and not self._ring:
+                self._frame_ready.wait(0.5)
+            if not self._ring:
+                return None
+            frame = self._ring.pop()
+            self.dropped += len(self._ring)
+            self._ring.clear()
+            return frame
+
+    def _changed(self, gray):
+        # Az utolsó DEKÓDOLT képhez mérünk: egy lassan behozott kártya
+        # képkockánként alig változtat, de összességében átlépi a küszöböt
+        thumb = gray[::MOTION_STEP, ::MOTION_STEP].astype(np.int16)
+        previous = self._last_thumb
+        if previous is None or previous.shape != thumb.shape:
+            return True, thumb
+        return float(np.abs(thumb - previous).mean()) >= self.motion_threshold, thumb
+
+    def _decode_loop(self):
+        while self._running:
+            frame = self._next_frame()
+            if frame is not None:
+                self._process(frame)
+
+    def _process(self, frame):
+        with tracing.trace("qr_decode") as t:
+            with tracing.span("prepare"):
+                gray = prepare(frame, self.downscale)
+                changed, thumb = self._changed(gray)
+            if not changed:
+                self.skipped += 1
+                return []
+
+            start = time.perf_counter()
+            if self._pool:
+                found = self._pool.submit(decode_gray, gray).result()
+            else:
+                found = decode_gray(gray)
+            elapsed = time.perf_counter() - start
+            t.add("decode", elapsed)
+        self.decode_seconds += elapsed
+        DECODE_SECONDS.observe(elapsed)
+        self.decoded += 1
+
+        # Ha van a képen QR, a következő képet akkor is dekódoljuk, ha
+        # nem változott: így frissül a debounce ablak, amíg ott a kód
+        self._last_thumb = None if found else thumb
+
+        now = time.monotonic()
+        for qr_data, qr_type in found:
+            last = self._last_seen.get(qr_data)
+            self._last_seen[qr_data] = now
+            if last is not None and now - last < self.debounce:
+                self.debounced += 1
+                continue
+            qr_callback(qr_data, qr_type)
+            self._tokens.put(qr_data)
+            QR_TOKENS.inc()
+
+        # Régi bejegyzések takarítása, hogy a szótár ne nőjön korlátlanul
+        if len(self._last_seen) > 256:
+            self._last_seen = {k: t for k, t in self._last_seen.items() if now - t < self.debounce}
+        return found
+
+    def drain(self):
+        tokens = []
+        while True:
+            try:
+                tokens.append(self._tokens.get_nowait())
+            except queue.Empty:
+                return tokens
+
+    def get(self, timeout=None):
+        try:
+            return self._tokens.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    @property
+    def running(self):
+        return self._running
+
+    def stats(self):
+        return {
+            "running": self._running,
+            "error": self.error,
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "decoded": self.decoded,
+            "skipped_unchanged": self.skipped,
+            "debounced": self.debounced,
+            "avg_decode_ms": (self.decode_seconds / self.decoded * 1000) if self.decoded else None,
+        }
+
+
+_pipeline = None
+
+
+def start_pipeline(source=None, **kwargs):
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = ScanPipeline(source, **kwargs).start()
+    return _pipeline
+
+
+def stop_pipeline():
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.stop()
+        _pipeline = None
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+# -------- CONFIG --------
+MAX_AGE_MS = 30_000        # ennyivel lehet régebbi a ts az ajtó becsült órájánál
+REBOOT_SLACK_MS = 5_000    # újraindult terminál órájának tűrése
+SEEN_MAX_ENTRIES = 8192
+
+
+class ReplayGuard:
+    """
+    Visszajátszás elleni szűrő a DB lekérdezés előtt.
+
+    A terminál ts-e a millis() (bekapcsolás óta eltelt idő), nem valós idő,
+    ezért ajtónként követjük a legutóbb elfogadott (ts, szerveridő) párt, és
+    ebből becsüljük az ajtó mostani óráját. Elavult, ha a ts ennél
+    MAX_AGE_MS-nál régebbi - kivéve, ha a terminál közben újraindult
+    (a ts nem nagyobb, mint az azóta eltelt idő). Az ablakon belül már
+    látott (kártya, ajtó, ts) hármas visszajátszásnak számít. (Egy régi,
+    újraindulás utáni kis ts-ű üzenet az ablakon túl újraindulásnak
+    látszhat; ezt csak valós idejű ts szüntetné meg a terminálon.)
+
+    Csak érvényes aláírású üzenettel hívjuk, hogy hamis üzenet ne
+    állíthassa el az ajtó óráját. Több folyamatnál (validatorCluster) az
+    ajtónkénti shard mód tartja egy folyamatban egy ajtó állapotát.
+    """
+
+    def __init__(self, max_age_ms=MAX_AGE_MS, reboot_slack_ms=REBOOT_SLACK_MS,
+                 max_entries=SEEN_MAX_ENTRIES, clock=time.monotonic):
+        self.max_age_ms = max_age_ms
+        self.reboot_slack_ms = reboot_slack_ms
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()   # (card, door, ts) -> szerveridő
+        self._doors = {}             # door -> (utolsó ts, szerveridő)
+
+        self.accepted = 0
+        self.stale = 0
+        self.replayed = 0
+        self.reboots = 0
+
+    def check(self, card_id, door_id, ts):
+        """None, ha mehet tovább; különben az elutasítás oka ("stale" / "replay")."""
+        now = self.clock()
+        key = (card_id, door_id, ts)
+        with self._lock:
+            self._expire(now)
+            if key in self._seen:
+                self.replayed += 1
+                return "replay"
+
+            state = self._doors.get(door_id)
+            advance = True
+            if state is not None:
+                last_ts, last_time = state
+                elapsed_ms = (now - last_time) * 1000
+                if ts < last_ts + elapsed_ms - self.max_age_ms:
+                    if ts > elapsed_ms + self.reboot_slack_ms:
+                        self.stale += 1
+                        return "stale"
+                    self.reboots += 1
+                else:
+                    # Ablakon belüli, sorrenden kívül érkező üzenet nem viszi vissza az órát
+                    advance = ts >= last_ts
+
+            self._seen[key] = now
+            if len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+            if advance:
+                self._doors[door_id] = (ts, now)
+            self.accepted += 1
+            return None
+
+    def _expire(self, now):
+        # Az ablakon kívüli hármasokat úgyis a "stale" szabály fogja meg
+        limit = now - self.max_age_ms / 1000
+        seen = self._seen
+        while seen:
+            oldest = next(iter(seen.values()))
+            if oldest >= limit:
+                break
+            seen.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "stale": self.stale,
+                "replayed": self.replayed,
+                "reboots": self.reboots,
+                "window": len(self._seen),
+                "doors": len(self._doors),
+            }
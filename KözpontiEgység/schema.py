@@ -0,0 +1,343 @@
+"""
+A lokális hotelflowLocal séma verziózott migrációi.
+
+A szolgáltatások (server, validator, checkInOut) induláskor egyszer
+meghívják az ensure()-t; a futás közbeni kódban nincs több CREATE TABLE.
+Új változás = új elem a MIGRATIONS végére, a meglévőket nem írjuk át.
+
+    python schema.py            -> migrációk futtatása
+    python schema.py explain    -> a forró lekérdezések EXPLAIN terve
+"""
+import sys
+from datetime import datetime
+import threading
+
+import checkinPlan
+import logs
+import storage
+
+logger = logs.get("schema")
+
+
+def _seed_locker_layout(cursor):
+    cursor.execute("SELECT COUNT(*) AS n FROM locker_layout")
+    if cursor.fetchone()["n"] == 0:
+        for rfid_key, (row, col) in checkinPlan.DEFAULT_LAYOUT.items():
+            checkinPlan.set_locker(cursor, rfid_key, row, col, checkinPlan.DEFAULT_MATRIX_COLS)
+
+
+# (verzió, név, [SQL vagy callable(cursor), ...]); az SQL MySQL nyelvjárású,
+# SQLite-on a storage backend igazítja (AUTO_INCREMENT, CREATE INDEX)
+MIGRATIONS = [
+    (1, "alap táblák", [
+        """
+        CREATE TABLE IF NOT EXISTS bookings (
+            id INT PRIMARY KEY,
+            users_id INT,
+            startDate DATE,
+            endDate DATE,
+            checkInToken VARCHAR(255),
+            checkInstatus VARCHAR(255),
+            checkInTime DATETIME,
+            checkOutTime DATETIME,
+            status VARCHAR(50)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rooms (
+            id INT PRIMARY KEY,
+            name VARCHAR(255)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS relations (
+            booking_id INT,
+            rooms_id INT,
+            PRIMARY KEY (booking_id, rooms_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rfidKeys (
+            id INT PRIMARY KEY,
+            hotels_id INT,
+            isUsed TINYINT(1),
+            rfidKey VARCHAR(50)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS rfidConnections (
+            rfidKey VARCHAR(50) PRIMARY KEY,
+            roomId INT,
+            roomName VARCHAR(255)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sync_state (
+            hotelId INT PRIMARY KEY,
+            syncCursor VARCHAR(32),
+            etag VARCHAR(128),
+            lastSyncAt DATETIME
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS pending_requests (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            booking_id INT,
+            payload JSON,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS locker_layout (
+            rfidKey VARCHAR(50) PRIMARY KEY,
+            matrixRow INT NOT NULL,
+            matrixCol INT NOT NULL,
+            matrixCols INT NOT NULL DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS checkin_plan (
+            checkInToken VARCHAR(255) PRIMARY KEY,
+            booking_id INT NOT NULL,
+            checkInstatus VARCHAR(255),
+            lockerIds VARCHAR(255) NOT NULL DEFAULT ''
+        )
+        """,
+        _seed_locker_layout,
+    ]),
+    (2, "indexek a forró lekérdezésekhez", [
+        # check-in terv újraépítése és a régi token alapú keresés
+        "CREATE INDEX idx_bookings_checkInToken ON bookings (checkInToken)",
+        # ajtó index (validator.load_allowed_pairs) szűrése
+        "CREATE INDEX idx_bookings_checkInstatus ON bookings (checkInstatus)",
+        # ajtó auth: szoba név alapján
+        "CREATE INDEX idx_rooms_name ON rooms (name)",
+        # szoba -> kulcs és szoba -> foglalás join-ok
+        "CREATE INDEX idx_rfidConnections_roomId ON rfidConnections (roomId)",
+        "CREATE INDEX idx_relations_rooms_id ON relations (rooms_id, booking_id)",
+        # checkinPlan.set_status
+        "CREATE INDEX idx_checkin_plan_booking_id ON checkin_plan (booking_id)",
+        # outbox: foglalásonkénti törlés a sikeres küldés után
+        "CREATE INDEX idx_pending_requests_booking_id ON pending_requests (booking_id, id)",
+    ]),
+    (3, "hotel partíciók (hotelId)", [
+        # A korábbi sorok az addig egyetlen (1-es) hotelhez tartoztak
+        "ALTER TABLE bookings ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        "ALTER TABLE rooms ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        "ALTER TABLE relations ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        "ALTER TABLE rfidKeys ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        "ALTER TABLE rfidConnections ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        "ALTER TABLE checkin_plan ADD COLUMN hotelId INT NOT NULL DEFAULT 1",
+        # Hotelenkénti egyeztetés: kulcsok betöltése és törlés a partíción belül
+        "CREATE INDEX idx_bookings_hotelId ON bookings (hotelId, id)",
+        "CREATE INDEX idx_rooms_hotelId ON rooms (hotelId, id)",
+        "CREATE INDEX idx_relations_hotelId ON relations (hotelId)",
+        "CREATE INDEX idx_rfidKeys_hotelId ON rfidKeys (hotelId, id)",
+        "CREATE INDEX idx_rfidConnections_hotelId ON rfidConnections (hotelId)",
+        "CREATE INDEX idx_checkin_plan_hotelId ON checkin_plan (hotelId)",
+    ]),
+    (4, "sor ujjlenyomatok és szekció lenyomatok", [
+        # bulkApply.TableStream: csak az eltérő ujjlenyomatú sorok íródnak ki
+        "ALTER TABLE bookings ADD COLUMN rowHash BIGINT",
+        "ALTER TABLE rooms ADD COLUMN rowHash BIGINT",
+        "ALTER TABLE relations ADD COLUMN rowHash BIGINT",
+        "ALTER TABLE rfidKeys ADD COLUMN rowHash BIGINT",
+        "ALTER TABLE rfidConnections ADD COLUMN rowHash BIGINT",
+        # Hotelenként és táblánként az utoljára alkalmazott szekció lenyomata
+        """
+        CREATE TABLE IF NOT EXISTS sync_digests (
+            hotelId INT NOT NULL,
+            section VARCHAR(64) NOT NULL,
+            digest VARCHAR(80),
+            PRIMARY KEY (hotelId, section)
+        )
+        """,
+    ]),
+    (5, "audit napló", [
+        # audit.py: ajtó auth döntések és check-in/out műveletek, csak hozzáfűzés
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ts DATETIME(3) NOT NULL,
+            kind VARCHAR(16) NOT NULL,
+            hotelId INT,
+            cardId VARCHAR(50),
+            door VARCHAR(255),
+            bookingId INT,
+            result VARCHAR(32),
+            latencyMs DOUBLE,
+            detail VARCHAR(255),
+            uploaded TINYINT(1) NOT NULL DEFAULT 0
+        )
+        """,
+        # audit.AuditUploader: a még fel nem töltött sorok sorrendben
+        "CREATE INDEX idx_audit_log_uploaded ON audit_log (uploaded, id)",
+    ]),
+    (6, "outbox: elutasított kérések", [
+        # outbox.py: a backend által véglegesen elutasított (400/422) vagy nem
+        # dekódolható kérések ide kerülnek törlés helyett, kézi átnézésre
+        """
+        CREATE TABLE IF NOT EXISTS failed_requests (
+            id INT PRIMARY KEY,
+            booking_id INT,
+            payload JSON,
+            created_at TIMESTAMP NULL,
+            failed_at TIMESTAMP NULL,
+            status INT,
+            reason VARCHAR(255)
+        )
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# -------- FUTTATÓ --------
+def _applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255),
+            appliedAt DATETIME
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row["version"] for row in cursor.fetchall()}
+
+
+def _run_step(backend, cursor, step):
+    if callable(step):
+        step(cursor)
+        return
+    try:
+        cursor.execute(backend.ddl(step))
+    except storage.DB_ERRORS as e:
+        # Egy félbeszakadt migráció újrafuttatásakor a már létező index/oszlop nem hiba
+        if not backend.is_duplicate_ddl(e):
+            raise
+
+
+def migrate(conn):
+    """
+    A hiányzó migrációk lefuttatása sorrendben. A backend zárja (MySQL named
+    lock / SQLite IMMEDIATE tranzakció) védi, így a párhuzamosan induló
+    szolgáltatások nem futtatják kétszer. Visszatér a most alkalmazott verziókkal.
+    """
+    backend = storage.get_backend()
+    cursor = conn.cursor()
+    try:
+        pending = [m for m in MIGRATIONS if m[0] not in _applied_versions(cursor)]
+        conn.commit()
+        done = []
+        for version, name, steps in pending:
+            with backend.migration_lock(cursor):
+                # A zár alatt újra megnézzük: egy másik folyamat közben lefuttathatta
+                if version in _applied_versions(cursor):
+                    conn.commit()
+                    continue
+                logger.info("🛠️ Migráció", version=version, name=name)
+                for step in steps:
+                    _run_step(backend, cursor, step)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, appliedAt) VALUES (%s, %s, %s)",
+                    (version, name, datetime.now())
+                )
+                conn.commit()
+                done.append(version)
+        return done
+    finally:
+        cursor.close()
+
+
+_ensured = False
+_ensure_lock = threading.Lock()
+
+
+def ensure():
+    """Folyamatonként egyszer: a séma a legfrissebb verzión van."""
+    global _ensured
+    with _ensure_lock:
+        if _ensured:
+            return
+        with storage.connection() as conn:
+            migrate(conn)
+        _ensured = True
+
+
+# -------- EXPLAIN ELLENŐRZÉS --------
+# A forró lekérdezések mintaparaméterekkel; egyik sem mehet teljes táblaolvasással.
+# Néhány soros táblán az optimalizáló indexszel együtt is választhat teljes
+# olvasást, ezért valós méretű adaton érdemes futtatni.
+HOT_QUERIES = {
+    "checkin_plan.lookup": (
+        "SELECT booking_id, checkInstatus, lockerIds FROM checkin_plan WHERE checkInToken=%s AND hotelId=%s",
+        ("token", 1)
+    ),
+    "checkin_plan.set_status": (
+        "SELECT 1 FROM checkin_plan WHERE booking_id=%s",
+        (1,)
+    ),
+    "bookings.checkInToken": (
+        "SELECT id FROM bookings WHERE checkInToken=%s",
+        ("token",)
+    ),
+    "auth.access": (
+        """
+        SELECT b.id
+        FROM rfidConnections rc
+        JOIN rooms ro ON ro.id = rc.roomId AND ro.hotelId = rc.hotelId
+        JOIN relations r ON r.rooms_id = rc.roomId
+        JOIN bookings b ON b.id = r.booking_id AND b.hotelId = rc.hotelId
+        WHERE rc.rfidKey = %s
+          AND ro.name = %s
+          AND b.checkInstatus = 'checkedIn'
+          AND rc.hotelId = %s
+        LIMIT 1
+        """,
+        ("B7E5C37A", "101", 1)
+    ),
+    "sync.partition_keys": (
+        "SELECT id, rowHash FROM bookings WHERE hotelId=%s",
+        (1,)
+    ),
+    "audit.upload_batch": (
+        "SELECT id FROM audit_log WHERE uploaded=0 ORDER BY id LIMIT %s",
+        (500,)
+    ),
+    "outbox.delete": (
+        "SELECT id FROM pending_requests WHERE booking_id=%s AND id<=%s",
+        (1, 1)
+    ),
+}
+
+
+def explain(cursor, sql, args=()):
+    """[(tábla, hozzáférés, index, teljes olvasás?), ...] az aktuális backenden."""
+    return storage.get_backend().explain(cursor, sql, args)
+
+
+def full_scans(cursor, queries=HOT_QUERIES):
+    """{lekérdezés: [teljes táblaolvasást végző táblák]} - üres, ha minden indexelt."""
+    result = {}
+    for name, (sql, args) in queries.items():
+        tables = [table for table, _, _, full in explain(cursor, sql, args) if full]
+        if tables:
+            result[name] = tables
+    return result
+
+
+if __name__ == "__main__":
+    ensure()
+    if len(sys.argv) > 1 and sys.argv[1] == "explain":
+        with storage.connection() as conn:
+            cur = conn.cursor()
+            for name, (sql, args) in HOT_QUERIES.items():
+                for table, access, index, _ in explain(cur, sql, args):
+                    print(f"{name:<26} {table:<16} type={access:<6} key={index}")
+            scans = full_scans(cur)
+            cur.close()
+        if scans:
+            print("⚠️ Teljes táblaolvasás:", scans)
+            sys.exit(1)
+        print("✅ Minden forró lekérdezés indexet használ")
@@ -0,0 +1,288 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import logs
+import metrics
+
+# Arduino soros protokoll (HarwerCodes/BoxController):
+#   -> OPEN;n        <- OPENED;n  (vagy ERROR;INVALID_ID), később STATE;CLOSED;n
+#   -> DISPLAY;msg   <- DISPLAY_OK
+#   -> CLEAR         <- DISPLAY_OK
+#   -> STATE         <- STATE;OPEN | STATE;CLOSED | STATE;UNKNOWN
+# A parancsok "#<sorszám>;" előtagot kapnak, a firmware ugyanezzel válaszol
+# (pl. #17;DISPLAY_OK), így egy elveszett vagy késve érkező nyugta sem
+# csúsztatja el a többit. Előtag nélküli válasz (régi firmware) küldési
+# sorrendben a legrégebbi megfelelő várakozóhoz kerül.
+
+ACK_EXPIRY = 120.0  # ennyi után egy meg nem válaszolt parancs várakozója elengedhető
+
+logger = logs.get("serialLink")
+# A kóbor / zajos sorok ne árasszák el a naplót
+logs.limit("Ismeretlen Arduino üzenet", burst=5, window=60)
+
+ROUND_TRIP_SECONDS = metrics.histogram(
+    "hotelflow_serial_round_trip_seconds", "Soros parancs elküldésétől a nyugtáig", ("command",)
+)
+
+
+class SerialLink:
+    """
+    Egyetlen olvasó szál az Arduino kapcsolatra.
+
+    Minden beérkező sort egy helyen értelmez és a rá váró Future-nek ad át,
+    a parancsokat egy írási sor küldi ki. A szekrény visszazárására váró
+    Future már az OPEN elküldésekor létrejön, így egy korán érkező
+    STATE;CLOSED;n sem veszhet el.
+    """
+
+    def __init__(self, ser, on_unsolicited=None, on_error=None):
+        self.ser = ser
+        self.on_unsolicited = on_unsolicited or (lambda line: logger.info("Ismeretlen Arduino üzenet", line=line))
+        self.on_error = on_error  # on_error(hiba): a kapcsolat megszakadt (devices.Device.failed)
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pending = OrderedDict()   # sorszám -> (parancs, locker_id, küldés ideje, Future), küldési sorrendben
+        self._closed = {}               # locker_id -> Future
+        self._writes = queue.Queue()
+        self._running = True
+        self.error = None
+
+        self._reader = threading.Thread(target=self._read_loop, name="serial-reader", daemon=True)
+        self._writer = threading.Thread(target=self._write_loop, name="serial-writer", daemon=True)
+        self._reader.start()
+        self._writer.start()
+
+    @property
+    def alive(self):
+        return self._running and self.error is None
+
+    # -------- SZÁLAK --------
+    def _read_loop(self):
+        while self._running:
+            try:
+                raw = self.ser.readline()
+            except Exception as e:
+                self._fail(e)
+                return
+            if not raw:
+                continue  # olvasási timeout
+            line = raw.decode(errors="replace").strip()
+            if line:
+                self._dispatch(line)
+
+    def _write_loop(self):
+        while True:
+            data = self._writes.get()
+            if data is None:
+                return
+            try:
+                self.ser.write(data)
+            except Exception as e:
+                self._fail(e)
+                return
+
+    def _fail(self, error):
+        # A kapcsolat megszakadt: minden várakozó azonnal hibát kap
+        self.error = error
+        self._running = False
+        with self._lock:
+            futures = [entry[3] for entry in self._pending.values()] + list(self._closed.values())
+            self._pending.clear()
+            self._closed.clear()
+        for f in futures:
+            if not f.done():
+                f.set_exception(ConnectionError(f"Soros kapcsolat megszakadt: {error}"))
+        self._writes.put(None)
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def _dispatch(self, line):
+        seq = None
+        if line.startswith("#"):
+            tag, _, rest = line.partition(";")
+            if tag[1:].isdigit():
+                seq, line = int(tag[1:]), rest
+        parts = line.split(";")
+        command, locker_id, result = None, None, True
+        if parts[0] == "OPENED" and len(parts) == 2 and parts[1].isdigit():
+            command, locker_id = "OPEN", int(parts[1])
+        elif parts[0] == "ERROR":
+            command, result = "OPEN", False
+        elif line == "DISPLAY_OK":
+            command = "DISPLAY"
+        elif parts[0] == "STATE" and len(parts) == 2:
+            command, result = "STATE", parts[1]
+
+        future = None
+        with self._lock:
+            if parts[0] == "STATE" and len(parts) == 3 and parts[1] == "CLOSED" and parts[2].isdigit():
+                future = self._closed.pop(int(parts[2]), None)
+            elif command is not None:
+                matched = self._match(seq, command, locker_id)
+                if matched is not None:
+                    _, opened_locker, _, future = self._pending.pop(matched)
+                    if result is False:
+                        self._closed.pop(opened_locker, None)
+
+        if future is not None:
+            if not future.done():
+                future.set_result(result)
+        elif command is not None and seq is not None:
+            # Már elengedett várakozó (időtúllépés) késő nyugtája
+            logger.debug("Késő Arduino nyugta eldobva", line=line, seq=seq)
+        else:
+            self.on_unsolicited(line)
+
+    def _match(self, seq, command, locker_id):
+        # Csak a lock alatt. Előtaggal pontos párosítás (a már elengedett
+        # várakozó késő nyugtája nem kerül máshoz); előtag nélkül a
+        # legrégebbi elküldött megfelelő parancs kapja.
+        if seq is not None:
+            entry = self._pending.get(seq)
+            return seq if entry is not None and entry[0] == command else None
+        for pending_seq, (pending_command, pending_locker, _, _) in self._pending.items():
+            if pending_command == command and (locker_id is None or pending_locker == locker_id):
+                return pending_seq
+        return None
+
+    # -------- ALACSONY SZINT --------
+    def send(self, command):
+        if not self.alive:
+            raise ConnectionError(f"Soros kapcsolat nem él: {self.error}")
+        self._writes.put(f"{command}\n".encode())
+
+    @staticmethod
+    def wait(future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            return False
+        except ConnectionError as e:
+            logger.warning("⚠️ Soros várakozás megszakadt", error=e)
+            return False
+
+    @staticmethod
+    def _timed(future, command):
+        # A nyugta az olvasó szálon érkezik: ott mérjük, a hívó várakozásától függetlenül
+        start = time.perf_counter()
+
+        def done(f):
+            if not f.cancelled() and f.exception() is None:
+                ROUND_TRIP_SECONDS.observe(time.perf_counter() - start, command)
+
+        future.add_done_callback(done)
+        return future
+
+    def _request(self, command, line, locker_id=None, closed=None):
+        # Sorszámozott parancs; (sorszám, nyugta Future)
+        future = self._timed(Future(), command)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = (command, locker_id, now, future)
+            if closed is not None:
+                self._closed[locker_id] = closed
+        try:
+            self.send(f"#{seq};{line}")
+        except ConnectionError:
+            self._release(seq)
+            raise
+        return seq, future
+
+    def _expire(self, now):
+        # Csak a lock alatt. A soha meg nem válaszolt parancs (pl. egy
+        # display_async a bootloader alatt) ne maradjon örökre a várakozók között
+        while self._pending:
+            seq, (_, _, sent, future) = next(iter(self._pending.items()))
+            if now - sent <= ACK_EXPIRY:
+                break
+            del self._pending[seq]
+            if not future.done():
+                future.set_result(False)
+
+    def _release(self, seq):
+        # A hívó feladta a várakozást: a későn érkező nyugta már senkié
+        with self._lock:
+            self._pending.pop(seq, None)
+
+    # -------- PROTOKOLL --------
+    def _open(self, locker_id):
+        closed = Future()
+        seq, opened = self._request("OPEN", f"OPEN;{locker_id}", locker_id, closed)
+        return seq, opened, closed
+
+    def open_locker_async(self, locker_id: int):
+        """OPEN;n elküldése; (opened, closed) Future párt ad vissza."""
+        _, opened, closed = self._open(locker_id)
+        return opened, closed
+
+    def open_locker(self, locker_id: int, timeout=30) -> bool:
+        seq, opened, closed = self._open(locker_id)
+        ok = self.wait(opened, timeout)
+        if not ok:
+            self._release(seq)
+            with self._lock:
+                if self._closed.get(locker_id) is closed:
+                    del self._closed[locker_id]
+        return ok
+
+    def closed_future(self, locker_id: int):
+        with self._lock:
+            future = self._closed.get(locker_id)
+            if future is None:
+                future = self._closed[locker_id] = Future()
+            return future
+
+    def wait_for_locker_closed(self, locker_id: int, timeout=60) -> bool:
+        future = self.closed_future(locker_id)
+        ok = self.wait(future, timeout)
+        if not ok:
+            with self._lock:
+                if self._closed.get(locker_id) is future:
+                    del self._closed[locker_id]
+        return ok
+
+    def display_async(self, msg):
+        return self._request("DISPLAY", f"DISPLAY;{msg}")[1]
+
+    def display(self, msg, timeout=5) -> bool:
+        seq, future = self._request("DISPLAY", f"DISPLAY;{msg}")
+        ok = self.wait(future, timeout)
+        if not ok:
+            self._release(seq)
+        return ok
+
+    def wait_ready(self, timeout=5, interval=0.2):
+        """
+        Megnyitáskor az Arduino újraindul (DTR), a bootloader alatt küldött
+        parancsok elvesznek: STATE-tel pingelünk, amíg az első válasz meg nem jön.
+        """
+        deadline = time.monotonic() + timeout
+        while self.alive and time.monotonic() < deadline:
+            if self.query_state(timeout=min(interval, max(0, deadline - time.monotonic()))) is not None:
+                return True
+        return False
+
+    def query_state(self, timeout=2):
+        seq, future = self._request("STATE", "STATE")
+        state = self.wait(future, timeout)
+        if state is False:
+            self._release(seq)
+            return None
+        return state
+
+    def close(self):
+        self.on_error = None  # szándékos lezárás, nem hiba
+        self._running = False
+        self._writes.put(None)
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+        self._reader.join(timeout=2)
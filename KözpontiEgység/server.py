@@ -1,10 +1,106 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 import DbFetcher
+import audit
+import logs
+import metrics
+import schema
+import tracing
+from syncJobs import SyncCoordinator
+from syncScheduler import SyncScheduler
 
+logger = logs.get("server")
 app = FastAPI()
+sync_jobs = SyncCoordinator(DbFetcher.sync)
+scheduler = SyncScheduler(sync_jobs)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # A /debug végpontok szándékosan lassúak, nem kerülnek a lassú naplóba
+    if request.url.path.startswith("/debug/"):
+        return await call_next(request)
+    with tracing.trace("http", method=request.method, path=request.url.path) as t:
+        response = await call_next(request)
+        t.fields["status"] = response.status_code
+        return response
+
+@app.on_event("startup")
+async def migrate_schema():
+    # A lokális séma egyszer, induláskor kerül a legfrissebb verzióra
+    try:
+        await asyncio.to_thread(schema.ensure)
+    except Exception as e:
+        logger.warning("⚠️ Séma migráció sikertelen", error=e)
+
+@app.on_event("startup")
+async def start_scheduler():
+    try:
+        last = await asyncio.to_thread(DbFetcher.last_sync_at)
+        if last is not None:
+            scheduler.set_last_success(last.timestamp())
+    except Exception as e:
+        logger.warning("⚠️ Utolsó szinkron ideje nem olvasható", error=e)
+    scheduler.start()
+
+@app.on_event("startup")
+async def start_audit_upload():
+    # A validator és a kioszk naplóját egyetlen folyamat tölti fel (ez)
+    if audit.UPLOAD_ENABLED:
+        audit.start_uploader()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    await scheduler.stop()
 
 @app.get("/1")
-async def root():
-    print("Végpont elérve: /1")
-    await DbFetcher.fetchDb()
-    return {"status": "ok", "message": "asd"}
+async def root(full: bool = False, wait: bool = False):
+    # ?full=1 -> teljes újraszinkron a delta helyett
+    # ?wait=1 -> a válasz megvárja a szinkron végét
+    # A backend push jelzése: azonnali szinkron, az időzítő innen számol újra
+    logger.info("Végpont elérve", path="/1", full=full, wait=wait)
+    job = scheduler.push(force=full)
+    if wait:
+        try:
+            await job.future
+        except Exception:
+            pass
+        return {"status": "ok" if job.status == "done" else "error", "message": "asd", "job": job.as_dict()}
+    return {"status": "ok", "message": "asd", "job": job.id}
+
+@app.get("/sync/status")
+async def sync_freshness():
+    # Utolsó sikeres szinkron, elavultság, következő időzített kör
+    return scheduler.status()
+
+@app.get("/sync/{job_id}")
+async def sync_status(job_id: str):
+    job = sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ismeretlen job")
+    return job.as_dict()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # A szerver saját metrikái + a validator/kioszk folyamatok pillanatképei
+    text = await asyncio.to_thread(metrics.render_all, "server")
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+@app.get("/debug/profile", response_class=PlainTextResponse)
+async def debug_profile(seconds: float = 10, service: str = "server", interval_ms: float = 10):
+    # Mintavételező profil `seconds` ideig, összevont stack formátumban (flamegraph.pl, speedscope).
+    # service: server (ez a folyamat), vagy a validator/kioszk metrics neve (pl. validator-w0)
+    seconds = min(max(seconds, 0.1), tracing.PROFILE_MAX_SECONDS)
+    interval = max(interval_ms, 1) / 1000
+    if service == "server":
+        text = tracing.collapsed(await asyncio.to_thread(tracing.sample, seconds, interval))
+    else:
+        text = await asyncio.to_thread(tracing.request_profile, service, seconds, interval)
+        if text is None:
+            raise HTTPException(status_code=504, detail=f"A(z) {service} folyamat nem válaszolt")
+    return PlainTextResponse(text)
+
+@app.get("/debug/slow")
+async def debug_slow(limit: int = 50, service: str = None):
+    # A küszöb fölötti kérések szakaszbontással, minden folyamatból (tracing.SLOW_THRESHOLDS)
+    return await asyncio.to_thread(tracing.slow_events, min(max(limit, 1), 1000), service)
@@ -0,0 +1,177 @@
+import datetime
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+# -------- CONFIG --------
+BUSY_TIMEOUT = 5.0         # másodperc; ennyit vár, ha egy másik folyamat ír
+CACHED_STATEMENTS = 256    # előkészített utasítások kapcsolatonként
+
+# A pymysql-hez hasonló értékek: DATETIME -> datetime, DATE -> date; a
+# DATETIME(3) oszlopok (audit_log.ts) miatt a milliszekundum is megmarad
+sqlite3.register_adapter(datetime.datetime,
+                         lambda v: v.isoformat(" ", timespec="milliseconds" if v.microsecond else "seconds"))
+sqlite3.register_adapter(datetime.date, lambda v: v.isoformat())
+
+
+def _to_datetime(raw):
+    text = raw.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _to_date(raw):
+    text = raw.decode()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+sqlite3.register_converter("DATETIME", _to_datetime)
+sqlite3.register_converter("TIMESTAMP", _to_datetime)
+sqlite3.register_converter("DATE", _to_date)
+
+_PARAM = re.compile(r"%(s|%)")
+
+
+@lru_cache(maxsize=512)
+def translate(sql):
+    """pymysql stílusú %s paraméterek -> SQLite ? (a %% literál %)."""
+    return _PARAM.sub(lambda m: "?" if m.group(1) == "s" else "%", sql)
+
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+class SQLiteCursor:
+    """A pymysql DictCursor felülete: %s paraméterek, dict sorok, execute() -> érintett sorok."""
+
+    def __init__(self, conn):
+        self._cur = conn.cursor()
+
+    def execute(self, sql, args=None):
+        # Mint a pymysql-nél: paraméterek nélkül a % nem speciális
+        if args is None:
+            self._cur.execute(sql)
+        else:
+            self._cur.execute(translate(sql), tuple(args))
+        return max(self._cur.rowcount, 0)
+
+    def executemany(self, sql, seq_of_args):
+        self._cur.executemany(translate(sql), [tuple(a) for a in seq_of_args])
+        return max(self._cur.rowcount, 0)
+
+    def fetchone(self):
+        return self._cur.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cur.fetchmany(size or self._cur.arraysize)
+
+    def fetchall(self):
+        return self._cur.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def close(self):
+        self._cur.close()
+
+
+class SQLiteConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(
+            path,
+            timeout=BUSY_TIMEOUT,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=CACHED_STATEMENTS,
+            check_same_thread=False,
+        )
+        self._conn.row_factory = _dict_row
+        # WAL: az olvasók (validator, kioszk) nem várnak a szinkron írására
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # A régi, MySQL-re írt lekérdezések kedvéért
+        self._conn.create_function(
+            "NOW", 0, lambda: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+
+    def cursor(self, *args):
+        return SQLiteCursor(self._conn)
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+
+class SQLiteStore:
+    """
+    Beágyazott SQLite adatbázis szálankénti kapcsolattal.
+
+    A kapcsolat a szálhoz kötött és újrahasznosul, így egy lekérdezés
+    folyamaton belüli függvényhívás. A dbPool-hoz hasonlóan a blokk végén
+    a nyitva maradt tranzakciót visszagörgeti; egymásba ágyazott
+    connection() hívás ugyanazt a kapcsolatot kapja.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _conn(self):
+        state = self._local
+        if getattr(state, "conn", None) is None:
+            state.conn = SQLiteConnection(self.path)
+            state.depth = 0
+            with self._lock:
+                self.opened += 1
+        return state
+
+    @contextmanager
+    def connection(self):
+        state = self._conn()
+        state.depth += 1
+        try:
+            yield state.conn
+        finally:
+            state.depth -= 1
+            if state.depth == 0 and state.conn.in_transaction:
+                state.conn.rollback()
+
+    def close(self):
+        # Csak a hívó szál kapcsolatát zárja; a többit a szálak vége felszabadítja
+        state = self._local
+        if getattr(state, "conn", None) is not None:
+            state.conn.close()
+            state.conn = None
+
+    def stats(self):
+        return {"path": self.path, "opened": self.opened}
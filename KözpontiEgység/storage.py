@@ -0,0 +1,198 @@
+"""
+Tárolási réteg a központi egység szolgáltatásainak (DbFetcher, checkInOut,
+outbox/post, validator, schema).
+
+A backend a BACKEND beállítással választható:
+  - "mysql":  a pymysql kapcsolat pool (dbPool.py), külön MySQL szerverrel
+  - "sqlite": beágyazott SQLite fájl (sqliteStore.py), WAL módban; a
+              lekérdezések folyamaton belüli hívások, nincs szerver
+Mindkettő ugyanazt a kapcsolat/cursor felületet adja (%s paraméterek, dict
+sorok, execute() -> érintett sorok száma); ahol a két SQL nyelvjárás
+eltér, a lenti dialektus függvények adják a megfelelő SQL-t.
+
+Időalap: mindkét backenden helyi idő (mint a MySQL NOW()); az SQLite saját
+'now'-ja UTC, ezért ott mindenhol 'localtime' módosítóval számolunk.
+A közös ellenőrzés a tests/test_storage.py-ban fut mindkét backenden.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+try:
+    import pymysql
+except ImportError:   # SQLite backendhez nem kell
+    pymysql = None
+
+# -------- CONFIG --------
+BACKEND = "mysql"
+SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hotelflowLocal.db")
+
+# Bármelyik backend hibája (a hívók ezt kapják el a pymysql.MySQLError helyett)
+DB_ERRORS = (sqlite3.Error,) + ((pymysql.MySQLError,) if pymysql else ())
+
+
+def _columns(columns):
+    return ", ".join(f"`{c}`" for c in columns)
+
+
+class MySQLBackend:
+    name = "mysql"
+    insert_ignore = "INSERT IGNORE"
+
+    # Ezeket egy félbeszakadt migráció újrafuttatásakor eltűrjük
+    # (1060: létező oszlop, 1061: létező index)
+    DUPLICATE_DDL_ERRORS = {1060, 1061}
+    LOCK_NAME = "hotelflowLocal_schema"
+    LOCK_TIMEOUT = 30
+
+    def __init__(self):
+        import dbPool
+        self._pool = dbPool
+
+    def connection(self):
+        return self._pool.connection()
+
+    def stats(self):
+        return self._pool.get_pool().stats()
+
+    # -------- DIALEKTUS --------
+    def upsert_sql(self, table, columns, key_columns, rows=1):
+        row_sql = "(" + ", ".join("%s" for _ in columns) + ")"
+        updates = ", ".join(f"`{c}`=VALUES(`{c}`)" for c in columns if c not in key_columns)
+        if not updates:
+            # Csak kulcsból álló tábla (pl. relations): nincs mit frissíteni
+            updates = ", ".join(f"`{c}`=`{c}`" for c in key_columns)
+        return (f"INSERT INTO {table} ({_columns(columns)}) VALUES "
+                + ", ".join([row_sql] * rows)
+                + f" ON DUPLICATE KEY UPDATE {updates}")
+
+    def updated_rows(self, affected, inserted):
+        # Affected rows: beszúrás 1, tényleges módosítás 2, változatlan sor 0
+        return max(0, (affected - inserted) // 2)
+
+    def group_concat(self, expr, order_by):
+        return f"GROUP_CONCAT({expr} ORDER BY {order_by} SEPARATOR ',')"
+
+    def seconds_since(self, column):
+        return f"TIMESTAMPDIFF(SECOND, {column}, NOW())"
+
+    def ddl(self, sql):
+        return sql
+
+    def is_duplicate_ddl(self, error):
+        return bool(pymysql and isinstance(error, pymysql.MySQLError)
+                    and error.args and error.args[0] in self.DUPLICATE_DDL_ERRORS)
+
+    @contextmanager
+    def migration_lock(self, cursor):
+        # Named lock: a párhuzamosan induló szolgáltatások nem migrálnak egyszerre
+        cursor.execute("SELECT GET_LOCK(%s, %s) AS ok", (self.LOCK_NAME, self.LOCK_TIMEOUT))
+        if not cursor.fetchone()["ok"]:
+            raise pymysql.OperationalError(f"Séma zár nem szerezhető meg ({self.LOCK_NAME})")
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (self.LOCK_NAME,))
+
+    def explain(self, cursor, sql, args=()):
+        """[(tábla, hozzáférés, index, teljes olvasás?), ...]"""
+        cursor.execute("EXPLAIN " + sql, args)
+        return [(row["table"], row["type"], row["key"], row["type"] == "ALL")
+                for row in cursor.fetchall()]
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    insert_ignore = "INSERT OR IGNORE"
+
+    def __init__(self, path=None):
+        from sqliteStore import SQLiteStore
+        self.path = path or SQLITE_PATH
+        self._store = SQLiteStore(self.path)
+
+    def connection(self):
+        return self._store.connection()
+
+    def stats(self):
+        return self._store.stats()
+
+    # -------- DIALEKTUS --------
+    def upsert_sql(self, table, columns, key_columns, rows=1):
+        row_sql = "(" + ", ".join("%s" for _ in columns) + ")"
+        values = [c for c in columns if c not in key_columns]
+        if values:
+            # A WHERE miatt a változatlan sor nem számít módosításnak (mint MySQL-nél)
+            action = ("DO UPDATE SET " + ", ".join(f"`{c}`=excluded.`{c}`" for c in values)
+                      + " WHERE " + " OR ".join(f"`{c}` IS NOT excluded.`{c}`" for c in values))
+        else:
+            action = "DO NOTHING"
+        return (f"INSERT INTO {table} ({_columns(columns)}) VALUES "
+                + ", ".join([row_sql] * rows)
+                + f" ON CONFLICT ({_columns(key_columns)}) {action}")
+
+    def updated_rows(self, affected, inserted):
+        return max(0, affected - inserted)
+
+    def group_concat(self, expr, order_by):
+        # SQLite 3.44 előtt nincs ORDER BY az aggregátumban; a sorrend itt
+        # nem garantált (a szekrények úgyis párhuzamosan nyílnak)
+        return f"group_concat({expr}, ',')"
+
+    def seconds_since(self, column):
+        return f"CAST((julianday('now', 'localtime') - julianday({column})) * 86400 AS INTEGER)"
+
+    def ddl(self, sql):
+        return (sql.replace("INT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT")
+                   .replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ")
+                   .replace("DEFAULT CURRENT_TIMESTAMP", "DEFAULT (datetime('now', 'localtime'))"))
+
+    def is_duplicate_ddl(self, error):
+        return isinstance(error, sqlite3.OperationalError) and (
+            "already exists" in str(error) or "duplicate column" in str(error))
+
+    @contextmanager
+    def migration_lock(self, cursor):
+        # Az SQLite DDL tranzakciós: az IMMEDIATE tranzakció egyben a zár is
+        cursor.execute("BEGIN IMMEDIATE")
+        yield
+
+    def explain(self, cursor, sql, args=()):
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, args)
+        plan = []
+        for row in cursor.fetchall():
+            detail = row["detail"]
+            words = detail.split()
+            if words[0] not in ("SCAN", "SEARCH"):
+                continue
+            index = detail.split(" USING ", 1)[1] if " USING " in detail else None
+            plan.append((words[1], words[0], index, words[0] == "SCAN" and index is None))
+        return plan
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = BACKENDS[BACKEND]()
+    return _backend
+
+
+def set_backend(name, **kwargs):
+    """Backend váltás (pl. benchmarkhoz, ellenőrzéshez); a BACKEND beállítást felülírja."""
+    global _backend
+    with _backend_lock:
+        _backend = BACKENDS[name](**kwargs)
+    return _backend
+
+
+def connection():
+    return get_backend().connection()
+
@@ -0,0 +1,120 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+
+import logs
+
+HISTORY_SIZE = 50
+
+logger = logs.get("syncJobs")
+
+
+class SyncJob:
+    def __init__(self, force=False):
+        self.id = uuid.uuid4().hex[:12]
+        self.force = force
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.callers = 1
+        self.future = asyncio.get_running_loop().create_future()
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "force": self.force,
+            "callers": self.callers,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SyncCoordinator:
+    """
+    Single-flight szinkron az event loopon.
+
+    Egyszerre legfeljebb egy szinkron fut (executorban) és legfeljebb egy vár:
+    a futás közben érkező összes trigger ugyanarra a várakozó jobra csatlakozik,
+    így a gyors egymás utáni backend pingekből egyetlen utólagos szinkron lesz,
+    de a futó szinkron indulása után érkezett változás sem vész el.
+    """
+
+    def __init__(self, run_sync, history=HISTORY_SIZE):
+        self._run_sync = run_sync
+        self._history = history
+        self._jobs = OrderedDict()
+        self._running = None
+        self._pending = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(job) minden befejezett (done/failed) job után, az event loopon."""
+        self._listeners.append(callback)
+
+    @property
+    def running(self):
+        return self._running is not None
+
+    def trigger(self, force=False) -> SyncJob:
+        if self._running is None:
+            job = self._new_job(force)
+            self._start(job)
+            return job
+
+        if self._pending is not None:
+            self._pending.force = self._pending.force or force
+            self._pending.callers += 1
+            return self._pending
+
+        self._pending = self._new_job(force)
+        return self._pending
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def _new_job(self, force):
+        job = SyncJob(force)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+        return job
+
+    def _start(self, job):
+        self._running = job
+        asyncio.get_running_loop().create_task(self._run(job))
+
+    async def _run(self, job):
+        job.status = "running"
+        job.started = time.time()
+        loop = asyncio.get_running_loop()
+        try:
+            report = await loop.run_in_executor(None, self._run_sync, job.force)
+            job.result = report.as_dict() if report is not None else None
+            job.status = "done"
+            job.future.set_result(job.result)
+        except Exception as e:
+            logger.error("Szinkron hiba", job=job.id, error=e)
+            job.error = str(e)
+            job.status = "failed"
+            job.future.set_exception(e)
+            # Ha senki nem vár rá, ne legyen "exception was never retrieved"
+            job.future.exception()
+        finally:
+            job.finished = time.time()
+            self._running = None
+            for callback in self._listeners:
+                try:
+                    callback(job)
+                except Exception:
+                    logger.exception("Szinkron listener hiba")
+            if self._pending is not None:
+                pending, self._pending = self._pending, None
+                self._start(pending)
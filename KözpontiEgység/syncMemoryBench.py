@@ -0,0 +1,148 @@
+"""
+A szinkron memóriaigénye a válasz méretének függvényében.
+
+Foglalásszámonként egy backendStub-ot indít, és két külön folyamatban
+(friss, összemérhető csúcs RSS-sel) lefuttatja ugyanazt a teljes szinkront:
+  - json:   a régi út: response.json(), a teljes válasz és az id listák
+            memóriában, utána bulkApply.apply_table táblánként
+  - stream: DbFetcher.sync: jsonStream + bulkApply.TableStream
+
+    python syncMemoryBench.py --bookings 1000,10000,50000
+
+Kiírja a válasz méretét és a csúcs RSS növekedését (VmHWM - induló VmRSS,
+Linux /proc alapján) módonként. Ideiglenes SQLite adatbázison fut.
+"""
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+DEFAULT_BOOKINGS = "1000,10000,50000"
+MODES = ("json", "stream")
+
+
+def _proc_status_kb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return None
+
+
+# -------- GYEREK FOLYAMAT --------
+def _legacy_sync(url):
+    """A streaming előtti DbFetcher._sync lényege, összehasonlításhoz."""
+    import bulkApply
+    import requests
+    import storage
+
+    data = requests.get(url, headers={"Accept": "application/json"}, timeout=60).json()
+    for conn_data in data.get("rfidConnections", []):
+        conn_data["rfidKey"] = conn_data.pop("key")
+    ids = data.get("ids", {})
+
+    def keep(table):
+        return set(ids[table]) if table in ids else None
+
+    report = bulkApply.SyncReport()
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        bulkApply.apply_table(cur, report, "bookings", data.get("bookings", []), ("id",), keep("bookings"))
+        bulkApply.apply_table(cur, report, "rooms", data.get("rooms", []), ("id",), keep("rooms"))
+        bulkApply.apply_table(cur, report, "relations", data.get("relations", []), ("booking_id", "rooms_id"))
+        bulkApply.apply_table(cur, report, "rfidKeys", data.get("rfidKeys", []), ("id",), keep("rfidKeys"))
+        bulkApply.apply_table(cur, report, "rfidConnections", data.get("rfidConnections", []), ("rfidKey",))
+        conn.commit()
+        cur.close()
+    return report
+
+
+def child(url, mode):
+    import DbFetcher
+    import logs
+    import schema
+    import storage
+
+    # A stdout-on csak az eredmény JSON mehet ki
+    logs.setup(stream=sys.stderr)
+    storage.set_backend("sqlite", path=os.path.join(tempfile.mkdtemp(prefix="hotelflow-rss-"), "rss.db"))
+    with contextlib.redirect_stdout(sys.stderr):
+        schema.ensure()
+    baseline = _proc_status_kb("VmRSS")
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        if mode == "json":
+            _legacy_sync(url)
+        else:
+            DbFetcher.API_URL_TEMPLATE = url
+            DbFetcher.sync(force=True)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "baseline_kb": baseline,
+        "peak_kb": _proc_status_kb("VmHWM"),
+        "seconds": round(elapsed, 3),
+    }))
+
+
+# -------- MÉRÉS --------
+def measure(count):
+    import benchmark
+    from backendStub import BackendStub
+
+    stub = BackendStub()
+    benchmark.seed_stub(stub, count)
+    base = stub.start()
+    url = f"{base}/api/devices/bookings/{stub.hotel_id}"
+    try:
+        request = urllib.request.Request(url, headers={"Authorization": f"Bearer {stub.token}"})
+        with urllib.request.urlopen(request) as response:
+            size = len(response.read())
+
+        results = {"payload_kb": round(size / 1024)}
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", url, "--mode", mode],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            results[mode] = {
+                "rss_growth_kb": result["peak_kb"] - result["baseline_kb"],
+                "seconds": result["seconds"],
+            }
+        return results
+    finally:
+        stub.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Szinkron csúcs memória mérés")
+    parser.add_argument("--bookings", default=DEFAULT_BOOKINGS, help="foglalásszámok vesszővel")
+    parser.add_argument("--json", help="eredmény mentése JSON fájlba")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.mode)
+        return
+
+    report = {}
+    print(f"{'foglalás':>9} {'válasz KB':>10} " + " ".join(f"{m + ' RSS KB':>14} {m + ' s':>9}" for m in MODES))
+    for count in [int(n) for n in args.bookings.split(",")]:
+        result = report[count] = measure(count)
+        print(f"{count:>9} {result['payload_kb']:>10} " + " ".join(
+            f"{result[m]['rss_growth_kb']:>14} {result[m]['seconds']:>9}" for m in MODES))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Időzített háttér szinkron a server.py event loopján.
+
+A SyncCoordinator-t hívja (ugyanaz a single-flight út, mint a GET /1), így
+az időzített és a backend által kért szinkron sosem fut egyszerre. Az
+intervallum napszakhoz igazodik (sűrűbb a check-in/check-out idősávokban,
+ritkább éjjel), jitteres, hiba után rövidebb újrapróbálással indul. Ha az
+időzítéskor épp fut egy szinkron, a kör kimarad.
+"""
+import asyncio
+import random
+import time
+from datetime import datetime
+
+import metrics
+
+# -------- CONFIG --------
+DAY_INTERVAL = 300           # másodperc
+BUSY_INTERVAL = 60           # check-in/check-out idősávban
+NIGHT_INTERVAL = 900
+NIGHT_HOURS = (23, 6)        # [kezdet, vége) óra, éjfélen át
+BUSY_TIMES = ((11, 0), (14, 0))   # kijelentkezés / bejelentkezés kezdete
+BUSY_WINDOW_MINUTES = 60     # ennyivel előtte és utána számít sűrűnek
+JITTER = 0.2                 # +-20%: a backend ne egyszerre kapja a kéréseket
+RETRY_MIN = 15               # hiba után ettől duplázva, az intervallumig
+
+LAST_SUCCESS = metrics.gauge("hotelflow_sync_last_success_timestamp_seconds",
+                             "A legutóbbi sikeres szinkron ideje (unix)")
+SCHEDULED = metrics.counter("hotelflow_sync_scheduled_total", "Időzített szinkron körök", ("action",))
+
+
+def base_interval(now):
+    """Napszak szerinti intervallum (másodperc) egy datetime-hoz."""
+    start, end = NIGHT_HOURS
+    if now.hour >= start or now.hour < end:
+        return NIGHT_INTERVAL
+    minutes = now.hour * 60 + now.minute
+    for hour, minute in BUSY_TIMES:
+        if abs(minutes - (hour * 60 + minute)) <= BUSY_WINDOW_MINUTES:
+            return BUSY_INTERVAL
+    return DAY_INTERVAL
+
+
+class SyncScheduler:
+    def __init__(self, coordinator, clock=time.time, now=datetime.now):
+        self.coordinator = coordinator
+        self.clock = clock
+        self.now = now
+
+        self.last_success = None
+        self.last_attempt = None
+        self.last_error = None
+        self.failures = 0
+        self.skipped = 0
+        self.interval = None
+        self.next_run = None
+
+        self._wake = None
+        self._task = None
+        coordinator.add_listener(self._on_finished)
+
+    # -------- ÁLLAPOT --------
+    def _on_finished(self, job):
+        # Minden szinkron számít, a GET /1-en kért is. Ha csak néhány hotel
+        # szinkronja hibás, a job "done", de a hotelek adata így nem friss
+        self.last_attempt = job.finished
+        errors = (job.result or {}).get("errors") if job.status == "done" else None
+        if errors:
+            self.last_error = "; ".join(f"hotel {hotel_id}: {e}" for hotel_id, e in errors.items())
+            self.failures += 1
+        elif job.status == "done":
+            self.last_success = job.finished
+            self.last_error = None
+            self.failures = 0
+            LAST_SUCCESS.set(job.finished)
+        else:
+            self.last_error = job.error
+            self.failures += 1
+
+    def set_last_success(self, timestamp):
+        # Induláskor a sync_state-ből: egy újraindítás ne tűnjön teljes elavulásnak
+        if timestamp is not None and (self.last_success is None or timestamp > self.last_success):
+            self.last_success = timestamp
+            LAST_SUCCESS.set(timestamp)
+
+    def staleness(self):
+        return None if self.last_success is None else max(0.0, self.clock() - self.last_success)
+
+    def next_delay(self):
+        interval = base_interval(self.now())
+        if self.failures:
+            interval = min(interval, RETRY_MIN * 2 ** (self.failures - 1))
+        self.interval = interval
+        return interval * random.uniform(1 - JITTER, 1 + JITTER)
+
+    def status(self):
+        staleness = self.staleness()
+        return {
+            "running": self.coordinator.running,
+            "last_success": self.last_success,
+            "staleness_seconds": round(staleness, 1) if staleness is not None else None,
+            "last_attempt": self.last_attempt,
+            "last_error": self.last_error,
+            "consecutive_failures": self.failures,
+            "skipped": self.skipped,
+            "interval_seconds": self.interval,
+            "next_run_in": round(max(0.0, self.next_run - self.clock()), 1) if self.next_run else None,
+        }
+
+    # -------- IDŐZÍTÉS --------
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def push(self, force=False):
+        """Backend jelzés (GET /1): azonnali szinkron, a következő kör innen számít."""
+        job = self.coordinator.trigger(force=force)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    def tick(self):
+        if self.coordinator.running:
+            self.skipped += 1
+            SCHEDULED.inc("skipped")
+            return None
+        SCHEDULED.inc("triggered")
+        return self.coordinator.trigger()
+
+    async def _loop(self):
+        while True:
+            delay = self.next_delay()
+            self.next_run = self.clock() + delay
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                self.tick()
+            self._wake.clear()
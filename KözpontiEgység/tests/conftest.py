@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+# A modulok a KözpontiEgység könyvtárból, csupasz névvel importálják egymást
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# MySQL-en csak egy külön, eldobható adatbázison futunk (a benchmark --database-hez hasonlóan):
+#   HOTELFLOW_TEST_MYSQL=hotelflow_test python -m pytest
+MYSQL_DATABASE = os.environ.get("HOTELFLOW_TEST_MYSQL")
+
+
+@pytest.fixture(params=["sqlite", "mysql"])
+def backend(request, tmp_path):
+    """Friss, migrált adatbázis mindkét backenden; ugyanazok a tesztek futnak rajtuk."""
+    import schema
+    import storage
+
+    previous = storage._backend
+    if request.param == "mysql":
+        if not MYSQL_DATABASE:
+            pytest.skip("MySQL tesztekhez: HOTELFLOW_TEST_MYSQL=<eldobható adatbázis>")
+        import dbPool
+
+        if MYSQL_DATABASE == "hotelflowLocal":
+            pytest.fail("A hotelflowLocal adatbázison nem futtatunk teszteket")
+        dbPool.DB_CONFIG["database"] = MYSQL_DATABASE
+        backend = storage.set_backend("mysql")
+    else:
+        backend = storage.set_backend("sqlite", path=str(tmp_path / "test.db"))
+
+    schema._ensured = False
+    schema.ensure()
+    if request.param == "mysql":
+        _clear_tables()
+    yield backend
+    schema._ensured = False
+    storage._backend = previous
+
+
+def _clear_tables():
+    import storage
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        for table in ("bookings", "rooms", "relations", "rfidKeys", "rfidConnections", "checkin_plan",
+                      "pending_requests", "failed_requests", "sync_state", "sync_digests", "audit_log"):
+            cur.execute(f"DELETE FROM {table}")
+        conn.commit()
+        cur.close()
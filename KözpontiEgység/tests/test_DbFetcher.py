@@ -0,0 +1,208 @@
+import io
+
+import pytest
+
+pytest.importorskip("requests")
+
+import DbFetcher  # noqa: E402
+
+
+class FakeResponse:
+    def __init__(self, status, body=b""):
+        self.status_code = status
+        self.headers = {}
+        self._body = body
+
+    def iter_content(self, size):
+        return iter([self._body] if self._body else [])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def replies(monkeypatch, backend):
+    statuses = {}   # hotel -> státusz vagy (státusz, törzs)
+
+    def reply(hotel_id):
+        status = statuses[hotel_id]
+        return status if isinstance(status, tuple) else (status, b"")
+
+    def request(hotel_id, state):
+        return FakeResponse(*reply(hotel_id))
+
+    def download(hotel_id, state):
+        status, body = reply(hotel_id)
+        return status, None, io.BytesIO(body)
+
+    monkeypatch.setattr(DbFetcher, "_request", request)
+    monkeypatch.setattr(DbFetcher, "_download", download)
+    return statuses
+
+
+@pytest.mark.parametrize("status", [401, 404, 500])
+def test_backend_error_fails_the_sync(replies, status):
+    replies[1] = status
+    with pytest.raises(DbFetcher.BackendStatusError) as info:
+        DbFetcher.sync(hotel_ids=[1])
+    assert info.value.status == status
+
+
+def test_backend_error_of_one_hotel_is_reported(replies):
+    replies.update({1: 500, 2: 304})
+    report = DbFetcher.sync(hotel_ids=[1, 2])
+    assert set(report.errors) == {1}
+    assert report.as_dict()["errors"] == {1: "backend HTTP 500 (hotel 1)"}
+
+
+LEGACY_EMPTY = (404, b'{"message": "Booking not found"}')
+
+
+def seed_bookings(hotel_ids):
+    import bulkApply
+    import storage
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        for hotel_id in hotel_ids:
+            bulkApply.apply_table(cur, bulkApply.SyncReport(), "bookings",
+                                  [{"id": hotel_id * 10, "checkInToken": f"t{hotel_id}", "hotelId": hotel_id}],
+                                  ("id",), keep=set())
+            bulkApply.apply_table(cur, bulkApply.SyncReport(), "rooms",
+                                  [{"id": hotel_id * 10, "name": "101", "hotelId": hotel_id}], ("id",), keep=set())
+        conn.commit()
+        cur.close()
+
+
+def local_ids(table):
+    import storage
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT id FROM {table} ORDER BY id")
+        ids = [row["id"] for row in cur.fetchall()]
+        cur.close()
+    return ids
+
+
+@pytest.mark.parametrize("hotel_ids", [[1], [1, 2]])
+def test_legacy_404_for_empty_hotel_clears_its_bookings(replies, hotel_ids):
+    # Régebbi backend: foglalás nélküli hotelre 404 "Booking not found" (nem hiba)
+    seed_bookings(hotel_ids)
+    replies.update({1: LEGACY_EMPTY, 2: 304})
+    report = DbFetcher.sync(hotel_ids=hotel_ids)
+
+    assert report.errors == {}
+    assert report.hotels[1].table("bookings").deleted == 1
+    assert local_ids("bookings") == [h * 10 for h in hotel_ids if h != 1]
+    assert local_ids("rooms") == [h * 10 for h in hotel_ids]   # szoba id lista nem jött: marad
+
+
+def test_other_404_is_still_an_error(replies):
+    replies[1] = (404, b'{"message": "Not found"}')
+    with pytest.raises(DbFetcher.BackendStatusError):
+        DbFetcher.sync(hotel_ids=[1])
+
+
+def test_not_modified_is_not_an_error(replies):
+    replies[1] = 304
+    assert DbFetcher.sync(hotel_ids=[1]) is None
+
+
+# -------- DELTA / ETAG A BACKEND STUB ELLEN --------
+OLD = "2020-01-01 00:00:00"
+CURSOR = "2020-06-01 00:00:00"
+
+
+@pytest.fixture
+def stub(monkeypatch, backend):
+    from backendStub import BackendStub
+    import hotels
+
+    stub = BackendStub(hotel_id=1)
+    base = stub.start()
+    monkeypatch.setattr(DbFetcher, "API_URL_TEMPLATE", base + "/api/devices/bookings/{hotel_id}")
+    monkeypatch.setattr(hotels, "HOTELS", {1: {}})
+    stub.put_room(1, "101")
+    stub.put_rfid_key(1, "KEY1")
+    stub.link_key("KEY1", 1)
+    for booking_id in (1, 2):
+        stub.put_booking({"id": booking_id, "checkInToken": f"token-{booking_id}"})
+        stub.connect(booking_id, 1)
+    # Régi időbélyegek: a delta csak a cursor után változottakat küldi
+    for table in (stub.bookings, stub.rfid_keys):
+        for record in table.values():
+            record["updatedAt"] = OLD
+    stub.rooms[1]["updatedAt"] = CURSOR
+    yield stub
+    stub.stop()
+
+
+def local(table, column="id"):
+    import storage
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT {column} FROM {table} WHERE hotelId=1 ORDER BY {column}")
+        values = [row[column] for row in cur.fetchall()]
+        cur.close()
+    return values
+
+
+def sync_state():
+    import storage
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT syncCursor, etag, lastSyncAt FROM sync_state WHERE hotelId=1")
+        row = cur.fetchone()
+        cur.close()
+    return row
+
+
+def test_delta_upserts_changed_rows_and_deletes_missing_ids(stub):
+    first = DbFetcher.sync(hotel_ids=[1]).hotels[1]
+    assert first.table("bookings").inserted == 2
+    state = sync_state()
+    assert str(state["syncCursor"]) == CURSOR and state["etag"]
+
+    stub.delete_booking(2)
+    stub.put_booking({"id": 3, "checkInToken": "token-3"})
+    stub.connect(3, 1)
+    report = DbFetcher.sync(hotel_ids=[1]).hotels[1]
+
+    _, path, headers = stub.requests[-1]
+    assert "since=" in path and headers.get("If-None-Match") == state["etag"]
+    stats = report.table("bookings")
+    # Az 1-es nem jött le újra (régi), a 3-as új, a 2-es kimaradt az ids-ből
+    assert (stats.inserted, stats.updated, stats.unchanged, stats.deleted) == (1, 0, 0, 1)
+    assert local("bookings") == [1, 3]
+    assert local("checkin_plan", "checkInToken") == ["token-1", "token-3"]
+
+
+def test_not_modified_leaves_data_untouched(stub):
+    DbFetcher.sync(hotel_ids=[1])
+    before = sync_state()
+
+    assert DbFetcher.sync(hotel_ids=[1]) is None
+    after = sync_state()
+    assert stub.requests[-1][2].get("If-None-Match") == before["etag"]
+    assert (after["syncCursor"], after["etag"]) == (before["syncCursor"], before["etag"])
+    assert after["lastSyncAt"] >= before["lastSyncAt"]
+    assert local("bookings") == [1, 2]
+
+
+def test_empty_hotel_deletes_local_bookings(stub):
+    DbFetcher.sync(hotel_ids=[1])
+    stub.delete_booking(1)
+    stub.delete_booking(2)
+
+    report = DbFetcher.sync(hotel_ids=[1])
+    assert report.errors == {}
+    assert report.hotels[1].table("bookings").deleted == 2
+    assert local("bookings") == []
+    assert local("checkin_plan", "checkInToken") == []
+    assert local("rooms") == [1]
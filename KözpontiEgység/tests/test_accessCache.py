@@ -0,0 +1,56 @@
+import threading
+import time
+
+import accessCache
+from accessCache import AccessCache
+
+
+def make_cache(tmp_path, pairs, delay=0.0, **kwargs):
+    calls = []
+
+    def rebuild():
+        calls.append(1)
+        time.sleep(delay)
+        return list(pairs)
+
+    cache = AccessCache(rebuild=rebuild, lookup=lambda card, room: False,
+                        generation_file=str(tmp_path / "access.gen"), **kwargs)
+    return cache, calls
+
+
+def test_concurrent_callers_share_one_rebuild_after_invalidation(tmp_path):
+    cache, calls = make_cache(tmp_path, [("A", "101")], delay=0.05)
+    assert cache.is_allowed("A", "101")
+    accessCache.invalidate(cache.generation_file)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.is_allowed("A", "101"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [True] * 8
+    assert len(calls) == 2   # az első betöltés + egyetlen újraépítés
+
+
+def test_incomplete_index_keeps_recently_used_entries(tmp_path):
+    cache, _ = make_cache(tmp_path, [("A", "1"), ("B", "2"), ("C", "3")], max_entries=2)
+    assert cache.is_allowed("A", "1")
+    assert not cache.stats()["complete"]
+    assert not cache.is_allowed("X", "9")     # lookup -> bekerül, B kiesik
+    assert cache.is_allowed("A", "1")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_complete_index_denies_without_lookup(tmp_path):
+    cache, _ = make_cache(tmp_path, [("A", "101")])
+    assert not cache.is_allowed("B", "101")
+    assert cache.stats()["misses"] == 0
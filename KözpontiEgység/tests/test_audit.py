@@ -0,0 +1,106 @@
+import pytest
+
+import audit
+import storage
+
+
+def rows(where=""):
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT cardId, hotelId, uploaded FROM audit_log {where} ORDER BY id")
+        result = cur.fetchall()
+        cur.close()
+    return [(r["cardId"], r["hotelId"], r["uploaded"]) for r in result]
+
+
+def test_full_buffer_drops_the_oldest_records():
+    log = audit.AuditLog(capacity=3, flush_batch=100)
+    for i in range(5):
+        log.record("door", card=f"C{i}")
+    assert log.stats()["dropped"] == 2
+    assert [entry[3] for _, entry in log._buffer] == ["C2", "C3", "C4"]
+
+
+def test_reaching_the_batch_size_wakes_the_writer():
+    log = audit.AuditLog(flush_batch=2)
+    log.record("door")
+    assert not log._wake.is_set()
+    log.record("door")
+    assert log._wake.is_set()
+
+
+def test_flush_writes_bounded_batches_in_order(backend, monkeypatch):
+    monkeypatch.setattr(audit, "MAX_INSERT_ROWS", 2)
+    log = audit.AuditLog()
+    for i in range(5):
+        log.record("door", card=f"C{i}", door="101", result="ALLOW", latency=0.0123, hotel=1)
+
+    assert [log.flush() for _ in range(4)] == [2, 2, 1, 0]
+    assert rows() == [(f"C{i}", 1, 0) for i in range(5)]
+    assert log.stats()["written"] == 5 and log.pending() == 0
+
+
+def test_failed_write_keeps_the_buffer(backend, monkeypatch):
+    log = audit.AuditLog()
+    log.record("checkin", booking=7)
+
+    def unavailable():
+        raise OSError("tároló nem elérhető")
+
+    monkeypatch.setattr(storage, "connection", unavailable)
+    with pytest.raises(OSError):
+        log.flush()
+    assert log.pending() == 1
+
+    monkeypatch.undo()
+    assert log.flush() == 1 and log.pending() == 0
+
+
+@pytest.fixture
+def stub(backend, monkeypatch):
+    from backendStub import BackendStub
+
+    stub = BackendStub(hotel_id=1)
+    base = stub.start()
+    monkeypatch.setattr(audit, "UPLOAD_URL_TEMPLATE", base + "/api/devices/audit/{hotel_id}")
+    yield stub
+    stub.stop()
+
+
+def test_uploader_sends_batches_and_marks_rows(stub):
+    log = audit.AuditLog()
+    for i in range(3):
+        log.record("door", card=f"C{i}", hotel=1 if i else None)   # hotel nélkül: alapértelmezett hotel
+    log.flush()
+
+    uploader = audit.AuditUploader(batch_size=2)
+    assert [uploader.upload_once() for _ in range(3)] == [2, 1, 0]
+    assert [e["cardID"] for e in stub.audit_events] == ["C0", "C1", "C2"]
+    assert all(uploaded for _, _, uploaded in rows())
+
+
+def test_rejected_hotel_stays_pending(stub):
+    log = audit.AuditLog()
+    log.record("door", card="ok", hotel=1)
+    log.record("door", card="idegen", hotel=2)      # a stub csak az 1. hotelt fogadja
+    log.flush()
+
+    uploader = audit.AuditUploader()
+    with pytest.raises(RuntimeError):
+        uploader.upload_once()
+    assert rows() == [("ok", 1, 1), ("idegen", 2, 0)]
+
+
+def test_backend_outage_keeps_rows_for_the_next_round(stub):
+    log = audit.AuditLog()
+    log.record("door", card="C0", hotel=1)
+    log.flush()
+
+    stub.fail_audit = True
+    uploader = audit.AuditUploader()
+    with pytest.raises(RuntimeError):
+        uploader.upload_once()
+    assert rows() == [("C0", 1, 0)]
+
+    stub.fail_audit = False
+    assert uploader.upload_once() == 1 and rows() == [("C0", 1, 1)]
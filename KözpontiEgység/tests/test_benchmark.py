@@ -0,0 +1,63 @@
+import argparse
+
+import pytest
+
+import benchmark
+import DbFetcher
+import hotels
+import logs
+import post
+import schema
+import storage
+
+
+@pytest.fixture
+def isolated(monkeypatch, tmp_path):
+    # A benchmark átállítja a backendet és a modulok URL-jeit: a teszt után minden visszaáll
+    monkeypatch.setattr(storage, "_backend", storage._backend)
+    monkeypatch.setattr(schema, "_ensured", False)
+    monkeypatch.setattr(DbFetcher, "API_URL_TEMPLATE", DbFetcher.API_URL_TEMPLATE)
+    monkeypatch.setattr(post, "API_URL_TEMPLATE", post.API_URL_TEMPLATE)
+    monkeypatch.setattr(hotels, "HOTELS", hotels.HOTELS)
+    monkeypatch.setattr(benchmark.tempfile, "mkdtemp", lambda prefix: str(tmp_path))
+    yield tmp_path
+    logs.setup()
+
+
+def test_sync_benchmark_reports_every_sync_measurement(isolated):
+    args = argparse.Namespace(
+        bookings="3,6", syncs=2, auth=0, concurrency=1, scans=0, lockers=4, only="sync",
+        backend="sqlite", database=None, json=None, verbose=False)
+    report = benchmark.run(args)
+
+    assert sorted(report) == [3, 6]
+    for count, metrics in report.items():
+        assert sorted(metrics) == ["sync_delta", "sync_full", "sync_noop", "sync_unchanged"]
+        assert all(m["count"] == 2 for m in metrics.values())
+
+    # Az utolsó kör adatai a benchmark adatbázisában maradnak: foglalások és szekrényterv
+    assert (isolated / "bench.db").exists()
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT COUNT(*) AS n FROM bookings")
+        assert cur.fetchone()["n"] == 6
+        cur.execute("SELECT COUNT(*) AS n FROM checkin_plan")
+        assert cur.fetchone()["n"] == 6
+        cur.close()
+
+
+def test_mysql_refuses_the_live_database(isolated):
+    import dbPool
+
+    args = argparse.Namespace(backend="mysql", database=dbPool.DB_CONFIG["database"])
+    with pytest.raises(SystemExit):
+        benchmark.configure_backend(args, str(isolated))
+
+
+def test_print_report_lists_percentiles(capsys):
+    benchmark.print_report({10: {"sync_full": {"count": 2, "p50_ms": 1.0, "p95_ms": 2.0,
+                                               "p99_ms": 2.0, "max_ms": 2.5},
+                                 "door_auth_results": {"ALLOW": 3}}})
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[1].split() == ["10", "sync_full", "2", "1.0", "2.0", "2.0", "2.5"]
+    assert lines[2].split() == ["10", "door_auth_results", "{'ALLOW':", "3}"]
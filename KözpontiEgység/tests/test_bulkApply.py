@@ -0,0 +1,140 @@
+import pytest
+
+import bulkApply
+import storage
+from bulkApply import KeySet
+
+
+def test_update_with_out_of_range_id_keeps_every_key_once():
+    keys = KeySet()
+    keys.update([5, 1])
+    keys.update([2, 3, 2 ** 63, -2 ** 63 - 1, 4])
+
+    assert len(keys) == 7
+    assert sorted(k for k in keys if k < 2 ** 63 and k >= -2 ** 63) == [1, 2, 3, 4, 5]
+    for key in (1, 2, 3, 4, 5, 2 ** 63, -2 ** 63 - 1):
+        assert key in keys
+
+
+def test_update_mixed_keys_and_difference():
+    keys = KeySet()
+    keys.update([3, 1, 2])
+    keys.update(["a", 4])
+    keys.add(0)
+    keys.difference_update([2, "a"])
+
+    assert sorted(keys, key=str) == [0, 1, 3, 4]
+    assert 2 not in keys and "a" not in keys
+    keys.update([])
+    assert len(keys) == 4
+
+
+# -------- HALMAZ ALAPÚ ALKALMAZÁS (apply_table) --------
+@pytest.fixture
+def cur(backend):
+    with storage.connection() as conn:
+        cursor = conn.cursor()
+        yield cursor
+        conn.commit()
+        cursor.close()
+
+
+def keys(cur, table, columns="id", hotel_id=None):
+    where = f" WHERE hotelId={hotel_id}" if hotel_id is not None else ""
+    cur.execute(f"SELECT {columns} FROM {table}{where} ORDER BY {columns}")
+    return [tuple(row.values()) if len(row) > 1 else next(iter(row.values())) for row in cur.fetchall()]
+
+
+def test_chunked_upsert_counts_inserts_and_real_updates(cur):
+    rooms = [{"id": i, "name": f"R{i}"} for i in range(1, 6)]
+    report = bulkApply.SyncReport()
+    stats = bulkApply.apply_table(cur, report, "rooms", rooms, ("id",), chunk_size=2)
+    assert (stats.inserted, stats.updated, stats.deleted) == (5, 0, 0)
+
+    rooms[2] = {"id": 3, "name": "R3b"}
+    stats = bulkApply.apply_table(cur, bulkApply.SyncReport(), "rooms", rooms, ("id",), chunk_size=2)
+    assert (stats.inserted, stats.updated, stats.deleted) == (0, 1, 0)
+    cur.execute("SELECT name FROM rooms WHERE id=3")
+    assert cur.fetchone()["name"] == "R3b"
+
+
+def test_missing_rows_are_deleted_only_in_the_partition(cur):
+    # A backend id-k hotelek között is egyediek; a 2. hotel sorai 20-tól
+    for hotel_id in (1, 2):
+        bulkApply.apply_table(cur, bulkApply.SyncReport(), "relations",
+                              [{"booking_id": hotel_id * 10 + b, "rooms_id": hotel_id * 10 + r, "hotelId": hotel_id}
+                               for b, r in ((1, 1), (1, 2), (2, 1))],
+                              ("booking_id", "rooms_id"), partition=("hotelId", hotel_id))
+
+    # Az 1. hotel szinkronja csak egy relációt küld: a 2. hotel sorai nem hiányoznak belőle
+    stats = bulkApply.apply_table(cur, bulkApply.SyncReport(), "relations",
+                                  [{"booking_id": 11, "rooms_id": 12, "hotelId": 1}],
+                                  ("booking_id", "rooms_id"), partition=("hotelId", 1), chunk_size=1)
+    assert stats.deleted == 2
+    assert keys(cur, "relations", "booking_id, rooms_id", hotel_id=1) == [(11, 12)]
+    assert keys(cur, "relations", "booking_id, rooms_id", hotel_id=2) == [(21, 21), (21, 22), (22, 21)]
+
+
+def test_explicit_keep_list_decides_deletions(cur):
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), "bookings",
+                          [{"id": i, "checkInToken": f"t{i}"} for i in (1, 2, 3)], ("id",))
+    # Delta: csak a 3-as jött, de a keep lista szerint az 1-es is él
+    stats = bulkApply.apply_table(cur, bulkApply.SyncReport(), "bookings",
+                                  [{"id": 3, "checkInToken": "t3"}], ("id",), keep={1, 3})
+    assert stats.deleted == 1
+    assert keys(cur, "bookings") == [1, 3]
+
+    # Üres keep halmaz: nem törlünk (üres válasz nem üríti a táblát)
+    stats = bulkApply.apply_table(cur, bulkApply.SyncReport(), "bookings", [], ("id",), keep=set())
+    assert stats.deleted == 0 and keys(cur, "bookings") == [1, 3]
+
+
+# -------- UJJLENYOMATOK (TableStream) --------
+def stream(cur, rows, ids=None, stored=None):
+    s = bulkApply.TableStream(cur, bulkApply.SyncReport(), "rooms", ("id",), chunk_size=2)
+    for row in rows:
+        s.add([dict(row)])
+    if ids is not None:
+        s.add_ids(ids)
+    return s.finish(stored), s.digest()
+
+
+def rooms(*names):
+    return [{"id": i, "name": name} for i, name in enumerate(names, 1)]
+
+
+def test_row_hash_is_a_stable_signed_64_bit_content_hash():
+    row = {"id": 1, "name": "R1"}
+    assert bulkApply.row_hash(row) == bulkApply.row_hash(dict(row))
+    assert bulkApply.row_hash(row) != bulkApply.row_hash({"id": 1, "name": "R1b"})
+    assert bulkApply.row_hash(row) != bulkApply.row_hash({"id": 2, "name": "R1"})
+    assert -2 ** 63 <= bulkApply.row_hash(row) < 2 ** 63
+
+
+def test_unchanged_rows_are_not_written_again(cur):
+    stats, first = stream(cur, rooms("A", "B", "C"))
+    assert (stats.inserted, stats.updated, stats.unchanged) == (3, 0, 0)
+
+    stats, again = stream(cur, rooms("A", "Bx", "C"))
+    assert (stats.inserted, stats.updated, stats.unchanged) == (0, 1, 2)
+    assert again != first
+    assert keys(cur, "rooms", "name") == ["A", "Bx", "C"]
+
+
+def test_row_without_fingerprint_is_rewritten(cur):
+    stream(cur, rooms("A", "B"))
+    cur.execute("UPDATE rooms SET name='helyben', rowHash=NULL WHERE id=1")
+    stats, _ = stream(cur, rooms("A", "B"))
+    assert (stats.updated, stats.unchanged) == (1, 1)
+    assert keys(cur, "rooms", "name") == ["A", "B"]
+
+
+def test_matching_section_digest_skips_delete_reconciliation(cur):
+    _, digest = stream(cur, rooms("A", "B"), ids=[1, 2])
+    stats, same = stream(cur, rooms("A", "B"), ids=[1, 2], stored=digest)
+    assert same == digest and stats.skipped and stats.deleted == 0
+
+    # Ugyanazok a sorok, de másik id lista: más a lenyomat, lefut a törlés
+    stats, other = stream(cur, rooms("A", "B"), ids=[1], stored=digest)
+    assert other != digest and not stats.skipped
+    assert stats.deleted == 1 and keys(cur, "rooms") == [1]
@@ -0,0 +1,72 @@
+import pytest
+
+import bulkApply
+import checkinPlan
+import storage
+
+
+def put(cur, table, rows, keys=("id",)):
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), table, rows, keys, keep=set())
+
+
+@pytest.fixture
+def cur(backend):
+    with storage.connection() as conn:
+        cursor = conn.cursor()
+        # 1. hotel: a 10-es foglalás két szobája, a 11-esnek nincs szekrénye, a 12-esnek nincs tokenje
+        put(cursor, "bookings", [
+            {"id": 10, "checkInToken": "t10", "checkInstatus": None, "hotelId": 1},
+            {"id": 11, "checkInToken": "t11", "checkInstatus": "checkedIn", "hotelId": 1},
+            {"id": 12, "checkInToken": "", "checkInstatus": None, "hotelId": 1},
+            {"id": 20, "checkInToken": "t20", "checkInstatus": None, "hotelId": 2},
+        ])
+        put(cursor, "relations", [{"booking_id": 10, "rooms_id": 1}, {"booking_id": 10, "rooms_id": 2},
+                                  {"booking_id": 11, "rooms_id": 3}, {"booking_id": 12, "rooms_id": 1},
+                                  {"booking_id": 20, "rooms_id": 4, "hotelId": 2}],
+            ("booking_id", "rooms_id"))
+        put(cursor, "rfidConnections", [
+            {"rfidKey": "K1", "roomId": 1, "roomName": "101"},
+            {"rfidKey": "K1b", "roomId": 1, "roomName": "101"},   # második kulcs: a legkisebb számít
+            {"rfidKey": "K2", "roomId": 2, "roomName": "102"},
+            {"rfidKey": "K3", "roomId": 3, "roomName": "103"},
+            {"rfidKey": "K4", "roomId": 4, "roomName": "101", "hotelId": 2},
+        ], ("rfidKey",))
+        checkinPlan.set_locker(cursor, "K1", 0, 1, 4)
+        checkinPlan.set_locker(cursor, "K1b", 3, 3, 4)
+        checkinPlan.set_locker(cursor, "K2", 2, 0, 4)
+        checkinPlan.set_locker(cursor, "K4", 0, 0, 4)
+        checkinPlan.rebuild(cursor)
+        conn.commit()
+        yield cursor
+        cursor.close()
+
+
+def plan(cur, token, hotel_id=None):
+    found = checkinPlan.lookup(cur, token, hotel_id)
+    # SQLite-on a group_concat sorrendje nem garantált
+    return found and (found[0], found[1], sorted(found[2]))
+
+
+def test_token_resolves_to_booking_and_matrix_lockers(cur):
+    assert plan(cur, "t10") == (10, None, [1, 8])
+    assert plan(cur, "t11") == (11, "checkedIn", [])
+    assert plan(cur, "nincs") is None
+    cur.execute("SELECT COUNT(*) AS n FROM checkin_plan")
+    assert cur.fetchone()["n"] == 3       # token nélküli foglalás nem kerül a tervbe
+
+
+def test_lookup_and_rebuild_are_scoped_by_hotel(cur):
+    assert plan(cur, "t20", hotel_id=2) == (20, None, [0])
+    assert plan(cur, "t20", hotel_id=1) is None
+
+    put(cur, "bookings", [{"id": 10, "checkInToken": "t10-uj", "checkInstatus": None, "hotelId": 1}])
+    put(cur, "bookings", [{"id": 20, "checkInToken": "t20-uj", "checkInstatus": None, "hotelId": 2}])
+    checkinPlan.rebuild(cur, hotel_id=1)
+    assert plan(cur, "t10-uj", 1) == (10, None, [1, 8])
+    assert plan(cur, "t20", 2) == (20, None, [0])          # a 2. hotel terve érintetlen
+    assert plan(cur, "t20-uj", 2) is None
+
+
+def test_set_status_updates_the_plan(cur):
+    checkinPlan.set_status(cur, 10, "checkedIn")
+    assert plan(cur, "t10") == (10, "checkedIn", [1, 8])
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+pymysql = pytest.importorskip("pymysql")
+
+import dbPool  # noqa: E402
+
+
+class FakeConn:
+    def __init__(self, n):
+        self.n = n
+        self.alive = True
+        self.rollbacks = 0
+        self.closed = False
+
+    def ping(self, reconnect=True):
+        if not self.alive:
+            raise pymysql.OperationalError(2006, "MySQL server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    opened = []
+
+    def connect(self):
+        if getattr(self, "refuse", False):
+            raise pymysql.OperationalError(2003, "Can't connect")
+        opened.append(FakeConn(len(opened)))
+        return opened[-1]
+
+    monkeypatch.setattr(dbPool.ConnectionPool, "_connect", connect)
+
+    def make(**kwargs):
+        pool = dbPool.ConnectionPool(config={}, **kwargs)
+        pool.opened = opened
+        return pool
+    return make
+
+
+def test_connections_are_reused_and_rolled_back(make_pool):
+    pool = make_pool(min_size=1, max_size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as again:
+        assert again is first
+    assert first.rollbacks == 2
+    assert pool.stats() == {"size": 1, "idle": 1, "max_size": 2}
+
+
+def test_full_pool_waits_then_times_out(make_pool):
+    pool = make_pool(min_size=0, max_size=2, timeout=0.05)
+    a, b = pool.acquire(), pool.acquire()
+    with pytest.raises(dbPool.PoolTimeout):
+        pool.acquire()
+
+    # Egy visszaadott kapcsolat a várakozónak jut
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    pool.timeout = 2
+    waiter.start()
+    pool.release(a)
+    waiter.join(2)
+    assert got == [a]
+    pool.release(b)
+    pool.release(a)
+    assert pool.stats()["size"] == 2
+
+
+def test_broken_connection_is_discarded(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+    with pytest.raises(pymysql.OperationalError):
+        with pool.connection() as conn:
+            raise pymysql.OperationalError(2013, "Lost connection")
+    assert conn.closed
+    assert pool.stats() == {"size": 0, "idle": 0, "max_size": 1}
+
+
+def test_dead_idle_connection_is_replaced(make_pool):
+    pool = make_pool(min_size=1, max_size=1)
+    stale = pool.opened[0]
+    stale.alive = False
+    with pool.connection() as conn:
+        assert conn is not stale
+    assert stale.closed
+    assert pool.stats()["size"] == 1
+
+
+def test_failed_connect_frees_the_slot(make_pool):
+    pool = make_pool(min_size=0, max_size=1)
+    pool.refuse = True
+    with pytest.raises(pymysql.OperationalError):
+        pool.acquire()
+    pool.refuse = False
+    assert pool.stats()["size"] == 0
+    pool.release(pool.acquire())
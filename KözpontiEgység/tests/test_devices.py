@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+import devices
+from devices import Device, DeviceManager
+
+
+class FlakyOpen:
+    """open(): az első `failures` hívás kivételt dob, utána számozott handle."""
+
+    def __init__(self, failures=0, delay=0.0):
+        self.failures = failures
+        self.delay = delay
+        self.calls = 0
+        self.closed = []
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise OSError(f"nem elérhető ({self.calls})")
+        return f"handle-{self.calls}"
+
+    def close(self, handle):
+        self.closed.append(handle)
+
+
+class RecordingEvent(threading.Event):
+    def __init__(self):
+        super().__init__()
+        self.waits = []
+
+    def wait(self, timeout=None):
+        self.waits.append(timeout)
+        return super().wait(0)
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(devices.random, "uniform", lambda a, b: 1.0)
+
+
+def fast(name, opener, **kwargs):
+    kwargs.setdefault("check_interval", 0.01)
+    return Device(name, open=opener, close=opener.close, backoff_min=0.01, backoff_max=0.04, **kwargs)
+
+
+def test_reconnects_with_exponential_backoff(no_jitter):
+    opener = FlakyOpen(failures=4)
+    device = fast("camera", opener)
+    device._stopped = RecordingEvent()
+    device.start()
+    try:
+        assert device.wait_ready(2)
+        assert device.get() == "handle-5"
+        assert device._stopped.waits[:4] == [0.01, 0.02, 0.04, 0.04]   # duplázva, BACKOFF_MAX-ig
+        assert device.status() == {"ready": True, "attempts": 5, "connects": 1,
+                                   "open_seconds": device.open_seconds, "last_error": "nem elérhető (4)"}
+    finally:
+        device.stop()
+
+
+def test_failed_closes_and_reopens():
+    opener = FlakyOpen()
+    ready = []
+    device = fast("arduino", opener, on_ready=ready.append).start()
+    try:
+        assert device.wait_ready(2)
+        device.failed(OSError("kihúzták"))
+        assert device.get() is None
+        deadline = time.monotonic() + 2
+        while device.connects < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert device.wait_ready(2)
+        assert device.get() == "handle-2"
+        assert opener.closed == ["handle-1"]
+        assert ready == ["handle-1", "handle-2"]
+        assert device.last_error == "kihúzták"
+    finally:
+        device.stop()
+
+
+def test_dead_handle_is_reopened():
+    opener = FlakyOpen()
+    alive = {"handle-1": False}
+    device = fast("arduino", opener, alive=lambda h: alive.get(h, True)).start()
+    try:
+        deadline = time.monotonic() + 2
+        while device.connects < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert device.get(timeout=2) == "handle-2"
+    finally:
+        device.stop()
+
+
+def test_devices_open_in_parallel():
+    camera, arduino = FlakyOpen(delay=0.2), FlakyOpen(failures=1, delay=0.1)
+    manager = DeviceManager(fast("camera", camera), fast("arduino", arduino)).start()
+    try:
+        assert manager.cold_start_seconds() is None
+        assert manager.wait_ready(2)
+        # Egymás után ~0.4 s lenne (0.2 + 0.1 hiba + 0.1)
+        assert manager.cold_start_seconds() < 0.35
+        assert manager.status()["arduino"]["attempts"] == 2
+    finally:
+        manager.stop()
+
+
+def test_stop_interrupts_backoff():
+    device = Device("camera", open=FlakyOpen(failures=10 ** 6), backoff_min=30, backoff_max=30).start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    device.stop()
+    assert time.monotonic() - started < 1
+    assert not device.ready.is_set()
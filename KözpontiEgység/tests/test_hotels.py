@@ -0,0 +1,18 @@
+import pytest
+
+import hotels
+
+
+def test_scope_defaults_to_the_only_hotel(monkeypatch):
+    monkeypatch.setattr(hotels, "HOTELS", {7: {}})
+    assert hotels.scope() == 7
+    assert hotels.scope(7) == 7
+    with pytest.raises(ValueError):
+        hotels.scope(8)
+
+
+def test_scope_is_required_with_several_hotels(monkeypatch):
+    monkeypatch.setattr(hotels, "HOTELS", {1: {}, 2: {}})
+    with pytest.raises(ValueError):
+        hotels.scope()
+    assert hotels.scope(2) == 2
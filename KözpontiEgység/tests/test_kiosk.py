@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from kiosk import IDLE_PROMPT, Kiosk
+
+
+class Guests:
+    """handler: tokenenként a szekrényei, amelyeket a teszt engedéséig tart."""
+
+    def __init__(self, lockers):
+        self.lockers = lockers
+        self.release = {token: threading.Event() for token in lockers}
+        self.holding = set()
+        self.max_parallel = 0
+        self.order = []
+        self._lock = threading.Lock()
+
+    def __call__(self, token, kiosk):
+        if token == "boom":
+            raise RuntimeError("hibás foglalás")
+        with kiosk.lockers(self.lockers[token], timeout=5):
+            with self._lock:
+                self.order.append(token)
+                self.holding.add(token)
+                self.max_parallel = max(self.max_parallel, len(self.holding))
+            self.release[token].wait(5)
+            with self._lock:
+                self.holding.discard(token)
+
+
+def wait_until(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "nem teljesült időben"
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def make_kiosk():
+    kiosks = []
+
+    def make(handler, **kwargs):
+        kiosks.append(Kiosk(handler, **kwargs))
+        return kiosks[-1]
+    yield make
+    for kiosk in kiosks:
+        kiosk.stop()
+
+
+def test_guests_with_separate_lockers_run_in_parallel(make_kiosk):
+    guests = Guests({"a": [1, 2], "b": [3]})
+    kiosk = make_kiosk(guests, workers=2)
+    assert kiosk.submit("a") and kiosk.submit("b")
+    wait_until(lambda: guests.holding == {"a", "b"})
+    assert kiosk.stats()["busy_lockers"] == [1, 2, 3]
+    for event in guests.release.values():
+        event.set()
+    wait_until(lambda: kiosk.stats()["completed"] == 2)
+    assert kiosk.stats()["busy_lockers"] == []
+
+
+def test_shared_locker_waits_for_the_previous_guest(make_kiosk):
+    guests = Guests({"a": [1, 2], "b": [2, 3]})
+    kiosk = make_kiosk(guests, workers=2)
+    kiosk.submit("a")
+    wait_until(lambda: guests.holding == {"a"})
+    kiosk.submit("b")
+    time.sleep(0.05)
+    assert guests.holding == {"a"} and kiosk.stats()["active"] == 2
+    guests.release["a"].set()
+    wait_until(lambda: guests.holding == {"b"})
+    guests.release["b"].set()
+    wait_until(lambda: kiosk.stats()["completed"] == 2)
+    assert guests.order == ["a", "b"] and guests.max_parallel == 1
+
+
+def test_same_token_is_not_queued_twice(make_kiosk):
+    guests = Guests({"a": [1]})
+    kiosk = make_kiosk(guests, workers=1)
+    assert kiosk.submit("a")
+    assert not kiosk.submit("a")          # a QR még a kamera előtt van
+    guests.release["a"].set()
+    wait_until(lambda: kiosk.stats()["completed"] == 1)
+    guests.release["a"].clear()
+    assert kiosk.submit("a")              # feldolgozás után újra beolvasható
+    guests.release["a"].set()
+    wait_until(lambda: kiosk.stats()["completed"] == 2)
+
+
+def test_full_queue_rejects_scans(make_kiosk):
+    guests = Guests({token: [i] for i, token in enumerate("abcd")})
+    kiosk = make_kiosk(guests, workers=1, queue_size=2)
+    kiosk.submit("a")
+    wait_until(lambda: guests.holding == {"a"})
+    assert kiosk.submit("b") and kiosk.submit("c")
+    assert not kiosk.submit("d")
+    assert kiosk.stats()["rejected"] == 1
+    for event in guests.release.values():
+        event.set()
+    wait_until(lambda: kiosk.stats()["completed"] == 3)
+    assert kiosk.submit("d")              # az eldobott token nem ragad be
+
+
+def test_failed_guest_does_not_stop_the_worker_and_idle_prompt_returns(make_kiosk):
+    shown = []
+    guests = Guests({"a": [1]})
+    kiosk = make_kiosk(guests, workers=1, display=shown.append, idle_delay=0.05)
+    kiosk.submit("boom")
+    guests.release["a"].set()
+    kiosk.submit("a")
+    wait_until(lambda: kiosk.stats()["completed"] == 2)
+    wait_until(lambda: shown == [IDLE_PROMPT])
@@ -0,0 +1,45 @@
+import io
+import logging
+
+import pytest
+
+import logs
+
+
+@pytest.fixture
+def output(monkeypatch):
+    monkeypatch.setattr(logs, "RATE_LIMITS", {})
+    monkeypatch.setattr(logs, "_rate", logs.RateLimit())
+    stream = io.StringIO()
+    logs.setup(level="INFO", stream=stream)
+    yield lambda: (logs.flush(), stream.getvalue().splitlines())[1]
+    logs.setup()
+
+
+def test_events_are_not_limited_by_default(output):
+    log = logs.get("test")
+    for i in range(100):
+        log.info("Ajtó auth", door=i)
+        log.info("✅ Szekrény nyitva", locker=i)
+    logging.getLogger("stdlib").info("Kamera inicializálva")
+    lines = output()
+    assert len(lines) == 201
+    assert not any("suppressed" in line for line in lines)
+
+
+def test_limited_message_is_suppressed_and_counted(output, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logs.time, "time", lambda: now[0])
+    logs.limit("Ismeretlen Arduino üzenet", burst=3, window=10)
+    log = logs.get("test")
+    for i in range(10):
+        log.warning("Ismeretlen Arduino üzenet", line=i)
+        log.info("Ajtó auth", door=i)
+    now[0] += 10
+    log.warning("Ismeretlen Arduino üzenet", line="új ablak")
+
+    lines = output()
+    unknown = [line for line in lines if "Ismeretlen" in line]
+    assert len(unknown) == 4
+    assert unknown[-1].endswith("suppressed=7")
+    assert sum("Ajtó auth" in line for line in lines) == 10
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+import pytest
+
+import metrics
+
+
+def snap(service, *items):
+    return {"service": service, "pid": 1, "time": time.time(), "metrics": [
+        {"name": m.name, "help": m.help, "type": m.type, "labels": list(m.labels),
+         "buckets": list(getattr(m, "buckets", ())), "samples": m.snapshot()}
+        for m in items
+    ]}
+
+
+def test_counter_and_gauge_lines_carry_labels_and_service():
+    requests = metrics.Counter("t_requests_total", 'Kérések "idézve"', ("result",))
+    requests.inc("ok")
+    requests.inc("ok", amount=2)
+    requests.inc('a"b\\c')
+    depth = metrics.Gauge("t_queue_depth", "Sor")
+    depth.set(4.0)
+
+    text = metrics.render([snap("validator", requests, depth)])
+    lines = text.splitlines()
+    assert '# HELP t_requests_total Kérések \\"idézve\\"' in lines
+    assert "# TYPE t_requests_total counter" in lines
+    assert 't_requests_total{result="ok",service="validator"} 3' in lines
+    assert 't_requests_total{result="a\\"b\\\\c",service="validator"} 1' in lines
+    assert 't_queue_depth{service="validator"} 4' in lines   # egész float egészként
+    assert text.endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    h = metrics.Histogram("t_seconds", "Idő", ("door",), buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        h.observe(value, "101")
+
+    lines = metrics.render([snap("kiosk", h)]).splitlines()
+    assert lines[2:] == [
+        't_seconds_bucket{door="101",service="kiosk",le="0.1"} 2',
+        't_seconds_bucket{door="101",service="kiosk",le="1"} 3',
+        't_seconds_bucket{door="101",service="kiosk",le="+Inf"} 4',
+        't_seconds_sum{door="101",service="kiosk"} 3.65',
+        't_seconds_count{door="101",service="kiosk"} 4',
+    ]
+
+
+def test_histogram_time_observes_even_on_error():
+    h = metrics.Histogram("t_timed", "Idő")
+    with pytest.raises(RuntimeError):
+        with h.time():
+            raise RuntimeError
+    assert h.snapshot()[0][1]["count"] == 1
+
+
+def test_families_from_several_services_are_grouped():
+    a, b = metrics.Counter("t_shared", "Közös"), metrics.Counter("t_shared", "Közös")
+    a.inc()
+    b.inc(amount=5)
+    lines = metrics.render([snap("server", a), snap("validator", b)]).splitlines()
+    assert lines.count("# TYPE t_shared counter") == 1
+    assert lines[2:] == ['t_shared{service="server"} 1', 't_shared{service="validator"} 5']
+
+
+def test_registry_returns_the_same_metric_and_rejects_type_clash():
+    first = metrics.counter("t_registry_total", "Egyszer")
+    assert metrics.counter("t_registry_total", "Egyszer") is first
+    with pytest.raises(ValueError):
+        metrics.gauge("t_registry_total", "Más típus")
+
+
+def test_snapshots_on_disk_skip_stale_and_own_service(tmp_path):
+    metrics.write_snapshot("validator", str(tmp_path))
+    metrics.write_snapshot("kiosk", str(tmp_path))
+    old = json.loads((tmp_path / "kiosk.json").read_text())
+    old["time"] -= metrics.STALE_SECONDS + 1
+    (tmp_path / "kiosk.json").write_text(json.dumps(old))
+    (tmp_path / "broken.json").write_text("{")
+
+    services = [s["service"] for s in metrics.load_snapshots(str(tmp_path))]
+    assert services == ["validator"]
+    assert metrics.load_snapshots(str(tmp_path), exclude="validator") == []
+    assert not [n for n in os.listdir(tmp_path) if n.endswith(".tmp")]
+    assert metrics.load_snapshots(str(tmp_path / "nincs")) == []
@@ -0,0 +1,151 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import outbox  # noqa: E402
+import storage  # noqa: E402
+
+
+class Backend:
+    """post.put_request_example helyett: a válasz (foglalásonként is) állítható, a hívások rögzítve."""
+
+    def __init__(self, status=200):
+        self.status = status
+        self.calls = []
+
+    def __call__(self, payload, booking_id, session=None, hotel_id=None):
+        self.calls.append((booking_id, payload))
+        return self.status[booking_id] if isinstance(self.status, dict) else self.status
+
+
+@pytest.fixture
+def backend_api(monkeypatch, backend):
+    api = Backend()
+    monkeypatch.setattr(outbox.post, "put_request_example", api)
+    return api
+
+
+def enqueue(*items):
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        for booking_id, payload in items:
+            outbox.enqueue(cur, booking_id, payload)
+        conn.commit()
+        cur.close()
+
+
+def rows(table):
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT * FROM {table} ORDER BY id")
+        result = cur.fetchall()
+        cur.close()
+    return result
+
+
+def test_only_newest_payload_per_booking_is_sent(backend_api):
+    enqueue((1, {"checkInstatus": "checkedIn"}), (2, {"checkInstatus": "checkedIn"}),
+            (1, {"checkInstatus": "checkedOut"}), (1, {"checkInstatus": "confirmed"}))
+    worker = outbox.OutboxWorker()
+
+    assert worker.drain_once()
+    assert sorted(backend_api.calls) == [(1, {"checkInstatus": "confirmed"}), (2, {"checkInstatus": "checkedIn"})]
+    assert rows("pending_requests") == []
+    assert (worker.sent, worker.coalesced, worker.depth) == (2, 2, 0)
+
+
+def test_newer_row_enqueued_after_the_batch_is_kept(backend_api):
+    enqueue((1, {"n": 1}))
+    worker = outbox.OutboxWorker(batch_size=1)
+    enqueue((1, {"n": 2}))
+    worker.drain_once()
+    # Az id<= törlés csak az elküldött és a régebbi sorokat viszi
+    assert [outbox._decode_payload(r["payload"]) for r in rows("pending_requests")] == [{"n": 2}]
+
+
+@pytest.mark.parametrize("status", [401, 403, 404, 408, 429, 500, 503])
+def test_transient_status_keeps_the_row_pending(backend_api, status):
+    backend_api.status = status
+    enqueue((1, {"checkInstatus": "checkedIn"}))
+    worker = outbox.OutboxWorker()
+
+    with pytest.raises(outbox.BackendUnavailable):
+        worker.drain_once()
+    assert len(rows("pending_requests")) == 1
+    assert rows("failed_requests") == []
+
+
+@pytest.mark.parametrize("status", [400, 422])
+def test_rejected_payload_moves_to_failed_requests(backend_api, status):
+    backend_api.status = {1: status, 2: 200}
+    enqueue((1, {"n": 1}), (1, {"n": 2}), (2, {"n": 3}))
+    worker = outbox.OutboxWorker()
+
+    worker.drain_once()
+    assert rows("pending_requests") == []
+    failed = rows("failed_requests")
+    assert [(r["booking_id"], r["status"]) for r in failed] == [(1, status), (1, status)]
+    assert all(r["created_at"] is not None and r["failed_at"] is not None for r in failed)
+    assert (worker.sent, worker.dropped) == (1, 1)
+
+
+def test_undecodable_payload_moves_to_failed_requests(backend_api, backend):
+    if backend.name == "mysql":
+        pytest.skip("MySQL JSON oszlopba nem kerülhet hibás JSON")
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO pending_requests (booking_id, payload) VALUES (%s, %s)", (1, "{nem json"))
+        conn.commit()
+        cur.close()
+    worker = outbox.OutboxWorker()
+
+    worker.drain_once()
+    assert backend_api.calls == []
+    assert rows("pending_requests") == []
+    [failed] = rows("failed_requests")
+    assert failed["status"] is None and failed["reason"].startswith("payload:")
+
+
+def test_backoff_grows_and_is_capped(monkeypatch, backend):
+    monkeypatch.setattr(outbox.random, "uniform", lambda low, high: high)
+    worker = outbox.OutboxWorker()
+    ceilings = []
+    for failures in (0, 1, 3, 20):
+        worker.failures = failures
+        ceilings.append(worker.backoff_delay())
+    assert ceilings == [outbox.BACKOFF_BASE, 2 * outbox.BACKOFF_BASE, 8 * outbox.BACKOFF_BASE, outbox.BACKOFF_MAX]
+
+
+def test_worker_retries_until_the_backend_recovers(backend_api):
+    backend_api.status = 503
+    enqueue((1, {"checkInstatus": "checkedIn"}))
+    worker = outbox.OutboxWorker(poll_interval=0.01)
+    delays = []
+    recovered = threading.Event()
+
+    def backoff():
+        delays.append(worker.failures)
+        if worker.failures >= 3:
+            backend_api.status = 200
+            recovered.set()
+        return 0.01
+
+    worker.backoff_delay = backoff
+    worker.start()
+    try:
+        deadline = time.monotonic() + 5
+        while (rows("pending_requests") or not recovered.is_set()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert rows("pending_requests") == []
+        assert delays[:3] == [1, 2, 3]
+        assert worker.errors >= 3 and worker.last_error == "HTTP 503"
+        deadline = time.monotonic() + 2
+        while worker.failures and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert worker.failures == 0
+    finally:
+        worker.stop()
+        worker.join(2)
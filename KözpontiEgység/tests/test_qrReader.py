@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyzbar")
+import qrReader  # noqa: E402
+
+
+def frame(value):
+    return np.full((480, 640, 3), value, dtype=np.uint8)
+
+
+@pytest.fixture
+def decoded(monkeypatch):
+    calls = []
+
+    def decode(gray):
+        calls.append(int(gray[0, 0]))
+        return []
+
+    monkeypatch.setattr(qrReader, "decode_gray", decode)
+    return calls
+
+
+def test_slow_change_is_measured_against_the_last_decoded_frame(decoded):
+    pipeline = qrReader.ScanPipeline(source=object(), motion_threshold=4.0)
+    for value in range(0, 20):   # képkockánként 1, a küszöb 4
+        pipeline._process(frame(value))
+    assert decoded == [0, 4, 8, 12, 16]
+    assert pipeline.skipped == 15
+
+
+def test_unchanged_frames_are_skipped(decoded):
+    pipeline = qrReader.ScanPipeline(source=object())
+    for _ in range(5):
+        pipeline._process(frame(100))
+    assert decoded == [100]
+
+
+def test_frame_with_code_keeps_decoding_and_debounces(monkeypatch):
+    monkeypatch.setattr(qrReader, "decode_gray", lambda gray: [("TOKEN", "QRCODE")])
+    pipeline = qrReader.ScanPipeline(source=object())
+    for _ in range(3):
+        pipeline._process(frame(50))
+    assert pipeline.decoded == 3
+    assert pipeline.drain() == ["TOKEN"]
+    assert pipeline.debounced == 2
+
+
+class BrokenCamera:
+    def capture(self):
+        raise OSError("kamera leszakadt")
+
+
+def test_capture_error_stops_the_pipeline():
+    pipeline = qrReader.ScanPipeline(source=BrokenCamera()).start()
+    for thread in pipeline._threads:
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+    assert not pipeline.running
+    assert pipeline.stats()["error"] == "kamera leszakadt"
+    assert pipeline.get(timeout=0.01) is None
+    pipeline.stop()
@@ -0,0 +1,69 @@
+import pytest
+
+from authSig import fast_sig, simple_sig, verify_batch
+from replayGuard import ReplayGuard
+
+
+@pytest.fixture
+def clock():
+    return [1000.0]
+
+
+@pytest.fixture
+def guard(clock):
+    return ReplayGuard(max_age_ms=30_000, reboot_slack_ms=5_000, max_entries=4,
+                       clock=lambda: clock[0])
+
+
+def test_same_triple_is_a_replay(guard):
+    assert guard.check("C1", "101", 50_000) is None
+    assert guard.check("C1", "101", 50_000) == "replay"
+    assert guard.check("C2", "101", 50_000) is None      # másik kártya ugyanabban az ms-ben
+    assert guard.stats()["replayed"] == 1
+
+
+def test_old_ts_is_stale_against_the_estimated_door_clock(guard, clock):
+    assert guard.check("C1", "101", 100_000) is None
+    clock[0] += 10
+    # becsült ajtóóra: 110 000 ms; ennél 30 s-nál régebbi ts elavult
+    assert guard.check("C1", "101", 79_000) == "stale"
+    assert guard.check("C2", "101", 81_000) is None
+    assert guard.stats()["stale"] == 1
+
+
+def test_out_of_order_message_does_not_rewind_the_clock(guard, clock):
+    guard.check("C1", "101", 100_000)
+    guard.check("C2", "101", 90_000)                     # ablakon belül, de régebbi
+    clock[0] += 25
+    assert guard.check("C3", "101", 96_000) is None     # 100 000 + 25 000 - 30 000 alatt még nem
+
+
+def test_small_ts_after_reboot_is_accepted(guard, clock):
+    guard.check("C1", "101", 5_000_000)
+    clock[0] += 20
+    # a terminál újraindult: a ts nem nagyobb, mint az azóta eltelt idő + tűrés
+    assert guard.check("C1", "101", 3_000) is None
+    assert guard.stats()["reboots"] == 1
+    assert guard.check("C1", "101", 26_000) is None     # az új óra számít tovább
+
+
+def test_window_expires_and_is_bounded(guard, clock):
+    guard.check("C1", "101", 1_000)
+    clock[0] += 31
+    assert guard.stats()["window"] == 1
+    guard.check("C2", "102", 1)
+    assert guard.stats()["window"] == 1                  # az ablakon túli bejegyzés kiesett
+    for ts in range(10):
+        guard.check("C3", "103", ts)
+    assert guard.stats()["window"] == 4
+
+
+def test_fast_signatures_match_the_reference():
+    cases = [("B7E5C37A", "101", 0), ("59EDC9B0", "2", 0xFFFFFFFF),
+             ("", "", 123456), ("kártya", "ajtó", 42), ("🔑", "101", 7)]
+    for card, door, ts in cases:
+        assert fast_sig(card, door, ts) == simple_sig(card, door, ts)
+
+    messages = [(c, d, t, simple_sig(c, d, t)) for c, d, t in cases]
+    messages.append(("B7E5C37A", "101", 1, simple_sig("B7E5C37A", "101", 2)))
+    assert verify_batch(messages) == [True] * len(cases) + [False]
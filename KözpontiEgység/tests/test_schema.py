@@ -0,0 +1,68 @@
+import pytest
+
+import schema
+import storage
+
+ROWS = 500   # néhány soros táblán a MySQL optimalizáló index helyett is olvashat végig
+
+
+def seed(cur, backend, n=ROWS):
+    cur.executemany(
+        "INSERT INTO bookings (id, checkInToken, checkInstatus, hotelId) VALUES (%s, %s, %s, %s)",
+        [(i, f"token-{i}", "checkedIn" if i % 2 else None, 1 + i % 3) for i in range(1, n + 1)])
+    cur.executemany("INSERT INTO rooms (id, name, hotelId) VALUES (%s, %s, %s)",
+                    [(i, f"R{i}", 1 + i % 3) for i in range(1, n + 1)])
+    cur.executemany("INSERT INTO relations (booking_id, rooms_id, hotelId) VALUES (%s, %s, %s)",
+                    [(i, i, 1 + i % 3) for i in range(1, n + 1)])
+    cur.executemany("INSERT INTO rfidConnections (rfidKey, roomId, roomName, hotelId) VALUES (%s, %s, %s, %s)",
+                    [(f"K{i}", i, f"R{i}", 1 + i % 3) for i in range(1, n + 1)])
+    cur.executemany(
+        "INSERT INTO checkin_plan (checkInToken, booking_id, checkInstatus, lockerIds, hotelId) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [(f"token-{i}", i, None, str(i % 8), 1 + i % 3) for i in range(1, n + 1)])
+    cur.executemany("INSERT INTO pending_requests (booking_id, payload) VALUES (%s, %s)",
+                    [(i, "{}") for i in range(1, n + 1)])
+    cur.executemany("INSERT INTO audit_log (ts, kind, uploaded) VALUES (NOW(), 'door', %s)",
+                    [(1 if i % 10 else 0,) for i in range(n)])
+    if backend.name == "mysql":
+        for table in ("bookings", "rooms", "relations", "rfidConnections", "checkin_plan",
+                      "pending_requests", "audit_log"):
+            cur.execute(f"ANALYZE TABLE {table}")
+            cur.fetchall()
+
+
+@pytest.fixture
+def seeded(backend):
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        seed(cur, backend)
+        conn.commit()
+        yield cur
+        cur.close()
+
+
+def test_migrations_reach_latest_and_rerun_cleanly(backend):
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT version FROM schema_migrations ORDER BY version")
+        assert [row["version"] for row in cur.fetchall()] == [v for v, _, _ in schema.MIGRATIONS]
+        cur.close()
+        assert schema.migrate(conn) == []
+
+
+@pytest.mark.parametrize("name", sorted(schema.HOT_QUERIES))
+def test_hot_query_uses_an_index(seeded, name):
+    sql, args = schema.HOT_QUERIES[name]
+    plan = schema.explain(seeded, sql, args)
+    assert plan, f"{name}: üres EXPLAIN terv"
+    assert schema.full_scans(seeded, {name: (sql, args)}) == {}, plan
+
+
+def test_full_scan_is_reported_when_an_index_goes_missing(seeded, backend):
+    # Az ellenőrző maga is jelez: index nélkül a token keresés végigolvassa a bookings-ot
+    if backend.name == "mysql":
+        seeded.execute("DROP INDEX idx_bookings_checkInToken ON bookings")
+    else:
+        seeded.execute("DROP INDEX idx_bookings_checkInToken")
+    scans = schema.full_scans(seeded)
+    assert scans == {"bookings.checkInToken": ["bookings"]}
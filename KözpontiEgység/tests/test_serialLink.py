@@ -0,0 +1,105 @@
+import queue
+
+import serial
+
+from fakeArduino import FakeArduino
+from serialLink import SerialLink
+
+
+class LoopbackSerial:
+    """Memóriabeli soros port: a teszt adja a beérkező sorokat, a kiírtakat gyűjti."""
+
+    def __init__(self):
+        self.lines = queue.Queue()
+        self.written = queue.Queue()
+
+    def readline(self):
+        try:
+            return self.lines.get(timeout=0.05)
+        except queue.Empty:
+            return b""
+
+    def write(self, data):
+        self.written.put(data.decode().strip())
+
+    def reply(self, line):
+        self.lines.put(f"{line}\r\n".encode())
+
+    def sent(self):
+        return self.written.get(timeout=1)
+
+    def close(self):
+        pass
+
+
+def make_link():
+    ser = LoopbackSerial()
+    unsolicited = []
+    return SerialLink(ser, on_unsolicited=unsolicited.append), ser, unsolicited
+
+
+def test_late_ack_of_timed_out_display_does_not_resolve_the_next_one():
+    link, ser, unsolicited = make_link()
+    try:
+        assert link.display("első", timeout=0.05) is False
+        first = ser.sent()
+        second_future = link.display_async("második")
+        second = ser.sent()
+        assert first.startswith("#") and first.endswith(";DISPLAY;első")
+
+        ser.reply(first.split(";", 1)[0] + ";DISPLAY_OK")   # késő nyugta
+        assert link.wait(second_future, 0.2) is False
+        ser.reply(second.split(";", 1)[0] + ";DISPLAY_OK")
+        assert link.wait(second_future, 1) is True
+        assert unsolicited == []
+    finally:
+        link.close()
+
+
+def test_untagged_error_goes_to_the_oldest_open_by_send_time():
+    link, ser, _ = make_link()
+    try:
+        first_open, _ = link.open_locker_async(2)
+        ser.sent()
+        ser.reply("OPENED;2")
+        assert link.wait(first_open, 1) is True
+
+        older, _ = link.open_locker_async(5)
+        newer, _ = link.open_locker_async(2)
+        ser.reply("ERROR;INVALID_ID")   # régi firmware: előtag nélkül
+        assert link.wait(older, 1) is False
+        assert not newer.done()
+        ser.reply("OPENED;2")
+        assert link.wait(newer, 1) is True
+    finally:
+        link.close()
+
+
+def test_unanswered_async_display_does_not_shift_later_acks():
+    link, ser, _ = make_link()
+    try:
+        lost = link.display_async("elveszett")   # pl. a bootloader alatt
+        ser.sent()
+        answered = link.display_async("megjön")
+        tag = ser.sent().split(";", 1)[0]
+        ser.reply(f"{tag};DISPLAY_OK")
+        assert link.wait(answered, 1) is True
+        assert not lost.done()
+    finally:
+        link.close()
+
+
+def test_round_trip_against_fake_arduino():
+    fake = FakeArduino(close_delay=0.05)
+    link = SerialLink(serial.Serial(fake.port, 9600, timeout=0.1))
+    try:
+        assert link.wait_ready(timeout=2)
+        assert link.display("Üdv", timeout=1)
+        assert fake.display_text == "Üdv"
+        opened, closed = link.open_locker_async(3)
+        assert link.wait(opened, 1) is True
+        assert link.wait(closed, 1) is True
+        assert link.open_locker(99, timeout=1) is False
+    finally:
+        link.close()
+        fake.close()
@@ -0,0 +1,145 @@
+"""Ugyanazok az ellenőrzések mindkét backenden (a régi storage.py self-check helyett)."""
+import time
+from datetime import datetime
+
+import pytest
+
+import audit
+import bulkApply
+import checkinPlan
+import storage
+
+BOOKING = {"id": 990001, "checkInToken": "selfcheck-token", "checkInstatus": "checkedIn"}
+
+
+@pytest.fixture
+def cur(backend):
+    with storage.connection() as conn:
+        cursor = conn.cursor()
+        bulkApply.apply_table(cursor, bulkApply.SyncReport(), "bookings", [BOOKING], ("id",), keep=set())
+        bulkApply.apply_table(cursor, bulkApply.SyncReport(), "rooms", [{"id": 990001, "name": "SC-1"}],
+                              ("id",), keep=set())
+        bulkApply.apply_table(cursor, bulkApply.SyncReport(), "relations",
+                              [{"booking_id": 990001, "rooms_id": 990001}], ("booking_id", "rooms_id"), keep=set())
+        bulkApply.apply_table(cursor, bulkApply.SyncReport(), "rfidConnections",
+                              [{"rfidKey": "SCKEY", "roomId": 990001, "roomName": "SC-1"}], ("rfidKey",), keep=set())
+        checkinPlan.set_locker(cursor, "SCKEY", 3, 1, 4)
+        checkinPlan.rebuild(cursor)
+        conn.commit()
+        yield cursor
+        cursor.close()
+
+
+def test_upsert_counts_only_real_changes(cur):
+    again = bulkApply.SyncReport()
+    bulkApply.apply_table(cur, again, "bookings", [BOOKING], ("id",), keep=set())
+    stats = again.table("bookings")
+    assert (stats.inserted, stats.updated) == (0, 0), stats.as_dict()
+
+    changed = bulkApply.SyncReport()
+    bulkApply.apply_table(cur, changed, "bookings", [dict(BOOKING, status="x")], ("id",), keep=set())
+    stats = changed.table("bookings")
+    assert (stats.inserted, stats.updated) == (0, 1), stats.as_dict()
+
+
+def test_stream_skips_rows_with_unchanged_digest(cur):
+    report = bulkApply.SyncReport()
+    for _ in range(2):
+        stream = bulkApply.TableStream(cur, report, "bookings", ("id",), partition=("hotelId", 1))
+        stream.add([dict(BOOKING, status="x", hotelId=1)])
+        stream.flush()
+    stats = report.table("bookings")
+    # Először újraírja (még nincs lenyomata), másodszor ki sem írja
+    assert (stats.inserted, stats.updated, stats.unchanged) == (0, 1, 1), stats.as_dict()
+
+
+def test_checkin_plan_lookup(cur):
+    assert checkinPlan.lookup(cur, "selfcheck-token") == (990001, "checkedIn", [13])
+    assert checkinPlan.lookup(cur, "nope") is None
+
+
+def test_door_access_query(cur):
+    validator = pytest.importorskip("validator")
+    assert validator._query_allowed(cur, "SCKEY", "SC-1")
+    assert not validator._query_allowed(cur, "NOPE", "SC-1")
+    # Saját kapcsolatot nyit, a fixture commitja után látja a sorokat
+    assert ("SCKEY", "SC-1") in validator.load_allowed_pairs()
+
+
+def test_door_access_is_scoped_to_the_process_hotel(cur, monkeypatch):
+    validator = pytest.importorskip("validator")
+    import hotels
+
+    # A 2. hotelben is van SC-1 szoba, saját kártyával és bent lévő vendéggel
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), "bookings", [dict(BOOKING, id=990002, hotelId=2)],
+                          ("id",), keep=set())
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), "rooms", [{"id": 990002, "name": "SC-1", "hotelId": 2}],
+                          ("id",), keep=set())
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), "relations",
+                          [{"booking_id": 990002, "rooms_id": 990002, "hotelId": 2}], ("booking_id", "rooms_id"),
+                          keep=set())
+    bulkApply.apply_table(cur, bulkApply.SyncReport(), "rfidConnections",
+                          [{"rfidKey": "OTHER", "roomId": 990002, "roomName": "SC-1", "hotelId": 2}],
+                          ("rfidKey",), keep=set())
+    monkeypatch.setattr(hotels, "HOTELS", {1: {}, 2: {}})
+
+    monkeypatch.setattr(validator, "HOTEL_ID", None)
+    with pytest.raises(ValueError):
+        validator._query_allowed(cur, "OTHER", "SC-1")
+
+    monkeypatch.setattr(validator, "HOTEL_ID", 1)
+    assert validator._query_allowed(cur, "SCKEY", "SC-1")
+    assert not validator._query_allowed(cur, "OTHER", "SC-1")
+    monkeypatch.setattr(validator, "HOTEL_ID", 2)
+    assert validator._query_allowed(cur, "OTHER", "SC-1")
+    assert not validator._query_allowed(cur, "SCKEY", "SC-1")
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    # UTC-től eltérő helyi idő, mint a szállodában; enélkül az eltolás nem látszana
+    monkeypatch.setenv("TZ", "Europe/Budapest")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_outbox_age_uses_the_same_clock(cur, local_tz):
+    pytest.importorskip("requests")
+    import outbox
+
+    outbox.enqueue(cur, 990001, {"checkInstatus": "checkedIn"})
+    depth, oldest = outbox.queue_depth(cur)
+    # Frissen sorba állított kérés: a kora ~0, nem az UTC eltolás órái
+    assert depth == 1 and oldest is not None and 0 <= oldest <= 5, (depth, oldest)
+
+    # Helyi időként kötött és az alapértelmezett created_at is ugyanabban az időben van
+    for sql, args in (("INSERT INTO pending_requests (booking_id, payload, created_at) VALUES (%s, %s, %s)",
+                       (990001, "{}", datetime.now())),
+                      ("INSERT INTO pending_requests (booking_id, payload) VALUES (%s, %s)", (990001, "{}"))):
+        cur.execute("DELETE FROM pending_requests")
+        cur.execute(sql, args)
+        depth, oldest = outbox.queue_depth(cur)
+        assert depth == 1 and 0 <= oldest <= 5, (sql, oldest)
+
+
+def test_audit_timestamp_keeps_milliseconds(backend):
+    log = audit.AuditLog()
+    log.record("door", card="SCKEY", door="SC-1", result="ALLOW", hotel=1)
+    assert log.flush() == 1
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT ts FROM audit_log")
+        ts = cur.fetchone()["ts"]
+        cur.close()
+    assert isinstance(ts, datetime)
+    assert abs((datetime.now() - ts).total_seconds()) < 5
+
+    with storage.connection() as conn:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO audit_log (ts, kind) VALUES (%s, 'door')", (datetime(2024, 5, 1, 12, 0, 0, 123000),))
+        cur.execute("SELECT ts FROM audit_log WHERE kind='door' ORDER BY ts LIMIT 1")
+        assert cur.fetchone()["ts"] == datetime(2024, 5, 1, 12, 0, 0, 123000)
+        conn.rollback()
+        cur.close()
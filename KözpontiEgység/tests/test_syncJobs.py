@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+from syncJobs import SyncCoordinator
+
+
+class Report:
+    def __init__(self, n):
+        self.n = n
+
+    def as_dict(self):
+        return {"n": self.n}
+
+
+class BlockingSync:
+    """run_sync helyett: minden hívás egy Event-re vár (executor szálon), a force értékeket rögzíti."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def __call__(self, force):
+        self.calls.append(force)
+        self.started.set()
+        if not self.release.wait(5):
+            raise TimeoutError("a teszt nem engedte el a szinkront")
+        return Report(len(self.calls))
+
+
+async def wait_for(predicate, timeout=2):
+    for _ in range(int(timeout / 0.005)):
+        if predicate():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("nem teljesült időben")
+
+
+def test_triggers_while_running_coalesce_into_one_pending_job():
+    async def scenario():
+        sync = BlockingSync()
+        coordinator = SyncCoordinator(sync)
+        finished = []
+        coordinator.add_listener(finished.append)
+
+        running = coordinator.trigger()
+        await wait_for(sync.started.is_set)
+        # A szinkron executorban blokkol, az event loop közben szabad
+        pending = [coordinator.trigger(), coordinator.trigger(force=True), coordinator.trigger()]
+        assert pending[0] is pending[1] is pending[2] is not running
+        assert (pending[0].callers, pending[0].force, pending[0].status) == (3, True, "queued")
+
+        sync.release.set()
+        assert await running.future == {"n": 1}
+        assert await pending[0].future == {"n": 2}
+        assert sync.calls == [False, True]
+        assert [job.id for job in finished] == [running.id, pending[0].id]
+        assert not coordinator.running
+        assert coordinator.get(running.id).as_dict()["status"] == "done"
+
+    asyncio.run(scenario())
+
+
+def test_failed_sync_fails_the_job_and_frees_the_slot():
+    async def scenario():
+        def broken(force):
+            raise ConnectionError("backend nem elérhető")
+
+        coordinator = SyncCoordinator(broken)
+        finished = []
+        coordinator.add_listener(finished.append)
+        job = coordinator.trigger()
+        with pytest.raises(ConnectionError):
+            await job.future
+        await wait_for(lambda: finished)
+        assert (job.status, job.error) == ("failed", "backend nem elérhető")
+        assert not coordinator.running
+        assert coordinator.trigger() is not job
+
+    asyncio.run(scenario())
+
+
+def test_listener_error_does_not_block_the_next_job():
+    async def scenario():
+        coordinator = SyncCoordinator(lambda force: None)
+        coordinator.add_listener(lambda job: 1 / 0)
+        first = coordinator.trigger()
+        assert await first.future is None
+        second = coordinator.trigger()
+        assert await second.future is None
+
+    asyncio.run(scenario())
+
+
+def test_history_is_bounded():
+    async def scenario():
+        coordinator = SyncCoordinator(lambda force: None, history=3)
+        jobs = []
+        for _ in range(5):
+            jobs.append(coordinator.trigger())
+            await jobs[-1].future
+        assert [coordinator.get(job.id) is not None for job in jobs] == [False, False, True, True, True]
+
+    asyncio.run(scenario())
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from syncScheduler import SyncScheduler
+
+
+class FakeCoordinator:
+    running = False
+
+    def add_listener(self, callback):
+        self.callback = callback
+
+
+def finished(status, at, result=None, error=None):
+    return SimpleNamespace(status=status, finished=at, result=result, error=error)
+
+
+def test_hotel_errors_count_as_failure():
+    coordinator = FakeCoordinator()
+    scheduler = SyncScheduler(coordinator, clock=lambda: 1000.0)
+    coordinator.callback(finished("done", 100.0, {"hotels": {1: None}, "errors": {}}))
+    assert (scheduler.last_success, scheduler.failures) == (100.0, 0)
+
+    coordinator.callback(finished("done", 200.0, {"hotels": {2: None}, "errors": {1: "backend HTTP 500 (hotel 1)"}}))
+    coordinator.callback(finished("failed", 300.0, error="backend HTTP 401 (hotel 1)"))
+
+    status = scheduler.status()
+    assert status["last_success"] == 100.0
+    assert status["staleness_seconds"] == 900.0
+    assert status["consecutive_failures"] == 2
+    assert status["last_error"] == "backend HTTP 401 (hotel 1)"
+    assert status["last_attempt"] == 300.0
+
+    coordinator.callback(finished("done", 400.0, None))
+    assert (scheduler.last_success, scheduler.failures, scheduler.last_error) == (400.0, 0, None)
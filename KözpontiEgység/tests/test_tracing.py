@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture
+def slow_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path))
+    monkeypatch.setattr(tracing, "_service", "teszt")
+    monkeypatch.setitem(tracing.SLOW_THRESHOLDS, "lassu", 0.0)
+    monkeypatch.setitem(tracing.SLOW_THRESHOLDS, "gyors", 60.0)
+    return tmp_path
+
+
+def test_span_without_trace_is_a_no_op():
+    with tracing.span("semmi"):
+        pass
+    tracing.add("kivul", 0.1)
+    assert tracing.current() is None
+
+
+def test_spans_are_recorded_with_offsets_and_nesting(slow_dir):
+    with tracing.trace("gyors", door="101") as t:
+        t.add("queue", 0.5, end=t.start + 0.5)        # a trace előtt mért várakozás
+        with tracing.span("kulso"):
+            with tracing.span("belso"):
+                pass
+    names = [name for name, _, _ in t.stages]
+    assert names == ["queue", "belso", "kulso"]
+    (_, queue_at, queue_s), (_, inner_at, inner_s), (_, outer_at, outer_s) = t.stages
+    assert queue_at == pytest.approx(0) and queue_s == 0.5
+    assert outer_at <= inner_at and inner_at + inner_s <= outer_at + outer_s
+    assert tracing.current() is None
+    assert tracing.slow_events(directory=str(slow_dir)) == []      # küszöb alatt
+
+
+def test_nested_trace_is_a_new_root_and_restores_the_parent(slow_dir):
+    with tracing.trace("gyors") as outer:
+        with tracing.trace("gyors") as inner:
+            with tracing.span("belso"):
+                pass
+        assert tracing.current() is outer
+    assert [s[0] for s in inner.stages] == ["belso"] and outer.stages == []
+
+
+def test_bind_carries_the_trace_into_a_worker_thread(slow_dir):
+    def work():
+        with tracing.span("pool"):
+            return tracing.current()
+
+    with ThreadPoolExecutor(1) as pool, tracing.trace("gyors") as t:
+        assert pool.submit(work).result() is None                 # a pool nem örökli
+        assert pool.submit(tracing.bind(work)).result() is t
+    assert [s[0] for s in t.stages] == ["pool"]
+
+
+def test_slow_trace_is_logged_with_fields_and_error(slow_dir):
+    with pytest.raises(ValueError):
+        with tracing.trace("lassu", booking=7):
+            with tracing.span("db"):
+                raise ValueError("hiba")
+
+    (event,) = tracing.slow_events(directory=str(slow_dir))
+    assert event["service"] == "teszt" and event["trace"] == "lassu"
+    assert event["fields"] == {"booking": 7, "error": "ValueError('hiba')"}
+    assert [s[0] for s in event["stages"]] == ["db"]
+
+
+def test_slow_log_rotates_and_reads_per_service(slow_dir, monkeypatch):
+    monkeypatch.setattr(tracing, "SLOW_LOG_MAX_BYTES", 10)
+    for i in range(3):
+        with tracing.trace("lassu", n=i):
+            pass
+    monkeypatch.setattr(tracing, "_service", "masik")
+    with tracing.trace("lassu", n=3):
+        pass
+
+    assert (slow_dir / "teszt.slow.jsonl.1").exists()
+    assert [e["fields"]["n"] for e in tracing.slow_events(service="teszt", directory=str(slow_dir))] == [2]
+    assert [e["fields"]["n"] for e in tracing.slow_events(directory=str(slow_dir))] == [2, 3]
+    assert [e["fields"]["n"] for e in tracing.slow_events(limit=1, directory=str(slow_dir))] == [3]
+
+
+def parked(stop):
+    stop.wait()
+
+
+def test_profiler_samples_other_threads_as_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=parked, args=(stop,), name="parkolo")
+    worker.start()
+    try:
+        counts = tracing.sample(0.05, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+    stacks = [s for s in counts if s.startswith("parkolo;")]
+    assert stacks and "test_tracing:parked" in stacks[0]
+    assert not any("test_tracing:test_profiler" in s for s in counts)   # a mintavevő szál kimarad
+    assert tracing.collapsed({"a;b": 2, "a": 1}) == "a 1\na;b 2\n"
+
+
+def test_profile_request_round_trip_through_the_agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "_service", tracing._service)
+    tracing.start_agent("agent-teszt", directory=str(tmp_path), poll=0.01)
+    text = tracing.request_profile("agent-teszt", 0.05, interval=0.01, directory=str(tmp_path), timeout=5)
+    assert "tracing:request_profile" in text      # a kérő szál várakozás közben
+    assert not list(tmp_path.iterdir())          # kérés és eredmény is eltakarítva
+
+
+def test_unanswered_profile_request_times_out_and_is_removed(tmp_path):
+    start = time.monotonic()
+    assert tracing.request_profile("senki", 0.05, directory=str(tmp_path), timeout=0.3) is None
+    assert time.monotonic() - start < 2
+    assert not list(tmp_path.iterdir())
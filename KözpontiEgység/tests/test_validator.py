@@ -0,0 +1,145 @@
+import json
+import queue
+import threading
+import time
+
+import pytest
+
+mqtt = pytest.importorskip("paho.mqtt.client")
+import validator  # noqa: E402
+from authSig import simple_sig  # noqa: E402
+from fakeBroker import FakeBroker  # noqa: E402
+
+WORKERS = 2
+QUEUE_SIZE = 4
+
+
+class DoorClient:
+    """Ajtó terminálok egy MQTT kliensen: kérés küldése, válaszok ts szerint."""
+
+    def __init__(self, broker):
+        self.results = queue.Queue()
+        self._ts = {}
+        self._lock = threading.Lock()
+        self.client = mqtt.Client(client_id="test-doors")
+        self.client.on_message = lambda c, u, msg: self.results.put(
+            (msg.topic.split("/")[1], json.loads(msg.payload)))
+        self.client.connect(broker.host, broker.port)
+        self.client.subscribe("hotel/+/result", qos=1)
+        self.client.loop_start()
+
+    def request(self, card, door):
+        with self._lock:
+            ts = self._ts[door] = self._ts.get(door, 1000) + 1
+        body = {"cardID": card, "doorID": door, "ts": ts, "sig": simple_sig(card, door, ts)}
+        self.client.publish(f"hotel/{door}/auth", json.dumps(body), qos=1)
+        return ts
+
+    def collect(self, n, timeout=5):
+        out = []
+        deadline = time.monotonic() + timeout
+        while len(out) < n and time.monotonic() < deadline:
+            try:
+                out.append(self.results.get(timeout=0.05))
+            except queue.Empty:
+                pass
+        return out
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+@pytest.fixture(scope="module")
+def rig():
+    # Kis sor és kevés worker, hogy a torlódás determinisztikusan előállítható legyen;
+    # a workerek a modul globális sorát olvassák, ezért indítás előtt cseréljük
+    validator.auth_queue = queue.Queue(maxsize=QUEUE_SIZE)
+    validator.ENQUEUE_TIMEOUT = 0.01
+    broker = FakeBroker().start()
+    validator.start_workers(count=WORKERS, interval=3600)
+    service = mqtt.Client(client_id="test-validator",
+                          userdata={"topic": validator.AUTH_TOPIC, "shard": None})
+    service.on_connect = validator.on_connect
+    service.on_message = validator.on_message
+    service.connect(broker.host, broker.port)
+    service.loop_start()
+    deadline = time.monotonic() + 5
+    while broker.subscribers("hotel/x/auth") == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    doors = DoorClient(broker)
+    yield doors
+    doors.close()
+    service.loop_stop()
+    service.disconnect()
+    broker.stop()
+
+
+@pytest.fixture
+def decide(monkeypatch):
+    """A teszt dönti el (és késlelteti) az engedélyezést, DB nélkül."""
+    rules = {}
+
+    def is_allowed(card, door):
+        rule = rules.get(door)
+        if isinstance(rule, threading.Event):
+            rule.wait(5)
+            return True
+        return rule if rule is not None else True
+
+    monkeypatch.setattr(validator, "is_allowed", is_allowed)
+    return rules
+
+
+def test_every_request_is_answered_and_counted(rig, decide):
+    decide["D2"] = False
+    before = validator.stats_snapshot()
+    # Ajtónként 25 kérés; a kis sor ne teljen be, itt a számlálást nézzük
+    for door in ("D1", "D2", "D3", "D4"):
+        for _ in range(25):
+            rig.request("CARD", door)
+            time.sleep(0.002)
+        replies = rig.collect(25)
+        assert len(replies) == 25
+        expected = "DENY" if door == "D2" else "OK"
+        assert {(d, r["accessResult"]) for d, r in replies} == {(door, expected)}
+
+    after = validator.stats_snapshot()
+    counted = sum(after[k] - before[k] for k in ("allowed", "denied", "rejected"))
+    assert counted == 100
+    assert after["rejected"] == before["rejected"]
+    assert after["errors"] == before["errors"]
+
+
+def test_slow_door_does_not_hold_up_other_doors(rig, decide):
+    gate = decide["SLOW"] = threading.Event()
+    try:
+        rig.request("CARD", "SLOW")
+        time.sleep(0.1)   # az egyik worker a lassú ajtón áll
+        rig.request("CARD", "FAST")
+        door, reply = rig.collect(1, timeout=2)[0]
+        assert door == "FAST" and reply["accessResult"] == "OK"
+    finally:
+        gate.set()
+    door, reply = rig.collect(1)[0]
+    assert door == "SLOW" and reply["accessResult"] == "OK"
+
+
+def test_full_queue_denies_immediately(rig, decide):
+    gate = decide["BUSY"] = threading.Event()
+    before = validator.stats_snapshot()
+    total = WORKERS + QUEUE_SIZE + 6
+    try:
+        for _ in range(total):
+            rig.request("CARD", "BUSY")
+            time.sleep(0.02)   # külön üzenetek, nem egy köteg
+        early = rig.collect(total, timeout=1)
+        # Amíg a workerek állnak, csak a túlterhelés miatti DENY-ok jöttek meg
+        assert early and all(reply["accessResult"] == "DENY" for _, reply in early)
+    finally:
+        gate.set()
+    late = rig.collect(total - len(early))
+    assert len(early) + len(late) == total
+    assert all(reply["accessResult"] == "OK" for _, reply in late)
+    rejected = validator.stats_snapshot()["rejected"] - before["rejected"]
+    assert rejected == len(early)
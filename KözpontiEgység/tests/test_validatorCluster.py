@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+import pytest
+
+import validator
+import validatorCluster
+from latency import LatencyTracker, merge_snapshots
+from validatorCluster import ValidatorCluster
+
+
+def test_every_door_has_exactly_one_owner():
+    doors = [f"door-{i}" for i in range(50)]
+    for door in doors:
+        topic = f"hotel/{door}/auth"
+        owners = [i for i in range(3) if validator.owns_topic(topic, (i, 3))]
+        assert owners == [validator.shard_of(door, 3)]
+    # crc32: nem függ a folyamat hash seedjétől, és nagyjából egyenletes
+    assert len({validator.shard_of(d, 3) for d in doors}) == 3
+
+
+def test_owns_topic_without_shard_or_with_foreign_topic():
+    assert validator.owns_topic("hotel/x/auth", None)
+    assert not validator.owns_topic("hotel/x/auth/extra", (validator.shard_of("x", 2), 2))
+
+
+def test_worker_topic_per_mode():
+    assert validatorCluster.worker_topic("shared", "g") == f"$share/g/{validator.AUTH_TOPIC}"
+    assert validatorCluster.worker_topic("shard") == validator.AUTH_TOPIC
+    with pytest.raises(ValueError):
+        ValidatorCluster(mode="round-robin")
+
+
+def test_merge_snapshots_pools_samples_per_door():
+    a, b = LatencyTracker(), LatencyTracker()
+    for ms in (1, 2, 3):
+        a.record("d1", ms / 1000)
+    b.record("d1", 0.010)
+    b.record("d2", 0.005)
+    merged = merge_snapshots([a.snapshot(), b.snapshot()])
+    assert merged["d1"]["count"] == merged["d1"]["total"] == 4
+    assert merged["d1"]["max_ms"] == 10.0
+    assert merged["d2"]["p50_ms"] == 5.0
+
+
+class FakeProcess:
+    def __init__(self, alive=True, exitcode=None):
+        self.pid = 1234
+        self.alive = alive
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return self.alive
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    c = ValidatorCluster(count=2)
+    c._running = True
+    spawned = []
+
+    def spawn(slot):
+        spawned.append(slot.index)
+        slot.process = FakeProcess()
+        slot.started_at = clock[0]
+
+    clock = [100.0]
+    monkeypatch.setattr(c, "_spawn", spawn)
+    # csak a modul órája áll: a globális time.monotonic-ra a logs szál is támaszkodik
+    monkeypatch.setattr(validatorCluster, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    for slot in c._slots:
+        spawn(slot)
+    spawned.clear()
+    return c, spawned, clock
+
+
+def test_dead_worker_restarts_with_growing_backoff(cluster):
+    c, spawned, clock = cluster
+    slot = c._slots[1]
+    for wait in (1, 2, 4):
+        slot.process.alive, slot.process.exitcode = False, -9
+        c.check()
+        assert slot.process is None and slot.last_exit == -9
+        clock[0] += wait - 0.5
+        c.check()
+        assert spawned == []                 # még a várakozási időn belül
+        clock[0] += 0.5
+        c.check()
+        assert spawned == [1]
+        spawned.clear()
+    assert slot.restarts == 3 and slot.backoff == 8
+
+    clock[0] += validatorCluster.STABLE_SECONDS
+    c.check()
+    assert slot.backoff == 1                 # stabil futás után visszaáll
+
+
+def test_stats_sum_counters_and_drop_dead_worker(cluster):
+    c, spawned, clock = cluster
+    tracker = LatencyTracker()
+    tracker.record("d1", 0.002)
+    c._latest = {
+        0: {"index": 0, "stats": {"allowed": 3, "denied": 1}, "latency": tracker.snapshot(), "queue": 2},
+        1: {"index": 1, "stats": {"allowed": 4}, "latency": tracker.snapshot(), "queue": 0},
+    }
+    summary = c.stats()
+    assert summary["totals"] == {"allowed": 7, "denied": 1}
+    assert summary["latency"]["d1"]["total"] == 2
+    assert [p["queue"] for p in summary["processes"]] == [2, 0]
+
+    c._slots[1].process.alive = False
+    c.check()
+    assert c.stats()["totals"] == {"allowed": 3, "denied": 1}
@@ -0,0 +1,306 @@
+"""
+Szakaszonkénti időmérés, lassú események naplója és igény szerinti profilozás
+a központi egység folyamataihoz (validator, kioszk, server/szinkron).
+
+    with tracing.trace("door_auth", door=room) as t:   # egy kérés
+        t.add("queue", várakozás)                       # kívül mért szakasz
+        with tracing.span("access"):                    # mért szakasz
+            ...
+
+A span() az aktuális trace-hez (contextvars: szálanként / asyncio taskonként)
+adja a szakasz idejét és a hotelflow_span_seconds hisztogramba is mér; trace
+nélkül is olcsó. Ha egy trace tovább tart a SLOW_THRESHOLDS szerinti
+küszöbnél, a teljes szakaszbontása a TRACE_DIR/<service>.slow.jsonl-be kerül.
+
+A mintavételező profilozó (sample()) sys._current_frames()-szel gyűjt
+összevont (collapsed) stackeket, flamegraph.pl / speedscope formátumban.
+A külön folyamatok start_agent()-tel figyelik a server.py /debug/profile
+végpontja által letett kérésfájlt (ugyanaz a könyvtár-alapú csere, mint a
+metrics pillanatképeinél).
+"""
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import logs
+import metrics
+
+# -------- CONFIG --------
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces")
+SLOW_DEFAULT = 1.0                # másodperc, ha a trace-nek nincs saját küszöbe
+SLOW_THRESHOLDS = {
+    "door_auth": 0.2,             # az ajtó terminál ennél sokkal tovább nem vár
+    "checkin": 90.0,              # szekrény nyitás + visszazárás várással együtt
+    "qr_decode": 0.5,
+    "sync": 10.0,
+    "http": 1.0,
+}
+SLOW_LOG_MAX_BYTES = 1024 * 1024  # fölötte <service>.slow.jsonl.1-re forgatunk
+PROFILE_INTERVAL = 0.01           # mintavételi időköz
+PROFILE_MAX_SECONDS = 60
+PROFILE_POLL_INTERVAL = 1.0       # az ügynök ennyi időnként nézi a kérésfájlt
+
+logger = logs.get("tracing")
+
+SPAN_SECONDS = metrics.histogram("hotelflow_span_seconds", "Szakaszidők trace-enként", ("trace", "span"))
+SLOW_EVENTS = metrics.counter("hotelflow_slow_events_total", "Küszöb fölötti trace-ek", ("trace",))
+
+_current = contextvars.ContextVar("hotelflow_trace", default=None)
+_service = "server"
+_slow_lock = threading.Lock()
+
+
+# -------- TRACE / SPAN --------
+class Trace:
+    __slots__ = ("name", "start", "fields", "stages")
+
+    def __init__(self, name, start=None, fields=None):
+        self.name = name
+        self.start = time.perf_counter() if start is None else start
+        self.fields = fields or {}
+        self.stages = []
+
+    def add(self, span, seconds, end=None):
+        # A szakasz vége (alapból most) alapján a kezdete is megmarad: beágyazott
+        # és párhuzamos szakaszoknál is olvasható idővonal
+        end = time.perf_counter() if end is None else end
+        self.stages.append((span, end - seconds - self.start, seconds))
+        SPAN_SECONDS.observe(seconds, self.name, span)
+
+    def finish(self):
+        total = time.perf_counter() - self.start
+        if total >= SLOW_THRESHOLDS.get(self.name, SLOW_DEFAULT):
+            SLOW_EVENTS.inc(self.name)
+            _write_slow({
+                "ts": round(time.time(), 3),
+                "service": _service,
+                "trace": self.name,
+                "ms": round(total * 1000, 3),
+                "fields": self.fields,
+                # [szakasz, kezdet ms a trace elejétől, időtartam ms]
+                "stages": [[span, round(at * 1000, 3), round(seconds * 1000, 3)] for span, at, seconds in self.stages],
+            })
+        return total
+
+
+class trace:
+    """
+    Egy kérés/esemény gyökere. `start`: perf_counter érték, ha a kérés
+    korábban (pl. a hálózati szálon) érkezett. Mindig új gyökér, akkor is,
+    ha a hívó egy másik trace-en belül van (pl. to_thread-ben futó szinkron).
+    """
+    __slots__ = ("_trace", "_token")
+
+    def __init__(self, name, start=None, **fields):
+        self._trace = Trace(name, start, fields)
+
+    def __enter__(self):
+        self._token = _current.set(self._trace)
+        return self._trace
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc_type is not None:
+            self._trace.fields["error"] = repr(exc)[:200]
+        self._trace.finish()
+        return False
+
+
+class span:
+    """Egy szakasz ideje az aktuális trace-hez; trace nélkül nem mér semmit."""
+    __slots__ = ("_name", "_trace", "_start")
+
+    def __init__(self, name):
+        self._name = name
+
+    def __enter__(self):
+        self._trace = _current.get()
+        if self._trace is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._trace is not None:
+            end = time.perf_counter()
+            self._trace.add(self._name, end - self._start, end)
+        return False
+
+
+class timed:
+    """Hisztogram mérés + azonos nevű span egyben (pl. a DB lekérdezéseknél)."""
+    __slots__ = ("_histogram", "_labels", "_trace", "_start")
+
+    def __init__(self, histogram, *labels):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._trace = _current.get()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        elapsed = end - self._start
+        self._histogram.observe(elapsed, *self._labels)
+        if self._trace is not None:
+            self._trace.add(":".join(map(str, self._labels)) or self._histogram.name, elapsed, end)
+        return False
+
+
+def current():
+    return _current.get()
+
+
+def add(span, seconds, end=None):
+    """Kívül mért szakasz az aktuális trace-hez (ha van)."""
+    t = _current.get()
+    if t is not None:
+        t.add(span, seconds, end)
+
+
+def bind(fn):
+    """fn a hívó trace-ével fut (pl. ThreadPoolExecutor feladatként, ami nem örökli)."""
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+# -------- LASSÚ ESEMÉNYEK --------
+def _slow_path(service):
+    return os.path.join(TRACE_DIR, f"{service}.slow.jsonl")
+
+
+def _write_slow(event):
+    path = _slow_path(_service)
+    line = json.dumps(event, default=str) + "\n"
+    with _slow_lock:
+        try:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > SLOW_LOG_MAX_BYTES:
+                os.replace(path, path + ".1")
+            with open(path, "a") as f:
+                f.write(line)
+        except OSError as e:
+            logger.warning("⚠️ Lassú esemény nem írható", error=e)
+
+
+def slow_events(limit=50, service=None, directory=None):
+    """A legutóbbi lassú események (minden folyamaté, vagy egy service-é), időrendben."""
+    directory = directory or TRACE_DIR
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".slow.jsonl")]
+    except FileNotFoundError:
+        return []
+    if service is not None:
+        names = [n for n in names if n == f"{service}.slow.jsonl"]
+    events = []
+    for name in names:
+        with open(os.path.join(directory, name)) as f:
+            for line in f.readlines()[-limit:]:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    events.sort(key=lambda e: e.get("ts", 0))
+    return events[-limit:]
+
+
+# -------- PROFILOZÓ --------
+def sample(seconds, interval=PROFILE_INTERVAL):
+    """
+    Fali idő szerinti mintavétel az összes szálról (a várakozók is
+    látszanak: pl. DB socket olvasás, soros várakozás). Visszatér:
+    Counter({"szál;modul:függvény;...": minták száma}).
+    """
+    me = threading.get_ident()
+    counts = Counter()
+    deadline = time.monotonic() + min(seconds, PROFILE_MAX_SECONDS)
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)[:-3]}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+def collapsed(counts):
+    """Összevont stack formátum: soronként "a;b;c N"."""
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(counts.items()))
+
+
+def _request_path(service, directory):
+    return os.path.join(directory, f"{service}.profile-request")
+
+
+def _result_path(service, request_id, directory):
+    return os.path.join(directory, f"{service}.profile-{request_id}.collapsed")
+
+
+def request_profile(service, seconds, interval=PROFILE_INTERVAL, directory=None, timeout=None):
+    """
+    Profil kérése egy másik folyamattól (start_agent-tel fut); blokkol, amíg
+    az eredmény meg nem jön. None, ha a folyamat nem válaszolt időben.
+    """
+    directory = directory or TRACE_DIR
+    os.makedirs(directory, exist_ok=True)
+    seconds = min(seconds, PROFILE_MAX_SECONDS)
+    request_id = f"{os.getpid()}-{time.monotonic_ns()}"
+    path = _request_path(service, directory)
+    with open(path + ".tmp", "w") as f:
+        json.dump({"id": request_id, "seconds": seconds, "interval": interval}, f)
+    os.replace(path + ".tmp", path)
+
+    result = _result_path(service, request_id, directory)
+    deadline = time.monotonic() + (timeout or seconds + PROFILE_POLL_INTERVAL * 2 + 2)
+    while time.monotonic() < deadline:
+        if os.path.exists(result):
+            with open(result) as f:
+                text = f.read()
+            os.remove(result)
+            return text
+        time.sleep(0.1)
+    # Senki nem vette fel: a kérést se hagyjuk ott a következő indulásra
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def start_agent(service, directory=None, poll=PROFILE_POLL_INTERVAL):
+    """A folyamat neve a lassú eseményekhez + háttérszál, amely a profil kéréseket kiszolgálja."""
+    global _service
+    _service = service
+    directory = directory or TRACE_DIR
+    path = _request_path(service, directory)
+
+    def loop():
+        while True:
+            time.sleep(poll)
+            try:
+                with open(path) as f:
+                    request = json.load(f)
+                os.remove(path)
+            except (FileNotFoundError, ValueError):
+                continue
+            text = collapsed(sample(request["seconds"], request.get("interval", PROFILE_INTERVAL)))
+            result = _result_path(service, request["id"], directory)
+            with open(result + ".tmp", "w") as f:
+                f.write(text)
+            os.replace(result + ".tmp", result)
+
+    thread = threading.Thread(target=loop, name="profile-agent", daemon=True)
+    thread.start()
+    return thread
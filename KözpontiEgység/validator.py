@@ -1,80 +1,150 @@
 import json
-import pymysql
+import os
+import queue
+import threading
+import time
+import zlib
 import paho.mqtt.client as mqtt
+from accessCache import AccessCache
+from authSig import simple_sig, verify_batch
+from replayGuard import ReplayGuard
+from latency import LatencyTracker
+import audit
+import hotels
+import logs
+import metrics
+import schema
+import storage
+import tracing
 
 # -------- CONFIG --------
 MQTT_BROKER = "192.168.1.35"
 MQTT_PORT = 1883
+CLIENT_ID = "hotel-auth-service-001"
+AUTH_TOPIC = "hotel/+/auth"
 
-DB_CONFIG = {
-    "host": "127.0.0.1",
-    "user": "appuser",
-    "password": "123",
-    "database": "hotelflowLocal"
-}
-
-# -------- SIMPLE SIG (UGYANAZ, MINT ARDUINO) --------
-def simple_sig(cardID: str, doorID: str, ts: int) -> int:
-    s = 0xBEEF
-    for c in cardID:
-        s ^= ord(c)
-        s = ((s << 5) | (s >> 11)) & 0xFFFF
-    for c in doorID:
-        s ^= ord(c)
-        s = ((s << 5) | (s >> 11)) & 0xFFFF
-    for i in range(4):
-        s ^= (ts >> (i*8)) & 0xFF
-        s = ((s << 3) | (s >> 13)) & 0xFFFF
-    return s
+WORKER_COUNT = 4          # párhuzamos auth feldolgozók (MySQL-nél ≤ dbPool.POOL_MAX_SIZE)
+QUEUE_SIZE = 256
+ENQUEUE_TIMEOUT = 0.05    # ennyit várhat a hálózati szál egy teli sorra
+STATS_INTERVAL = 60
+VERIFY_BATCH = 32         # egy worker egyszerre ennyi várakozó kérést ellenőriz
+HOTEL_ID = None           # None: az egyetlen beállított hotel; több épületnél kötelező (hotels.scope)
+
+logger = logs.get("validator")
+# Kívülről áradó hibás kérések: ezek ne temessék el a naplót
+logs.limit("Érvénytelen JSON")
+logs.limit("Hiányzó mezők")
+logs.limit("Érvénytelen ts/sig")
+logs.limit("Hibás aláírás")
+
+auth_queue = queue.Queue(maxsize=QUEUE_SIZE)
+latency = LatencyTracker()
+replay_guard = ReplayGuard()
+stats = {"allowed": 0, "denied": 0, "rejected": 0, "errors": 0}
+_stats_lock = threading.Lock()   # a workerek és a paho hálózati szála is számol
+
+AUTH_SECONDS = metrics.histogram("hotelflow_door_auth_seconds", "Ajtó auth: üzenet érkezésétől a válaszig")
+AUTH_RESULTS = metrics.counter("hotelflow_door_auth_total", "Ajtó auth válaszok", ("result",))
+AUTH_REJECTS = metrics.counter("hotelflow_door_auth_rejects_total", "Ajtó auth elutasítások és eldobások oka szerint", ("reason",))
 
 # -------- DB CHECK --------
-def is_allowed(card_id: str, room_name: str) -> bool:
-    import pymysql
+def query_allowed(card_id: str, room_name: str) -> bool:
+    with tracing.timed(metrics.DB_QUERY_SECONDS, "auth.query_allowed"), storage.connection() as conn:
+        cur = conn.cursor()
+        try:
+            return _query_allowed(cur, card_id, room_name)
+        finally:
+            cur.close()
 
-    conn = pymysql.connect(**DB_CONFIG)
-    cur = conn.cursor(pymysql.cursors.DictCursor)
+def _hotel():
+    return hotels.scope(HOTEL_ID)
 
-    try:
-        # 1️⃣ Szoba lekérése
-        cur.execute("SELECT * FROM rooms WHERE name = %s", (room_name,))
-        room = cur.fetchone()
-        if not room:
-            return False  # Szoba nem létezik
+def _hotel_filter(args):
+    args.append(_hotel())
+    return "AND rc.hotelId = %s"
+
+def _query_allowed(cur, card_id, room_name):
+    # Kulcs + szoba (név szerint) + checkedIn foglalás, mindig a folyamat hoteljében:
+    # az ajtó csak a szobanevét küldi, így egy másik hotel azonos nevű szobájának kártyája nem nyit
+    args = [card_id, room_name]
+    cur.execute(f"""
+        SELECT b.id
+        FROM rfidConnections rc
+        JOIN rooms ro ON ro.id = rc.roomId AND ro.hotelId = rc.hotelId
+        JOIN relations r ON r.rooms_id = rc.roomId
+        JOIN bookings b ON b.id = r.booking_id AND b.hotelId = rc.hotelId
+        WHERE rc.rfidKey = %s
+          AND ro.name = %s
+          AND b.checkInstatus = 'checkedIn'
+          {_hotel_filter(args)}
+        LIMIT 1
+    """, args)
+
+    record = cur.fetchone()
+    return record is not None
+
+# -------- ACCESS INDEX --------
+def load_allowed_pairs():
+    # Az összes jelenleg beengedhető (kártya, szoba) páros egyetlen lekérdezéssel
+    with tracing.timed(metrics.DB_QUERY_SECONDS, "auth.load_allowed_pairs"), storage.connection() as conn:
+        cur = conn.cursor()
+        try:
+            args = []
+            cur.execute(f"""
+                SELECT DISTINCT rc.rfidKey, ro.name
+                FROM rfidConnections rc
+                JOIN rooms ro ON ro.id = rc.roomId AND ro.hotelId = rc.hotelId
+                JOIN relations r ON r.rooms_id = rc.roomId
+                JOIN bookings b ON b.id = r.booking_id AND b.hotelId = rc.hotelId
+                WHERE b.checkInstatus = 'checkedIn'
+                  {_hotel_filter(args)}
+            """, args)
+            return [(row["rfidKey"], row["name"]) for row in cur.fetchall()]
+        finally:
+            cur.close()
 
-        room_id = room["id"]
+access_cache = AccessCache(rebuild=load_allowed_pairs, lookup=query_allowed)
 
-        # 2️⃣ Ellenőrzés: kulcs + foglalás + checkedIn
-        cur.execute("""
-            SELECT b.id
-            FROM rfidConnections rc
-            JOIN relations r ON r.rooms_id = rc.roomId
-            JOIN bookings b ON b.id = r.booking_id
-            WHERE rc.rfidKey = %s
-              AND rc.roomId = %s
-              AND b.checkInstatus = 'checkedIn'
-            LIMIT 1
-        """, (card_id, room_id))
+def is_allowed(card_id: str, room_name: str) -> bool:
+    return access_cache.is_allowed(card_id, room_name)
 
-        record = cur.fetchone()
-        return record is not None
 
-    finally:
-        cur.close()
-        conn.close()
+# -------- SHARDING --------
+def shard_of(door_id: str, count: int) -> int:
+    # Determinisztikus ajtó -> folyamat hozzárendelés (minden folyamatban ugyanaz)
+    return zlib.crc32(door_id.encode()) % count
 
+def owns_topic(topic: str, shard) -> bool:
+    if shard is None:
+        return True
+    index, count = shard
+    parts = topic.split("/")
+    return len(parts) == 3 and shard_of(parts[1], count) == index
 
 
 # -------- MQTT CALLBACKS --------
 def on_connect(client, userdata, flags, rc):
-    print("MQTT connected:", rc)
-    client.subscribe("hotel/+/auth")
+    logger.info("MQTT kapcsolódva", rc=rc)
+    client.subscribe(userdata["topic"])
 
 def on_message(client, userdata, msg):
+    # A paho hálózati szála csak sorba tesz, a DB munka a workereken fut
+    received = time.perf_counter()
+    if not owns_topic(msg.topic, userdata["shard"]):
+        return  # másik folyamat ajtaja
+    try:
+        auth_queue.put((client, msg.payload, received), timeout=ENQUEUE_TIMEOUT)
+    except queue.Full:
+        count_stat("rejected")
+        AUTH_REJECTS.inc("busy")
+        reject_busy(client, msg.payload, received)
+
+def parse_auth(raw):
     try:
-        payload = json.loads(msg.payload.decode())
+        payload = json.loads(raw.decode())
     except Exception:
-        print("Invalid JSON")
-        return
+        logger.warning("Érvénytelen JSON")
+        return None
 
     card_id = payload.get("cardID")
     room = payload.get("doorID")
@@ -82,18 +152,14 @@ def on_message(client, userdata, msg):
     sig = payload.get("sig")
 
     if not all([card_id, room, ts, sig]):
-        print("Missing fields")
-        return
-
-    expected_sig = simple_sig(card_id, room, ts)
-
-    if expected_sig != sig:
-        print(f"BAD SIGNATURE: card={card_id}, ts={ts}, sig={sig}, expected={expected_sig}")
-        result = "DENY"
-    else:
-        allowed = is_allowed(card_id, room)
-        result = "OK" if allowed else "DENY"
+        logger.warning("Hiányzó mezők", card=card_id, door=room)
+        return None
+    if type(ts) is not int or type(sig) is not int:
+        logger.warning("Érvénytelen ts/sig", card=card_id, door=room)
+        return None
+    return card_id, room, ts, sig
 
+def publish_result(client, room, ts, sig, result, received):
     # --- Visszaküldött üzenet most már tartalmazza a sig-et is ---
     response = {
         "accessResult": result,
@@ -103,14 +169,163 @@ def on_message(client, userdata, msg):
 
     response_topic = f"hotel/{room}/result"
     client.publish(response_topic, json.dumps(response), qos=1)
-    print(f"{card_id} -> {room}: {result}")
-    
+    elapsed = time.perf_counter() - received
+    latency.record(room, elapsed)
+    AUTH_SECONDS.observe(elapsed)
+    AUTH_RESULTS.inc(result)
+    return elapsed
+
+def handle_auth(client, raw, received):
+    handle_batch([(client, raw, received)])
+
+def handle_batch(batch):
+    """
+    Egy burst feldolgozása: aláírások egyben (verify_batch), aztán a
+    visszajátszás szűrő, és csak az ezen átjutó kérések érik el a DB-t.
+    """
+    dequeued = time.perf_counter()
+    items = []
+    for client, raw, received in batch:
+        parsed = parse_auth(raw)
+        if parsed is not None:
+            items.append((client, received, parsed))
+        else:
+            AUTH_REJECTS.inc("invalid")
+    if not items:
+        return
+
+    valid = verify_batch([parsed for _, _, parsed in items])
+    verified = time.perf_counter()
+    for (client, received, (card_id, room, ts, sig)), sig_ok in zip(items, valid):
+        # Kérésenként egy trace az érkezéstől; a köteg közös szakaszai mindegyikbe bekerülnek
+        with tracing.trace("door_auth", start=received, door=room, card=card_id, batch=len(items)) as t:
+            t.add("queue", dequeued - received, dequeued)
+            t.add("parse_verify", verified - dequeued, verified)
+            try:
+                if not sig_ok:
+                    expected_sig = simple_sig(card_id, room, ts)
+                    logger.warning("Hibás aláírás", card=card_id, door=room, ts=ts, sig=sig, expected=expected_sig)
+                    AUTH_REJECTS.inc("bad_signature")
+                    result, reason = "DENY", "bad_signature"
+                else:
+                    with tracing.span("replay"):
+                        reason = replay_guard.check(card_id, room, ts)
+                    if reason == "replay":
+                        # Már megválaszolt üzenet (pl. a terminál újraküldte): nem
+                        # válaszolunk újra, hogy egy késő DENY ne írja felül az OK-t
+                        logger.info("Ismételt üzenet eldobva", card=card_id, door=room, ts=ts)
+                        AUTH_REJECTS.inc("replay")
+                        t.fields["result"] = "DROP"
+                        audit.record("door", card=card_id, door=room, result="DROP", detail="replay", hotel=_hotel())
+                        continue
+                    if reason is not None:
+                        AUTH_REJECTS.inc(reason)
+                        result = "DENY"
+                    else:
+                        with tracing.span("access"):
+                            allowed = is_allowed(card_id, room)
+                        result = "OK" if allowed else "DENY"
+
+                with tracing.span("publish"):
+                    elapsed = publish_result(client, room, ts, sig, result, received)
+                t.fields["result"] = result
+                count_stat("allowed" if result == "OK" else "denied")
+                audit.record("door", card=card_id, door=room, result=result, latency=elapsed,
+                             detail=reason, hotel=_hotel())
+                logger.info("Ajtó auth", card=card_id, door=room, result=result, reason=reason,
+                            ms=round(elapsed * 1000, 2))
+            except Exception:
+                count_stat("errors")
+                logger.exception("Hiba az auth feldolgozásakor", card=card_id, door=room)
+
+def reject_busy(client, raw, received):
+    # Túlterheléskor azonnal tiltunk (fail-closed), hogy az ajtó ne timeouton várjon
+    parsed = parse_auth(raw)
+    if parsed is None:
+        return
+    card_id, room, ts, sig = parsed
+    elapsed = publish_result(client, room, ts, sig, "DENY", received)
+    audit.record("door", card=card_id, door=room, result="DENY", latency=elapsed, detail="busy", hotel=_hotel())
+    logger.warning("Ajtó auth", card=card_id, door=room, result="DENY", reason="busy")
+
+# -------- WORKEREK --------
+def auth_worker():
+    while True:
+        # Ami közben összegyűlt, azt egy menetben ellenőrizzük
+        batch = [auth_queue.get()]
+        while len(batch) < VERIFY_BATCH:
+            try:
+                batch.append(auth_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            handle_batch(batch)
+        except Exception:
+            count_stat("errors")
+            logger.exception("Hiba az auth feldolgozásakor")
+
+def count_stat(key):
+    with _stats_lock:
+        stats[key] += 1
+
+def stats_snapshot():
+    with _stats_lock:
+        return dict(stats)
+
+def snapshot():
+    # Nyers állapot a felügyelőnek (validatorCluster), ott összegződik
+    return {
+        "pid": os.getpid(),
+        "queue": auth_queue.qsize(),
+        "stats": stats_snapshot(),
+        "cache": access_cache.stats(),
+        "replay": replay_guard.stats(),
+        "latency": latency.snapshot(),
+    }
+
+def stats_reporter(report=None, interval=STATS_INTERVAL):
+    while True:
+        time.sleep(interval)
+        if report is not None:
+            report(snapshot())
+            continue
+        logger.info("Statisztika", queue=auth_queue.qsize(), **stats_snapshot(),
+                    cache=access_cache.stats(), replay=replay_guard.stats())
+        for door, summary in sorted(latency.summary().items()):
+            logger.info("Ajtó késleltetés", door=door, **summary)
+
+def start_workers(count=WORKER_COUNT, report=None, interval=STATS_INTERVAL):
+    for i in range(count):
+        threading.Thread(target=auth_worker, name=f"auth-worker-{i}", daemon=True).start()
+    threading.Thread(target=stats_reporter, args=(report, interval), name="auth-stats", daemon=True).start()
+
 # -------- MAIN --------
-def main():
-    client = mqtt.Client(client_id="hotel-auth-service-001")
+def main(broker=MQTT_BROKER, port=MQTT_PORT, client_id=CLIENT_ID, topic=AUTH_TOPIC,
+         shard=None, report=None, report_interval=STATS_INTERVAL, service="validator",
+         hotel_id=HOTEL_ID):
+    """
+    Egy validator folyamat. Több folyamatos módban (validatorCluster) egyedi
+    client_id-t és megosztott topicot ($share/...) vagy shard=(index, db)
+    ajtó-szűrést kap, a statisztikát pedig a report callbacknek adja.
+    A metrikák `service` néven kerülnek a server.py /metrics végpontjára,
+    a lassú kérések és a profil kérések ugyanígy (tracing.py, /debug/*).
+    Csak a hotel_id (egyetlen beállított hotelnél az) hotel kulcsai nyitnak;
+    több hotelnél hotel_id nélkül el sem indul (hotels.scope).
+    """
+    global HOTEL_ID
+    HOTEL_ID = hotels.scope(hotel_id)
+    metrics.start_exporter(service)
+    tracing.start_agent(service)
+    try:
+        schema.ensure()
+    except Exception as e:
+        logger.warning("⚠️ Séma migráció sikertelen", error=e)
+    audit.start()
+    start_workers(report=report, interval=report_interval)
+    client = mqtt.Client(client_id=client_id, userdata={"topic": topic, "shard": shard})
     client.on_connect = on_connect
     client.on_message = on_message
-    client.connect(MQTT_BROKER, MQTT_PORT, keepalive=60)
+    client.connect(broker, port, keepalive=60)
     client.loop_forever()
 
 if __name__ == "__main__":
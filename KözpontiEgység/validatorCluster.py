@@ -0,0 +1,220 @@
+"""
+Több folyamatos validator: N validator.main() folyamat egy felügyelővel.
+
+Két elosztási mód:
+  - "shared": MQTT megosztott feliratkozás ($share/<csoport>/hotel/+/auth),
+    a broker minden kérést csak egy folyamatnak ad (Mosquitto >= 1.6).
+  - "shard":  mindenki a hotel/+/auth-ot kapja, de csak a saját ajtóit
+    (crc32(doorID) % N) dolgozza fel; determinisztikus, ajtónként mindig
+    ugyanaz a folyamat (sorrend, cache), de minden üzenet N-szer megy ki.
+
+A felügyelő a leállt folyamatot növekvő várakozással újraindítja, a
+folyamatok statisztikáját összegzi (számlálók + közös percentilisek).
+
+    python validatorCluster.py [folyamatok] [shared|shard]
+"""
+import multiprocessing as mp
+import queue
+import signal
+import sys
+import time
+
+import hotels
+import logs
+import validator
+from latency import merge_snapshots
+
+# -------- CONFIG --------
+PROCESS_COUNT = 2
+MODE = "shared"
+SHARE_GROUP = "hotel-auth"
+REPORT_INTERVAL = 10        # a folyamatok ilyen gyakran küldenek statisztikát
+STATS_INTERVAL = validator.STATS_INTERVAL
+RESTART_BACKOFF_MAX = 30
+STABLE_SECONDS = 60         # ennyi futás után a backoff visszaáll
+
+logger = logs.get("validatorCluster")
+
+
+def worker_topic(mode, group=SHARE_GROUP):
+    if mode == "shared":
+        return f"$share/{group}/{validator.AUTH_TOPIC}"
+    return validator.AUTH_TOPIC
+
+
+def _worker_main(index, count, mode, broker, port, stats_queue, report_interval):
+    # Gyerek folyamat: a SIGINT-et a felügyelő kezeli
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    def report(snap):
+        snap["index"] = index
+        try:
+            stats_queue.put_nowait(snap)
+        except queue.Full:
+            pass
+
+    validator.main(
+        broker, port,
+        client_id=f"{validator.CLIENT_ID}-w{index}",
+        topic=worker_topic(mode),
+        shard=(index, count) if mode == "shard" else None,
+        report=report,
+        report_interval=report_interval,
+        service=f"validator-w{index}",
+        hotel_id=validator.HOTEL_ID,
+    )
+
+
+class _Slot:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.started_at = 0.0
+        self.restarts = 0
+        self.backoff = 1
+        self.restart_at = 0.0
+        self.last_exit = None
+
+
+class ValidatorCluster:
+    def __init__(self, count=PROCESS_COUNT, mode=MODE, broker=validator.MQTT_BROKER,
+                 port=validator.MQTT_PORT, report_interval=REPORT_INTERVAL):
+        if mode not in ("shared", "shard"):
+            raise ValueError(f"Ismeretlen mód: {mode}")
+        self.count = count
+        self.mode = mode
+        self.broker = broker
+        self.port = port
+        self.report_interval = report_interval
+
+        # spawn: minden folyamat tiszta validator modult tölt be (saját pool, cache, sor)
+        self._ctx = mp.get_context("spawn")
+        self._stats_queue = self._ctx.Queue(maxsize=count * 16)
+        self._slots = [_Slot(i) for i in range(count)]
+        self._latest = {}           # index -> utolsó snapshot
+        self._running = False
+
+    # -------- FOLYAMATOK --------
+    def _spawn(self, slot):
+        slot.process = self._ctx.Process(
+            target=_worker_main,
+            args=(slot.index, self.count, self.mode, self.broker, self.port,
+                  self._stats_queue, self.report_interval),
+            name=f"validator-w{slot.index}",
+            daemon=True,
+        )
+        slot.process.start()
+        slot.started_at = time.monotonic()
+        logger.info("🚀 Worker elindult", worker=f"validator-w{slot.index}", pid=slot.process.pid, mode=self.mode)
+
+    def start(self):
+        self._running = True
+        for slot in self._slots:
+            self._spawn(slot)
+        return self
+
+    def check(self):
+        """Halott folyamatok újraindítása (backoff-fal) és a statisztikák begyűjtése."""
+        now = time.monotonic()
+        for slot in self._slots:
+            process = slot.process
+            if process is not None and process.is_alive():
+                if now - slot.started_at >= STABLE_SECONDS:
+                    slot.backoff = 1
+                continue
+
+            if process is not None:
+                slot.last_exit = process.exitcode
+                slot.process = None
+                slot.restart_at = now + slot.backoff
+                self._latest.pop(slot.index, None)
+                logger.warning("⚠️ Worker leállt", worker=f"validator-w{slot.index}",
+                               exitcode=slot.last_exit, restart_in=slot.backoff)
+                slot.backoff = min(slot.backoff * 2, RESTART_BACKOFF_MAX)
+            elif self._running and now >= slot.restart_at:
+                slot.restarts += 1
+                self._spawn(slot)
+
+        self._collect()
+
+    def _collect(self):
+        while True:
+            try:
+                snap = self._stats_queue.get_nowait()
+            except queue.Empty:
+                return
+            self._latest[snap["index"]] = snap
+
+    # -------- STATISZTIKA --------
+    def stats(self):
+        snaps = list(self._latest.values())
+        totals = {}
+        for snap in snaps:
+            for key, value in snap["stats"].items():
+                totals[key] = totals.get(key, 0) + value
+        return {
+            "mode": self.mode,
+            "processes": [
+                {
+                    "index": slot.index,
+                    "pid": slot.process.pid if slot.process else None,
+                    "alive": bool(slot.process and slot.process.is_alive()),
+                    "restarts": slot.restarts,
+                    "last_exit": slot.last_exit,
+                    "queue": self._latest.get(slot.index, {}).get("queue"),
+                }
+                for slot in self._slots
+            ],
+            "totals": totals,
+            "latency": merge_snapshots(snap["latency"] for snap in snaps),
+        }
+
+    def run(self, poll=1.0, stats_interval=STATS_INTERVAL):
+        next_report = time.monotonic() + stats_interval
+        try:
+            while self._running:
+                self.check()
+                if time.monotonic() >= next_report:
+                    next_report += stats_interval
+                    self._print_stats()
+                time.sleep(poll)
+        finally:
+            self.stop()
+
+    def _print_stats(self):
+        summary = self.stats()
+        alive = sum(p["alive"] for p in summary["processes"])
+        logger.info("Klaszter statisztika", alive=f"{alive}/{self.count}", **summary["totals"])
+        for door, s in sorted(summary["latency"].items()):
+            logger.info("Ajtó késleltetés", door=door, **s)
+
+    def stop(self):
+        self._running = False
+        for slot in self._slots:
+            if slot.process is not None and slot.process.is_alive():
+                slot.process.terminate()
+        for slot in self._slots:
+            if slot.process is not None:
+                slot.process.join(timeout=5)
+
+
+def main(count=PROCESS_COUNT, mode=MODE):
+    # Hotel nélkül a workerek el sem indulnának: ne az újraindítási ciklusban derüljön ki
+    hotels.scope(validator.HOTEL_ID)
+    cluster = ValidatorCluster(count, mode).start()
+
+    def _terminate(signum, frame):
+        cluster._running = False
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        cluster.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else PROCESS_COUNT,
+        sys.argv[2] if len(sys.argv) > 2 else MODE,
+    )
@@ -88,11 +88,24 @@ protected function authenticateDevice(Request $request, $requiredHotelId = null)
         ];
     }
 
+    /**
+     * Rows touched this many seconds before the device cursor are sent again,
+     * so a transaction committed late is not missed by the next delta sync.
+     */
+    const SYNC_OVERLAP_SECONDS = 5;
+
     /**
      * Get bookings for a hotel - secured with device token
      * Token can be sent via:
      * 1. Authorization header: Bearer {token}
      * 2. Query parameter: ?token={token}
+     *
+     * Delta sync:
+     * - ?since={cursor} returns only bookings, rooms and rfidKeys changed since
+     *   the cursor; the complete id lists in "ids" let the device delete the rest
+     * - If-None-Match: {etag} returns 304 when nothing changed at all
+     * Every response carries the new "cursor" and an ETag header. A hotel
+     * without confirmed bookings gets 200 with empty lists, not 404.
      */
     public function getBookings(Request $request, $hotelId)
     {
@@ -101,26 +114,43 @@ public function getBookings(Request $request, $hotelId)
         if ($auth['error']) {
             return $auth['error'];
         }
-        
-        // Proceed with original logic
-        // Foglalások a kapcsolódó szobákkal
-        $bookings = Booking::where('hotels_id', $hotelId)
-            ->where('status', 'confirmed')
-            ->select('id','users_id','startDate','endDate','checkInToken','checkInstatus','checkInTime','checkOutTime','status')
-            ->get();
 
-        if ($bookings->isEmpty()) {
-            return response()->json(['message' => 'Booking not found'], 404);
+        // Érvénytelen cursor esetén teljes szinkron megy ki
+        $since = null;
+        if ($request->query('since')) {
+            try {
+                $since = \Carbon\Carbon::parse($request->query('since'));
+            } catch (\Exception $e) {
+                $since = null;
+            }
         }
 
-        // Hotel összes szobája
-        $rooms = Room::where('hotels_id', $hotelId)
-            ->select('id','name')
-            ->get();
+        // Foglalások a kapcsolódó szobákkal
+        $bookingsQuery = Booking::where('hotels_id', $hotelId)
+            ->where('status', 'confirmed');
+        $roomsQuery = Room::where('hotels_id', $hotelId);
+        $rfidKeysQuery = RFIDKey::where('hotels_id', $hotelId);
+
+        // A törléshez a teljes id listák kellenek (delta módban is)
+        $ids = [
+            'bookings' => (clone $bookingsQuery)->orderBy('id')->pluck('id'),
+            'rooms' => (clone $roomsQuery)->orderBy('id')->pluck('id'),
+            'rfidKeys' => (clone $rfidKeysQuery)->orderBy('id')->pluck('id'),
+        ];
+
+        // Foglalás nélküli hotel is 200: az üres "ids" alapján törli az eszköz
+        // a már nem érvényes foglalásokat (404-re semmit sem törölne)
+        $cursor = collect([
+            (clone $bookingsQuery)->max('updatedAt'),
+            (clone $roomsQuery)->max('updatedAt'),
+            (clone $rfidKeysQuery)->max('updatedAt'),
+        ])->filter()->max() ?? now()->format('Y-m-d H:i:s');
 
         // Pivot relációk lekérése
         $relations = \DB::table('bookingsRelation')
-            ->whereIn('booking_id', $bookings->pluck('id'))
+            ->whereIn('booking_id', $ids['bookings'])
+            ->orderBy('booking_id')
+            ->orderBy('rooms_id')
             ->get();
 
         // Get RFID connections - which RFID key is linked to which room
@@ -132,17 +162,38 @@ public function getBookings(Request $request, $hotelId)
                 'rooms.id as roomId',        // Room ID
                 'rooms.name as roomName'     // Room name
             )
+            ->orderBy('rfidKeys.rfidKey')
             ->get();
 
+        // Az ETag mindent lefed, ami a device oldalon változást okozhat
+        $etag = '"' . sha1(json_encode([$cursor, $ids, $relations, $rfidConnections])) . '"';
+        if (trim((string) $request->header('If-None-Match')) === $etag) {
+            return response('', 304)->header('ETag', $etag);
+        }
+
+        if ($since) {
+            $changedSince = $since->copy()->subSeconds(self::SYNC_OVERLAP_SECONDS);
+            $bookingsQuery->where('updatedAt', '>=', $changedSince);
+            $roomsQuery->where('updatedAt', '>=', $changedSince);
+            $rfidKeysQuery->where('updatedAt', '>=', $changedSince);
+        }
+
         return response()->json([
-            'bookings' => $bookings,
-            'rooms' => $rooms,
+            'mode' => $since ? 'delta' : 'full',
+            'cursor' => $cursor,
+            'bookings' => $bookingsQuery
+                ->select('id','users_id','startDate','endDate','checkInToken','checkInstatus','checkInTime','checkOutTime','status')
+                ->get(),
+            'rooms' => $roomsQuery
+                ->select('id','name')
+                ->get(),
             'relations' => $relations,
-            'rfidKeys' => RFIDKey::where('hotels_id', $hotelId)
+            'rfidKeys' => $rfidKeysQuery
                 ->select('id', 'hotels_id', 'isUsed', 'rfidKey')
                 ->get(),
-            'rfidConnections' => $rfidConnections
-        ], 200);
+            'rfidConnections' => $rfidConnections,
+            'ids' => $ids
+        ], 200)->header('ETag', $etag);
     }
     /**
      * Update booking data - secured with device token
@@ -0,0 +1,39 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Tables synced to the central units (DeviceController::getBookings).
+     * The updatedAt watermark lets devices request only the rows changed
+     * since their last sync.
+     */
+    private array $tables = ['bookings', 'rooms', 'rfidKeys'];
+
+    public function up(): void
+    {
+        foreach ($this->tables as $tableName) {
+            if (Schema::hasTable($tableName) && !Schema::hasColumn($tableName, 'updatedAt')) {
+                Schema::table($tableName, function (Blueprint $table) {
+                    $table->timestamp('updatedAt')->useCurrent()->useCurrentOnUpdate();
+                    $table->index('updatedAt');
+                });
+            }
+        }
+    }
+
+    public function down(): void
+    {
+        foreach ($this->tables as $tableName) {
+            if (Schema::hasTable($tableName) && Schema::hasColumn($tableName, 'updatedAt')) {
+                Schema::table($tableName, function (Blueprint $table) {
+                    $table->dropIndex(['updatedAt']);
+                    $table->dropColumn('updatedAt');
+                });
+            }
+        }
+    }
+};